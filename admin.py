@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Survey, SurveyQuestion
+from .models import Survey, SurveyAnswer, SurveyBulkJob, SurveyQuestion, SurveyResponse
 
 @admin.register(Survey)
 class SurveyAdmin(admin.ModelAdmin):
@@ -14,3 +14,21 @@ class SurveyQuestionAdmin(admin.ModelAdmin):
     search_fields = ['text', 'question_type']
     readonly_fields = ['created_at', 'updated_at']
 
+@admin.register(SurveyResponse)
+class SurveyResponseAdmin(admin.ModelAdmin):
+    list_display = ['survey', 'source', 'created_at']
+    search_fields = ['source']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(SurveyAnswer)
+class SurveyAnswerAdmin(admin.ModelAdmin):
+    list_display = ['survey', 'question', 'value', 'numeric_value', 'created_at']
+    search_fields = ['value']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(SurveyBulkJob)
+class SurveyBulkJobAdmin(admin.ModelAdmin):
+    list_display = ['action', 'search_query', 'status', 'processed', 'total', 'created_at', 'finished_at']
+    list_filter = ['status', 'action']
+    readonly_fields = ['created_at', 'finished_at']
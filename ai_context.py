@@ -12,24 +12,41 @@ CONTEXT = """
 - `title`, `description`
 - `is_active`
 - `start_date`, `end_date` (DateField, optional): Survey window
-- `response_count` (PositiveIntegerField, cached): Total responses received
+- `response_count` (PositiveIntegerField, cached): Total responses received, rolled up periodically from sharded counters (can lag behind by a few seconds; read-only in the UI)
 
 **SurveyQuestion** — A question within a survey.
 - `survey` FK → Survey (related_name='questions')
 - `text` (max 500 chars): The question text
 - `question_type` (CharField, default 'text'): Type of answer expected (e.g., 'text', 'multiple_choice', 'rating', 'yes_no')
 - `is_required` (bool, default True)
-- `order` (PositiveIntegerField, default 0): Display order
+- `order` (PositiveIntegerField, default 0): Display order; sparse (1024, 2048, ...) — use `reorder_questions` to change it rather than editing the numbers
+
+**SurveyResponse** — One submission of a survey.
+- `survey` FK → Survey (related_name='responses')
+- `source` (optional): Where it came from (e.g., 'kiosk', 'qr')
+- `idempotency_key` (optional, max 64 chars): Sent by retrying clients; a response is stored once per survey and key
+
+**SurveyAnswer** — The answer to one question within a response.
+- `response` FK → SurveyResponse, `question` FK → SurveyQuestion, `survey` FK → Survey
+- `value` (text as submitted, normalised: 'yes'/'no' for yes_no)
+- `numeric_value` (float, optional): Set for 'rating', 'scale' and 'yes_no' (1/0)
+
+**QuestionRollup / QuestionRollupBucket** — Per-question totals (count, sum, sum of squares) and value histogram, updated as responses are ingested. Without NumPy, the Responses tab shows mean, distribution and NPS ('scale' questions, 0–10) from these; with NumPy it computes median, percentiles, filters (e.g. only respondents who rated a question ≥ 4) and cross-tabs from the stored answers.
+
+**SurveyTrendBucket / QuestionTrendBucket** — Hourly and daily response counts per survey, and per answer value per question, updated as responses are ingested. The dashboard and Responses tab charts of responses over time read these.
+
+**SurveyKpiSnapshot** — Per-hub dashboard figures (total/active/scheduled/expired surveys, total responses, responses today/this week), refreshed whenever surveys change and as responses are ingested.
 
 ### Key Flows
 
-1. **Create survey**: Create Survey with title and optional date window → add SurveyQuestions in order
+1. **Create survey**: Create Survey with title and optional date window → add SurveyQuestions in order (use `import_surveys` to create many surveys at once)
 2. **Activate**: Set `is_active=True` and configure `start_date`/`end_date` if needed
-3. **Collect responses**: (handled externally — no SurveyResponse model in this module) increment `response_count` manually
-4. **Close survey**: Set `is_active=False` or let `end_date` pass
+3. **Collect responses**: POST to `surveys/<id>/submit/`; submissions are buffered and written in batches, and each batch bumps the survey's sharded counter (`SurveyCounterShard`), later rolled up into `response_count`
+4. **Close survey**: Set `is_active=False`, or let `end_date` pass — submissions are only accepted inside the `start_date`/`end_date` window, and the daily `surveys_schedule` run sets `is_active=False` on surveys whose end date has passed
 
 ### Notes
-- This is a minimal survey framework. The models define survey structure (questions) but do not include a SurveyResponse model for storing answers.
+- Responses are written in batches, so a just-submitted response can take up to a second to appear.
+- Deleting a survey is a soft delete and can be undone for a retention period (30 days by default); after that the survey, its questions and its responses are moved to archive tables.
 - For richer feedback collection with scoring and customer linking, see the Feedback module.
 - `question_type` values are freeform strings — common values: 'text', 'multiple_choice', 'rating', 'yes_no', 'scale'
 """
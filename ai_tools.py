@@ -1,24 +1,82 @@
 """AI tools for the Surveys module."""
 from assistant.tools import AssistantTool, register_tool
 
+from surveys.metrics import instrumented_tool
+
+
+LIST_FIELDS = ('id', 'title', 'is_active', 'response_count', 'start_date', 'end_date')
+LIST_SORT_FIELDS = ('title', 'is_active', 'response_count', 'start_date', 'end_date', 'created_at')
+LIST_DEFAULT_LIMIT = 25
+LIST_MAX_LIMIT = 100
+
 
 @register_tool
+@instrumented_tool
 class ListSurveys(AssistantTool):
     name = "list_surveys"
-    description = "List surveys."
+    description = (
+        "List surveys of the current hub, one page at a time. Pass the returned next_cursor to get the "
+        "following page. Set aggregate=true to get counts only instead of rows."
+    )
     module_id = "surveys"
     required_permission = "surveys.view_survey"
-    parameters = {"type": "object", "properties": {"is_active": {"type": "boolean"}}, "required": [], "additionalProperties": False}
+    parameters = {
+        "type": "object",
+        "properties": {
+            "is_active": {"type": "boolean"},
+            "search": {"type": "string", "description": "Words to match in title, description or question text"},
+            "sort": {"type": "string", "enum": list(LIST_SORT_FIELDS)},
+            "descending": {"type": "boolean"},
+            "limit": {"type": "integer", "minimum": 1, "maximum": LIST_MAX_LIMIT},
+            "cursor": {"type": "string"},
+            "aggregate": {"type": "boolean"},
+        },
+        "required": [],
+        "additionalProperties": False,
+    }
 
     def execute(self, args, request):
+        from django.db.models import Count, Q, Sum
+        from django.utils import timezone
         from surveys.models import Survey
-        qs = Survey.objects.all()
+        from surveys.pagination import CursorPaginator
+        from surveys.search import search_surveys
+        hub_id = request.session.get('hub_id')
+        qs = Survey.objects.filter(hub_id=hub_id, is_deleted=False)
         if 'is_active' in args:
             qs = qs.filter(is_active=args['is_active'])
-        return {"surveys": [{"id": str(s.id), "title": s.title, "is_active": s.is_active, "response_count": s.response_count, "start_date": str(s.start_date) if s.start_date else None, "end_date": str(s.end_date) if s.end_date else None} for s in qs]}
+        if args.get('search'):
+            qs = search_surveys(qs, hub_id, args['search'])
+
+        if args.get('aggregate'):
+            today = timezone.localdate()
+            figures = qs.order_by().aggregate(
+                total=Count('id'),
+                active=Count('id', filter=Q(is_active=True)),
+                scheduled=Count('id', filter=Q(is_active=True, start_date__gt=today)),
+                expired=Count('id', filter=Q(end_date__lt=today)),
+                responses=Sum('response_count'),
+            )
+            figures['responses'] = figures['responses'] or 0
+            return figures
+
+        sort = args.get('sort') if args.get('sort') in LIST_SORT_FIELDS else 'title'
+        try:
+            limit = int(args.get('limit') or LIST_DEFAULT_LIMIT)
+        except (TypeError, ValueError):
+            limit = LIST_DEFAULT_LIMIT
+        limit = min(max(limit, 1), LIST_MAX_LIMIT)
+        fields = LIST_FIELDS if sort in LIST_FIELDS else LIST_FIELDS + (sort,)
+        paginator = CursorPaginator(qs.values(*fields), sort, descending=bool(args.get('descending')), per_page=limit)
+        page = paginator.get_page(args.get('cursor'))
+        return {
+            "surveys": [{"id": str(row['id']), "title": row['title'], "is_active": row['is_active'], "response_count": row['response_count'], "start_date": str(row['start_date']) if row['start_date'] else None, "end_date": str(row['end_date']) if row['end_date'] else None} for row in page],
+            "next_cursor": page.next_cursor,
+        }
 
 
 @register_tool
+@instrumented_tool
 class CreateSurvey(AssistantTool):
     name = "create_survey"
     description = "Create a survey with questions."
@@ -37,14 +95,56 @@ class CreateSurvey(AssistantTool):
     }
 
     def execute(self, args, request):
-        from surveys.models import Survey, SurveyQuestion
-        s = Survey.objects.create(title=args['title'], description=args.get('description', ''), start_date=args.get('start_date'), end_date=args.get('end_date'))
-        for i, q in enumerate(args.get('questions', [])):
-            SurveyQuestion.objects.create(survey=s, text=q['text'], question_type=q.get('question_type', 'text'), is_required=q.get('is_required', False), order=i)
-        return {"id": str(s.id), "title": s.title, "questions_count": len(args.get('questions', [])), "created": True}
+        from surveys import importer
+        questions = [dict(q, is_required=q.get('is_required', False)) for q in args.get('questions', [])]
+        try:
+            result, ids = importer.import_surveys(request.session.get('hub_id'), [dict(args, questions=questions)])
+        except importer.SurveyImportError as exc:
+            return {"error": str(exc)}
+        return {"id": str(ids[0]), "title": args['title'], "questions_count": result.questions, "created": True}
+
+
+SURVEY_DEFINITION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"}, "description": {"type": "string"},
+        "is_active": {"type": "boolean"},
+        "start_date": {"type": "string"}, "end_date": {"type": "string"},
+        "questions": {"type": "array", "items": {"type": "object", "properties": {"text": {"type": "string"}, "question_type": {"type": "string"}, "is_required": {"type": "boolean"}}, "required": ["text"]}},
+    },
+    "required": ["title"],
+}
+IMPORT_MAX_SURVEYS = 500
+
+
+@register_tool
+@instrumented_tool
+class ImportSurveys(AssistantTool):
+    name = "import_surveys"
+    description = f"Create many surveys with their questions in one go (up to {IMPORT_MAX_SURVEYS} per call)."
+    module_id = "surveys"
+    required_permission = "surveys.add_survey"
+    requires_confirmation = True
+    parameters = {
+        "type": "object",
+        "properties": {"surveys": {"type": "array", "items": SURVEY_DEFINITION_SCHEMA, "maxItems": IMPORT_MAX_SURVEYS}},
+        "required": ["surveys"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from surveys import importer
+        if len(args['surveys']) > IMPORT_MAX_SURVEYS:
+            return {"error": f"At most {IMPORT_MAX_SURVEYS} surveys per call"}
+        try:
+            result, _ids = importer.import_surveys(request.session.get('hub_id'), args['surveys'])
+        except importer.SurveyImportError as exc:
+            return {"error": str(exc)}
+        return {"surveys_created": result.surveys, "questions_created": result.questions}
 
 
 @register_tool
+@instrumented_tool
 class UpdateSurvey(AssistantTool):
     name = "update_survey"
     description = "Update a survey's title, description, dates, or active status."
@@ -64,19 +164,56 @@ class UpdateSurvey(AssistantTool):
     }
 
     def execute(self, args, request):
+        from django.core.exceptions import ValidationError
         from surveys.models import Survey
+        from surveys.signals import surveys_changed
         try:
-            s = Survey.objects.get(id=args['survey_id'])
-        except Survey.DoesNotExist:
+            s = Survey.objects.get(id=args['survey_id'], hub_id=request.session.get('hub_id'), is_deleted=False)
+        except (Survey.DoesNotExist, ValidationError):
             return {"error": "Survey not found"}
-        for field in ('title', 'description', 'is_active', 'start_date', 'end_date'):
-            if field in args:
-                setattr(s, field, args[field])
-        s.save()
+        fields = [f for f in ('title', 'description', 'is_active', 'start_date', 'end_date') if f in args]
+        for field in fields:
+            setattr(s, field, args[field])
+        s.save(update_fields=fields + ['updated_at'])
+        surveys_changed.send(sender=Survey, hub_id=s.hub_id, survey_ids=[s.pk], saved=True)
         return {"id": str(s.id), "title": s.title, "updated": True}
 
 
 @register_tool
+@instrumented_tool
+class ReorderQuestions(AssistantTool):
+    name = "reorder_questions"
+    description = "Change the order of a survey's questions. Pass every question id of the survey in the new order."
+    module_id = "surveys"
+    required_permission = "surveys.change_survey"
+    requires_confirmation = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "survey_id": {"type": "string"},
+            "question_ids": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["survey_id", "question_ids"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from django.core.exceptions import ValidationError
+        from surveys import ordering
+        from surveys.models import Survey
+        try:
+            s = Survey.objects.get(id=args['survey_id'], hub_id=request.session.get('hub_id'), is_deleted=False)
+        except (Survey.DoesNotExist, ValidationError):
+            return {"error": "Survey not found"}
+        try:
+            updated = ordering.reorder(s.pk, args['question_ids'])
+        except ordering.OrderingError as exc:
+            return {"error": str(exc)}
+        return {"id": str(s.id), "questions_moved": updated, "reordered": True}
+
+
+@register_tool
+@instrumented_tool
 class DeleteSurvey(AssistantTool):
     name = "delete_survey"
     description = "Delete a survey by ID."
@@ -91,10 +228,17 @@ class DeleteSurvey(AssistantTool):
     }
 
     def execute(self, args, request):
+        from django.core.exceptions import ValidationError
+        from django.utils import timezone
         from surveys.models import Survey
+        from surveys.signals import surveys_changed
         try:
-            s = Survey.objects.get(id=args['survey_id'])
-        except Survey.DoesNotExist:
+            s = Survey.objects.get(id=args['survey_id'], hub_id=request.session.get('hub_id'), is_deleted=False)
+        except (Survey.DoesNotExist, ValidationError):
             return {"error": "Survey not found"}
-        s.delete()
+        # Soft delete, as the views do; ``archive.purge`` removes it after the retention period.
+        s.is_deleted = True
+        s.deleted_at = timezone.now()
+        s.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+        surveys_changed.send(sender=Survey, hub_id=s.hub_id, survey_ids=[s.pk], saved=True)
         return {"deleted": True}
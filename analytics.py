@@ -0,0 +1,362 @@
+"""
+Vectorised response analytics for the Surveys module.
+
+``load`` reads every answer of a survey into a ``ResponseMatrix``: one NumPy
+column per question and one row per response, ``NaN`` where the response
+skipped the question. Columns are coded by ``question_type``:
+
+* ``rating`` and ``scale`` hold the numeric answer;
+* ``yes_no`` holds ``1.0`` for yes and ``0.0`` for no;
+* ``multiple_choice`` holds an index into the column's ``labels``;
+* ``text`` holds ``1.0`` when answered (only counts are reported).
+
+``Filter`` predicates become boolean masks over the rows, and ``analyse``
+computes per-question stats (mean, median, percentiles, distribution, NPS)
+and an optional cross-tab over the rows a mask keeps, with no Python loop over
+responses.
+
+Large surveys are read from their memory-mapped columnar snapshot
+(``snapshots``) rather than the database; numeric columns are then views
+over the shared pages, not copies.
+
+Results are cached under the survey's definition version and its
+response-count watermark (``counters.total``): new responses or question
+edits move to a new key instead of invalidating the old one. Loaded matrices
+are also kept in a small per-process LRU, so trying several filters reads the
+answers once.
+
+NumPy is optional. Without it ``available()`` is false and the Responses tab
+falls back to the rollup stats.
+"""
+import hashlib
+import operator
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import counters, definitions, ingest, snapshots
+from .models import SurveyAnswer
+from .rollups import NPS_TYPES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_MATRIX_LRU_SIZE = 4
+LOAD_CHUNK_SIZE = 5000
+PERCENTILES = (25, 50, 75, 90)
+
+VALUE_TYPES = snapshots.VALUE_TYPES
+CHOICE_TYPES = snapshots.CHOICE_TYPES
+# Distributions listed in value order rather than by frequency.
+ORDERED_TYPES = {'rating', 'scale'}
+YES_NO_LABELS = {0.0: 'no', 1.0: 'yes'}
+
+OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+OPERATOR_SYMBOLS = {'eq': '=', 'ne': '≠', 'gt': '>', 'gte': '≥', 'lt': '<', 'lte': '≤'}
+
+
+class AnalyticsError(ValueError):
+    """A filter or cross-tab cannot be applied to the survey's answers."""
+
+
+def available():
+    return np is not None
+
+
+@dataclass
+class Column:
+    question: object  # QuestionDefinition
+    values: object  # float64 array, NaN where not answered
+    labels: tuple = ()  # multiple_choice: code -> answer text
+
+
+@dataclass
+class ResponseMatrix:
+    survey_id: str
+    version: int
+    watermark: int
+    size: int
+    columns: dict  # str(question id) -> Column
+
+    def column(self, question_id):
+        try:
+            return self.columns[str(question_id)]
+        except KeyError:
+            raise AnalyticsError(f'Unknown question {question_id}')
+
+
+@dataclass(frozen=True)
+class Filter:
+    """Keep responses whose answer to ``question_id`` satisfies ``op`` ``value``."""
+    question_id: str
+    op: str
+    value: str
+
+    @classmethod
+    def parse(cls, text):
+        """A filter from ``<question id>:<op>:<value>``, e.g. ``...:gte:4``."""
+        parts = str(text).split(':', 2)
+        if len(parts) != 3 or parts[1] not in OPERATORS:
+            raise AnalyticsError(f'Invalid filter {text!r}')
+        return cls(*parts)
+
+    def __str__(self):
+        return f'{self.question_id}:{self.op}:{self.value}'
+
+
+@dataclass
+class QuestionAnalysis:
+    """Stats of one question over the filtered responses."""
+    question: object
+    count: int = 0
+    mean: float = None
+    median: float = None
+    stddev: float = None
+    percentiles: list = field(default_factory=list)  # [(percentile, value)]
+    distribution: list = field(default_factory=list)  # [(value, count, percent)]
+    nps: float = None
+
+
+@dataclass
+class CrossTab:
+    row_question: object
+    column_question: object
+    row_labels: list
+    column_labels: list
+    counts: list  # counts[row][column]
+    row_totals: list
+    column_totals: list
+    total: int
+
+    def rows(self):
+        return list(zip(self.row_labels, self.counts, self.row_totals))
+
+
+@dataclass
+class Analysis:
+    watermark: int
+    responses: int
+    matched: int
+    filters: list = field(default_factory=list)
+    questions: list = field(default_factory=list)
+    crosstab: CrossTab = None
+
+
+_matrices = definitions._LRU('SURVEYS_ANALYTICS_MATRIX_LRU_SIZE', DEFAULT_MATRIX_LRU_SIZE)
+
+
+def load(definition, watermark=None):
+    """Read the answers of ``definition``'s questions into a ``ResponseMatrix``."""
+    snapshot = snapshots.open_snapshot(definition, watermark)
+    if snapshot is not None:
+        try:
+            return _from_snapshot(definition, snapshot, watermark)
+        except OSError:
+            # The generation was replaced under us; the database is authoritative.
+            pass
+    return _from_database(definition, watermark)
+
+
+def _from_snapshot(definition, snapshot, watermark):
+    columns = {}
+    for question in definition.questions:
+        question_id = str(question.id)
+        kind = snapshot.kind(question_id)
+        labels = ()
+        if kind == 'f8':
+            values = np.frombuffer(snapshot.values(question_id), dtype=np.float64)
+        elif kind == 'i4':
+            codes = np.frombuffer(snapshot.codes(question_id), dtype=np.int32)
+            values = np.where(codes == snapshots.MISSING_CODE, np.nan, codes)
+            labels = snapshot.labels(question_id)
+        else:
+            lengths = np.diff(np.frombuffer(snapshot.offsets(question_id), dtype=np.int64), prepend=0)
+            values = np.where(lengths > 0, 1.0, np.nan)
+        columns[question_id] = Column(question, values, labels)
+    return ResponseMatrix(str(definition.id), definition.version, watermark, snapshot.rows, columns)
+
+
+def _from_database(definition, watermark):
+    rows = {question.id: ([], []) for question in definition.questions}
+    labels = {question.id: {} for question in definition.questions if question.question_type in CHOICE_TYPES}
+    index = {}
+    answers = SurveyAnswer.objects.filter(survey_id=definition.id, is_deleted=False)
+
+    value_ids = [question_id for question_id in rows if question_id not in labels]
+    if value_ids:
+        numbers = answers.filter(question_id__in=value_ids).values_list('response_id', 'question_id', 'numeric_value')
+        for response_id, question_id, number in numbers.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            positions, values = rows[question_id]
+            positions.append(index.setdefault(response_id, len(index)))
+            # Text answers carry no number; 1.0 marks them as answered.
+            values.append(1.0 if number is None else number)
+    if labels:
+        choices = answers.filter(question_id__in=list(labels)).values_list('response_id', 'question_id', 'value')
+        for response_id, question_id, value in choices.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            positions, values = rows[question_id]
+            codes = labels[question_id]
+            positions.append(index.setdefault(response_id, len(index)))
+            values.append(codes.setdefault(value, len(codes)))
+
+    size = len(index)
+    columns = {}
+    for question in definition.questions:
+        positions, values = rows[question.id]
+        column = np.full(size, np.nan)
+        if positions:
+            column[np.asarray(positions, dtype=np.intp)] = values
+        columns[str(question.id)] = Column(question, column, tuple(labels.get(question.id, ())))
+    return ResponseMatrix(str(definition.id), definition.version, watermark, size, columns)
+
+
+def _operand(column, value):
+    question_type = column.question.question_type
+    if question_type in CHOICE_TYPES:
+        try:
+            return float(column.labels.index(value))
+        except ValueError:
+            return None  # nobody gave this answer
+    if question_type not in VALUE_TYPES:
+        raise AnalyticsError(f'Cannot filter on {question_type} questions')
+    try:
+        return ingest.code_answer(question_type, value)[1]
+    except ValueError as exc:
+        raise AnalyticsError(str(exc))
+
+
+def mask(matrix, filters):
+    """Boolean array of the responses that pass every filter."""
+    keep = np.ones(matrix.size, dtype=bool)
+    for item in filters:
+        column = matrix.column(item.question_id)
+        if column.question.question_type in CHOICE_TYPES and item.op not in ('eq', 'ne'):
+            raise AnalyticsError(f'{item.op} does not apply to choice questions')
+        answered = ~np.isnan(column.values)
+        operand = _operand(column, item.value)
+        if operand is None:
+            keep &= answered if item.op == 'ne' else False
+        else:
+            keep &= answered & OPERATORS[item.op](column.values, operand)
+    return keep
+
+
+def _label(column, value):
+    question_type = column.question.question_type
+    if question_type in CHOICE_TYPES:
+        return column.labels[int(value)]
+    if question_type == 'yes_no':
+        return YES_NO_LABELS.get(value, f'{value:g}')
+    return f'{value:g}'
+
+
+def analyse_column(column, keep):
+    values = column.values[keep]
+    values = values[~np.isnan(values)]
+    stats = QuestionAnalysis(question=column.question, count=int(values.size))
+    question_type = column.question.question_type
+    if not values.size or question_type not in VALUE_TYPES | CHOICE_TYPES:
+        return stats
+
+    if question_type in VALUE_TYPES:
+        stats.mean = float(values.mean())
+        stats.stddev = float(values.std())
+    if question_type in ORDERED_TYPES:
+        stats.median = float(np.median(values))
+        stats.percentiles = [(p, float(v)) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))]
+    if question_type in NPS_TYPES:
+        promoters = np.count_nonzero(values >= 9)
+        detractors = np.count_nonzero(values <= 6)
+        stats.nps = round(100.0 * (promoters - detractors) / values.size, 1)
+
+    uniques, counts = np.unique(values, return_counts=True)
+    distribution = [
+        (_label(column, value), int(count), round(100.0 * count / values.size, 1))
+        for value, count in zip(uniques, counts)
+    ]
+    if question_type not in ORDERED_TYPES:
+        distribution.sort(key=lambda item: (-item[1], item[0]))
+    stats.distribution = distribution
+    return stats
+
+
+def cross_tab(matrix, row_question_id, column_question_id, keep):
+    """Counts of responses by their answers to two questions."""
+    row, col = matrix.column(row_question_id), matrix.column(column_question_id)
+    for column in (row, col):
+        if column.question.question_type not in VALUE_TYPES | CHOICE_TYPES:
+            raise AnalyticsError(f'Cannot cross-tabulate {column.question.question_type} questions')
+    both = keep & ~np.isnan(row.values) & ~np.isnan(col.values)
+    row_values, row_codes = np.unique(row.values[both], return_inverse=True)
+    col_values, col_codes = np.unique(col.values[both], return_inverse=True)
+    counts = np.bincount(
+        row_codes * len(col_values) + col_codes, minlength=len(row_values) * len(col_values),
+    ).reshape(len(row_values), len(col_values))
+    return CrossTab(
+        row_question=row.question,
+        column_question=col.question,
+        row_labels=[_label(row, value) for value in row_values],
+        column_labels=[_label(col, value) for value in col_values],
+        counts=counts.tolist(),
+        row_totals=counts.sum(axis=1).tolist(),
+        column_totals=counts.sum(axis=0).tolist(),
+        total=int(counts.sum()),
+    )
+
+
+def get_matrix(definition, watermark):
+    key = (str(definition.id), definition.version, watermark)
+    matrix = _matrices.get(key)
+    if matrix is None:
+        matrix = load(definition, watermark)
+        _matrices.put(key, matrix)
+    return matrix
+
+
+def _cache_key(definition, watermark, filters, crosstab):
+    spec = '|'.join(sorted(str(item) for item in filters)) + '#' + ':'.join(str(q) for q in crosstab or ())
+    digest = hashlib.sha1(spec.encode('utf-8')).hexdigest()[:16]
+    return f'surveys:analytics:{definition.id}:{definition.version}:{watermark}:{digest}'
+
+
+def analyse(survey_id, filters=(), crosstab=None):
+    """
+    ``Analysis`` of ``survey_id`` over the responses passing every filter.
+
+    ``crosstab`` is an optional ``(row question id, column question id)``
+    pair. Returns ``None`` for a missing survey; raises ``AnalyticsError``
+    for filters or cross-tabs that do not apply.
+    """
+    if np is None:
+        raise AnalyticsError('NumPy is required for response analytics')
+    definition = definitions.get_definition(survey_id)
+    if definition is None:
+        return None
+    watermark = counters.total(definition.id)
+    key = _cache_key(definition, watermark, filters, crosstab)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    matrix = get_matrix(definition, watermark)
+    keep = mask(matrix, filters)
+    result = Analysis(
+        watermark=watermark,
+        responses=matrix.size,
+        matched=int(np.count_nonzero(keep)),
+        filters=list(filters),
+        questions=[analyse_column(matrix.columns[str(question.id)], keep) for question in definition.questions],
+        crosstab=cross_tab(matrix, *crosstab, keep) if crosstab else None,
+    )
+    cache.set(key, result, getattr(settings, 'SURVEYS_ANALYTICS_CACHE_TTL', DEFAULT_CACHE_TTL))
+    return result
@@ -9,4 +9,4 @@ class SurveysConfig(AppConfig):
     verbose_name = _('Surveys')
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
@@ -0,0 +1,195 @@
+"""
+Archival of soft-deleted surveys and questions for the Surveys module.
+
+Deleting a survey or question only sets ``is_deleted``. Once a row has been
+deleted for ``SURVEYS_ARCHIVE_RETENTION_DAYS``, ``purge`` moves it into its
+archive table (``ArchivedSurvey``, ``ArchivedSurveyQuestion``, ...) together
+with everything hanging off it: a survey takes its questions, responses and
+answers along, a question its answers.
+
+Rows move ``SURVEYS_ARCHIVE_CHUNK_SIZE`` at a time, children first, each chunk
+copied and deleted in one short transaction, with ``SURVEYS_ARCHIVE_PAUSE``
+seconds between chunks so replicas and concurrent writers keep up. Every
+chunk commits on its own and the candidates are re-read from the live
+tables, so an interrupted run resumes where it stopped when started again.
+``plan`` reports what a run would move without touching anything.
+"""
+import datetime
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import definitions, snapshots
+from .models import (
+    ArchivedSurvey, ArchivedSurveyAnswer, ArchivedSurveyQuestion, ArchivedSurveyResponse,
+    Survey, SurveyAnswer, SurveyQuestion, SurveyResponse,
+)
+
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_PAUSE = 0.1
+
+# Live model -> archive table, children before their parents.
+ARCHIVES = {
+    SurveyAnswer: ArchivedSurveyAnswer,
+    SurveyResponse: ArchivedSurveyResponse,
+    SurveyQuestion: ArchivedSurveyQuestion,
+    Survey: ArchivedSurvey,
+}
+TABLES = {model: model._meta.db_table for model in ARCHIVES}
+
+
+def cutoff(now=None):
+    days = getattr(settings, 'SURVEYS_ARCHIVE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    return (now or timezone.now()) - datetime.timedelta(days=days)
+
+
+def expired(model, before, hub_id=None):
+    """Rows of ``model`` soft-deleted before ``before``; rows without ``deleted_at`` go by ``updated_at``."""
+    qs = model.all_objects.filter(is_deleted=True).filter(
+        Q(deleted_at__lt=before) | Q(deleted_at__isnull=True, updated_at__lt=before),
+    )
+    if hub_id:
+        qs = qs.filter(hub_id=hub_id)
+    return qs
+
+
+def _targets(before, hub_id=None):
+    """``(surveys, questions)``: the expired surveys, and expired questions of surveys that stay."""
+    surveys = expired(Survey, before, hub_id)
+    questions = expired(SurveyQuestion, before, hub_id).exclude(survey__in=surveys)
+    return surveys, questions
+
+
+@dataclass
+class Report:
+    """Rows moved (or, for a dry run, to be moved) per live table, and their estimated size."""
+    dry_run: bool = False
+    rows: dict = field(default_factory=lambda: dict.fromkeys(TABLES.values(), 0))
+    bytes: dict = field(default_factory=dict)  # table -> estimated bytes, when the database can tell
+    chunks: int = 0
+
+    @property
+    def total_rows(self):
+        return sum(self.rows.values())
+
+    @property
+    def total_bytes(self):
+        return sum(self.bytes.values()) if self.bytes else None
+
+
+def _row_bytes(table):
+    """Average on-disk bytes per row of ``table``, indexes included; ``None`` where unknown."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_total_relation_size(c.oid)::float8 / GREATEST(c.reltuples, 1) '
+            'FROM pg_class c WHERE c.oid = %s::regclass',
+            [table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _estimate(report):
+    for table, rows in report.rows.items():
+        per_row = _row_bytes(table)
+        if per_row is not None:
+            report.bytes[table] = int(per_row * rows)
+    return report
+
+
+def plan(before=None, hub_id=None):
+    """What ``purge`` would move right now, as a dry-run ``Report``."""
+    before = before or cutoff()
+    surveys, questions = _targets(before, hub_id)
+    report = Report(dry_run=True)
+    report.rows[TABLES[Survey]] = surveys.count()
+    report.rows[TABLES[SurveyQuestion]] = (
+        SurveyQuestion.all_objects.filter(survey__in=surveys).count() + questions.count()
+    )
+    report.rows[TABLES[SurveyResponse]] = SurveyResponse.all_objects.filter(survey__in=surveys).count()
+    report.rows[TABLES[SurveyAnswer]] = SurveyAnswer.all_objects.filter(
+        Q(survey__in=surveys) | Q(question__in=questions),
+    ).count()
+    return _estimate(report)
+
+
+def _move(model, ids):
+    """Copy the ``model`` rows ``ids`` into their archive table and delete them. Returns the rows moved."""
+    archive = ARCHIVES[model]
+    columns = [f.attname for f in archive._meta.concrete_fields if f.attname != 'archived_at']
+    rows = list(model.all_objects.filter(pk__in=ids).values(*columns))
+    if not rows:
+        return 0
+    # A row archived by an earlier, interrupted run is already there.
+    archive.objects.bulk_create([archive(**row) for row in rows], ignore_conflicts=True)
+    model.all_objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+class _Run:
+    def __init__(self, report, chunk_size, pause):
+        self.report = report
+        self.chunk_size = chunk_size
+        self.pause = pause
+
+    def _pause(self):
+        if self.report.chunks and self.pause:
+            time.sleep(self.pause)
+
+    def drain(self, model, queryset):
+        """Move every row of ``queryset`` in primary-key chunks, one transaction each."""
+        ids = queryset.order_by('pk').values_list('pk', flat=True)
+        while True:
+            chunk = list(ids[:self.chunk_size])
+            if not chunk:
+                return
+            self._pause()
+            with transaction.atomic():
+                self.report.rows[TABLES[model]] += _move(model, chunk)
+            self.report.chunks += 1
+
+    def finish(self, model, pk, children=()):
+        """Move the row ``pk`` of ``model`` with its remaining ``children`` querysets in one transaction."""
+        self._pause()
+        with transaction.atomic():
+            for child_model, queryset in children:
+                self.report.rows[TABLES[child_model]] += _move(child_model, list(queryset.values_list('pk', flat=True)))
+            self.report.rows[TABLES[model]] += _move(model, [pk])
+        self.report.chunks += 1
+
+
+def _discard(survey_id):
+    definitions.invalidate([str(survey_id)])
+    snapshots.discard(survey_id)
+
+
+def purge(before=None, hub_id=None, chunk_size=None, pause=None):
+    """
+    Move every survey and question soft-deleted before ``before`` (default:
+    the retention cutoff) into the archive tables. Returns a ``Report``.
+    """
+    before = before or cutoff()
+    chunk_size = chunk_size or getattr(settings, 'SURVEYS_ARCHIVE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    pause = getattr(settings, 'SURVEYS_ARCHIVE_PAUSE', DEFAULT_PAUSE) if pause is None else pause
+    report = Report()
+    run = _Run(report, chunk_size, pause)
+    surveys, questions = _targets(before, hub_id)
+
+    for question_id in list(questions.order_by('pk').values_list('pk', flat=True)):
+        run.drain(SurveyAnswer, SurveyAnswer.all_objects.filter(question_id=question_id))
+        run.finish(SurveyQuestion, question_id)
+
+    for survey_id in list(surveys.order_by('pk').values_list('pk', flat=True)):
+        run.drain(SurveyAnswer, SurveyAnswer.all_objects.filter(survey_id=survey_id))
+        run.drain(SurveyResponse, SurveyResponse.all_objects.filter(survey_id=survey_id))
+        # Questions are few; they leave with the survey so it is never half gone.
+        run.finish(Survey, survey_id, [(SurveyQuestion, SurveyQuestion.all_objects.filter(survey_id=survey_id))])
+        transaction.on_commit(lambda survey_id=survey_id: _discard(survey_id))
+    return _estimate(report)
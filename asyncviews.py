@@ -0,0 +1,50 @@
+"""
+Coroutine views behind the module's synchronous view decorators.
+
+``login_required``, ``permission_required``, ``with_module_nav`` and
+``htmx_view`` wrap plain functions and call them on the request thread.
+``async_view`` lets a coroutine view keep using them by running them in two
+short hops to a worker thread around the coroutine:
+
+* the ``guards`` (authentication and permission checks) run around a
+  stand-in that answers a private sentinel response. If the sentinel comes
+  back the request may proceed, otherwise the guard's own response (a
+  redirect, a 403) is returned as is;
+* the coroutine then does its database work on the event loop through the
+  async ORM and returns a response or a template context;
+* a context goes through the ``renderers`` (navigation, full page or HTMX
+  partial) around a stand-in that answers it.
+
+The event loop stays free while the coroutine awaits its queries, so one
+ASGI worker serves other requests in the meantime.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseBase
+
+
+def _stack(decorators, view):
+    for decorator in reversed(decorators):
+        view = decorator(view)
+    return view
+
+
+def async_view(guards=(), renderers=()):
+    """Decorate a coroutine view with synchronous ``guards`` and ``renderers``, outermost first."""
+    def decorate(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if guards:
+                passed = HttpResponse()
+                guard = _stack(guards, lambda request, *args, **kwargs: passed)
+                response = await sync_to_async(guard)(request, *args, **kwargs)
+                if response is not passed:
+                    return response
+            result = await view(request, *args, **kwargs)
+            if isinstance(result, HttpResponseBase) or not renderers:
+                return result
+            render = _stack(renderers, lambda request, *args, **kwargs: result)
+            return await sync_to_async(render)(request, *args, **kwargs)
+        return wrapper
+    return decorate
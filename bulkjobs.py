@@ -0,0 +1,107 @@
+"""
+Background bulk actions for the Surveys module.
+
+"Select all matching" actions are recorded as a ``SurveyBulkJob`` and run on
+a small per-process thread pool. The job walks the matching surveys in
+primary-key order and updates them ``SURVEYS_BULK_CHUNK_SIZE`` at a time, one
+short transaction per id range, so no statement locks the whole set and the
+datatable can poll ``processed``/``total`` while it runs.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import kpis, search
+from .models import Survey, SurveyBulkJob
+from .signals import surveys_changed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_WORKERS = 2
+
+ACTIONS = {
+    'activate': lambda: {'is_active': True},
+    'deactivate': lambda: {'is_active': False},
+    'delete': lambda: {'is_deleted': True, 'deleted_at': timezone.now()},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'SURVEYS_BULK_WORKERS', DEFAULT_WORKERS)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='surveys-bulk')
+        return _executor
+
+
+def matching_surveys(hub_id, search_query=''):
+    """The live surveys of ``hub_id`` the list shows for ``search_query``."""
+    qs = Survey.objects.filter(hub_id=hub_id, is_deleted=False)
+    if search_query:
+        qs = search.search_surveys(qs, hub_id, search_query)
+    return qs
+
+
+def start(hub_id, action, search_query=''):
+    """
+    Record a bulk ``action`` over every survey matching ``search_query`` and
+    schedule it once the current transaction commits.
+
+    ``SURVEYS_BULK_WORKERS = 0`` runs the job inline instead.
+    """
+    if action not in ACTIONS:
+        raise ValueError(f'Unknown bulk action {action!r}')
+    job = SurveyBulkJob.objects.create(hub_id=hub_id, action=action, search_query=search_query[:255])
+    if getattr(settings, 'SURVEYS_BULK_WORKERS', DEFAULT_WORKERS) <= 0:
+        transaction.on_commit(lambda: run(job.pk))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run(job_id)
+    finally:
+        connections.close_all()
+
+
+def run(job_id):
+    """Execute job ``job_id`` chunk by chunk, recording progress as it goes."""
+    job = SurveyBulkJob.objects.get(pk=job_id)
+    chunk_size = getattr(settings, 'SURVEYS_BULK_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    jobs = SurveyBulkJob.objects.filter(pk=job_id)
+    try:
+        matching = matching_surveys(job.hub_id, job.search_query)
+        jobs.update(status='running', total=matching.count())
+        last_pk = None
+        while True:
+            window = matching.order_by('pk')
+            if last_pk is not None:
+                window = window.filter(pk__gt=last_pk)
+            ids = list(window.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                updated = matching.filter(pk__gte=ids[0], pk__lte=ids[-1]).update(**ACTIONS[job.action]())
+                jobs.update(processed=F('processed') + updated)
+            # The hub's KPIs are re-aggregated once for the whole job, below.
+            surveys_changed.send(sender=Survey, hub_id=job.hub_id, survey_ids=ids, kpis_recorded=True)
+            last_pk = ids[-1]
+    except Exception as exc:
+        logger.exception('Surveys bulk job %s failed', job_id)
+        jobs.update(status='failed', error=str(exc)[:1000], finished_at=timezone.now())
+        return
+    finally:
+        kpis.refresh_surveys(job.hub_id)
+    jobs.update(status='done', finished_at=timezone.now())
@@ -0,0 +1,116 @@
+"""
+Sharded response counters for the Surveys module.
+
+Concurrent submissions never touch the survey row: each increment lands on
+one of ``SURVEYS_COUNTER_SHARDS`` counter rows picked at random. The survey's
+true count is ``Survey.response_count`` plus the pending shard totals;
+``rollup`` folds the shards back into ``response_count`` so the list can keep
+sorting on a plain column.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import Survey, SurveyCounterShard, SurveyResponse
+
+DEFAULT_SHARDS = 8
+DEFAULT_ROLLUP_INTERVAL = 30
+
+_last_rollup = 0.0
+
+
+def shard_count():
+    return max(1, getattr(settings, 'SURVEYS_COUNTER_SHARDS', DEFAULT_SHARDS))
+
+
+def increment(survey_id, amount=1):
+    """Add ``amount`` to a random shard of ``survey_id``."""
+    shard = random.randrange(shard_count())
+    shards = SurveyCounterShard.objects.filter(survey_id=survey_id, shard=shard)
+    if shards.update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            SurveyCounterShard.objects.create(survey_id=survey_id, shard=shard, count=amount)
+    except IntegrityError:
+        # Another writer created the shard first.
+        shards.update(count=F('count') + amount)
+
+
+def pending(survey_id):
+    """Responses counted in the shards but not yet rolled up."""
+    result = SurveyCounterShard.objects.filter(survey_id=survey_id).aggregate(total=Sum('count'))
+    return result['total'] or 0
+
+
+def total(survey_id):
+    """The survey's current response count, including pending shards."""
+    rolled = Survey.all_objects.filter(pk=survey_id).values_list('response_count', flat=True).first() or 0
+    return rolled + pending(survey_id)
+
+
+def rollup(survey_ids=None):
+    """
+    Fold pending shard counts into ``Survey.response_count``.
+
+    Shards are locked and decremented by exactly the amount that was read, so
+    concurrent rollups never double count. Returns the number of surveys
+    updated.
+    """
+    shards = SurveyCounterShard.objects.exclude(count=0)
+    if survey_ids is not None:
+        shards = shards.filter(survey_id__in=list(survey_ids))
+    updated = 0
+    for survey_id in set(shards.values_list('survey_id', flat=True)):
+        with transaction.atomic():
+            rows = list(
+                SurveyCounterShard.objects.select_for_update()
+                .filter(survey_id=survey_id).exclude(count=0).values_list('id', 'count')
+            )
+            if not rows:
+                continue
+            amount = sum(count for _, count in rows)
+            Survey.all_objects.filter(pk=survey_id).update(response_count=F('response_count') + amount)
+            for shard_id, count in rows:
+                SurveyCounterShard.objects.filter(pk=shard_id).update(count=F('count') - count)
+            updated += 1
+    return updated
+
+
+def maybe_rollup(survey_ids):
+    """Roll up ``survey_ids`` if this process has not done so recently."""
+    global _last_rollup
+    interval = getattr(settings, 'SURVEYS_COUNTER_ROLLUP_INTERVAL', DEFAULT_ROLLUP_INTERVAL)
+    now = time.monotonic()
+    if now - _last_rollup < interval:
+        return 0
+    _last_rollup = now
+    return rollup(survey_ids)
+
+
+def reconcile(surveys):
+    """
+    Recompute ``response_count`` for ``surveys`` from the stored responses.
+
+    The shards are locked while counting, so in-flight batches (which insert
+    their responses and bump a shard in one transaction) are either fully
+    counted or fully pending. Returns ``{survey_id: (old, new)}`` for every
+    survey whose count changed.
+    """
+    changed = {}
+    for survey_id, old in surveys.values_list('id', 'response_count'):
+        with transaction.atomic():
+            locked = list(
+                SurveyCounterShard.objects.select_for_update()
+                .filter(survey_id=survey_id).values_list('count', flat=True)
+            )
+            true_count = SurveyResponse.objects.filter(survey_id=survey_id, is_deleted=False).count()
+            new = max(true_count - sum(locked), 0)
+            if new != old:
+                Survey.all_objects.filter(pk=survey_id).update(response_count=new)
+                changed[survey_id] = (old, new)
+    return changed
+
@@ -0,0 +1,204 @@
+"""
+Cross-hub survey reports for the Surveys module.
+
+Operators running several hubs compare them side by side. ``build`` computes
+one partial ``Aggregate`` per hub (the KPI snapshot plus a few grouped reads
+of the question rollups, all on per-hub indexes) on a thread pool of
+``SURVEYS_REPORT_WORKERS`` threads, then merges the partials into hub totals
+and per-title figures. Partials only hold sums and counts, so merging is
+exact and independent of how the hubs were split across workers.
+
+``get`` caches the merged ``Report`` for ``SURVEYS_REPORT_CACHE_TTL`` seconds
+per set of hubs. Which hubs a hub may see is explicit:
+``SURVEYS_REPORT_HUB_GROUPS`` maps an operator's hub id to the hub ids it
+reports on; a hub without an entry only sees itself.
+"""
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from . import kpis, scheduling
+from .models import QuestionRollup, QuestionRollupBucket, Survey, SurveyCounterShard
+from .rollups import NPS_TYPES
+
+DEFAULT_CACHE_TTL = 600
+RATING_TYPES = {'rating'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _workers():
+    return getattr(settings, 'SURVEYS_REPORT_WORKERS', os.cpu_count() or 1)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix='surveys-report')
+        return _executor
+
+
+@dataclass
+class Aggregate:
+    """Mergeable survey figures: only sums and counts."""
+    surveys: int = 0
+    open_surveys: int = 0
+    responses: int = 0
+    responses_week: int = 0
+    rating_sum: float = 0.0
+    rating_count: int = 0
+    promoters: int = 0
+    passives: int = 0
+    detractors: int = 0
+
+    def merge(self, other):
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+        return self
+
+    @property
+    def rating(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+
+    @property
+    def nps(self):
+        total = self.promoters + self.passives + self.detractors
+        return round(100.0 * (self.promoters - self.detractors) / total, 1) if total else None
+
+
+@dataclass
+class HubReport:
+    hub_id: str
+    total: Aggregate = field(default_factory=Aggregate)
+    by_title: dict = field(default_factory=dict)  # survey title -> Aggregate
+
+
+@dataclass
+class Report:
+    hubs: list = field(default_factory=list)  # HubReport, most responses first
+    total: Aggregate = field(default_factory=Aggregate)
+    by_title: dict = field(default_factory=dict)  # survey title -> Aggregate over every hub
+    generated_at: object = None
+
+    def titles(self):
+        """``(title, Aggregate, {hub_id: Aggregate})`` by responses, most first."""
+        return [
+            (title, total, {hub.hub_id: hub.by_title[title] for hub in self.hubs if title in hub.by_title})
+            for title, total in sorted(self.by_title.items(), key=lambda item: (-item[1].responses, item[0]))
+        ]
+
+
+def report_hubs(hub_id):
+    """The hub ids ``hub_id`` may report on: its ``SURVEYS_REPORT_HUB_GROUPS`` entry plus itself."""
+    groups = getattr(settings, 'SURVEYS_REPORT_HUB_GROUPS', None) or {}
+    hub_id = str(hub_id)
+    granted = next((hubs for operator, hubs in groups.items() if str(operator) == hub_id), ())
+    return sorted({hub_id, *(str(hub) for hub in granted)})
+
+
+def aggregate_hub(hub_id):
+    """The partial ``HubReport`` of one hub; a handful of queries on per-hub indexes."""
+    report = HubReport(hub_id=str(hub_id))
+    titles = defaultdict(Aggregate)
+    live = Survey.objects.filter(hub_id=hub_id, is_deleted=False)
+    for title, surveys, responses in live.values('title').annotate(
+        surveys=Count('id'), responses=Sum('response_count'),
+    ).values_list('title', 'surveys', 'responses'):
+        titles[title].surveys += surveys
+        titles[title].responses += responses or 0
+    # Responses not yet rolled up into ``response_count``.
+    for title, pending in SurveyCounterShard.objects.filter(survey__hub_id=hub_id, survey__is_deleted=False).values(
+        'survey__title',
+    ).annotate(n=Sum('count')).values_list('survey__title', 'n'):
+        titles[title].responses += pending or 0
+    for title, count in live.filter(scheduling.open_filter(timezone.localdate())).values('title').annotate(
+        n=Count('id'),
+    ).values_list('title', 'n'):
+        titles[title].open_surveys += count
+
+    rated = QuestionRollup.objects.filter(
+        survey__hub_id=hub_id, survey__is_deleted=False, question__is_deleted=False,
+        question__question_type__in=RATING_TYPES,
+    )
+    for title, value_sum, count in rated.values('survey__title').annotate(
+        value_sum=Sum('value_sum'), n=Sum('numeric_count'),
+    ).values_list('survey__title', 'value_sum', 'n'):
+        titles[title].rating_sum += value_sum or 0.0
+        titles[title].rating_count += count or 0
+
+    scored = QuestionRollupBucket.objects.filter(
+        survey__hub_id=hub_id, survey__is_deleted=False, question__is_deleted=False,
+        question__question_type__in=NPS_TYPES,
+    )
+    for title, value, count in scored.values('survey__title', 'value').annotate(
+        n=Sum('count'),
+    ).values_list('survey__title', 'value', 'n'):
+        try:
+            score = float(value)
+        except ValueError:
+            continue
+        aggregate = titles[title]
+        if score >= 9:
+            aggregate.promoters += count
+        elif score <= 6:
+            aggregate.detractors += count
+        else:
+            aggregate.passives += count
+
+    for aggregate in titles.values():
+        report.total.merge(aggregate)
+    report.total.responses_week = kpis.read(hub_id)['responses_week']
+    report.by_title = dict(titles)
+    return report
+
+
+def _aggregate_in_thread(hub_id):
+    try:
+        return aggregate_hub(hub_id)
+    finally:
+        connections.close_all()
+
+
+def build(hub_ids):
+    """Aggregate ``hub_ids`` in parallel and merge them into a ``Report``."""
+    if _workers() <= 0 or len(hub_ids) <= 1:
+        partials = [aggregate_hub(hub_id) for hub_id in hub_ids]
+    else:
+        partials = list(_get_executor().map(_aggregate_in_thread, hub_ids))
+
+    report = Report(hubs=sorted(partials, key=lambda hub: (-hub.total.responses, hub.hub_id)))
+    by_title = defaultdict(Aggregate)
+    for hub in partials:
+        report.total.merge(hub.total)
+        for title, aggregate in hub.by_title.items():
+            by_title[title].merge(aggregate)
+    report.by_title = dict(by_title)
+    report.generated_at = timezone.now()
+    return report
+
+
+def _cache_key(hub_ids):
+    digest = hashlib.sha1(','.join(hub_ids).encode()).hexdigest()
+    return f'surveys:crosshub:{digest}'
+
+
+def get(hub_ids, refresh=False):
+    """The cached ``Report`` for ``hub_ids``, built on a miss or ``refresh``."""
+    hub_ids = sorted({str(hub_id) for hub_id in hub_ids})
+    key = _cache_key(hub_ids)
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = build(hub_ids)
+        cache.set(key, report, getattr(settings, 'SURVEYS_REPORT_CACHE_TTL', DEFAULT_CACHE_TTL))
+    return report
@@ -0,0 +1,204 @@
+"""
+Compiled survey definitions for the Surveys module.
+
+A ``SurveyDefinition`` is an immutable snapshot of a survey and its live
+questions (sorted, with types and required flags resolved) that the submit
+path validates against. Definitions are keyed on ``Survey.definition_version``,
+which every survey or question edit bumps:
+
+* the shared cache holds ``surveys:def:<id>`` → current version and
+  ``surveys:def:<id>:<version>`` → the pickled definition;
+* a per-process LRU keyed on ``(id, version)`` sits in front of it.
+
+A warm lookup is one small cache read and no ORM queries. ``aget_definition``
+is the same lookup for coroutine views.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Survey, SurveyQuestion
+
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_LRU_SIZE = 256
+
+# Survey fields baked into a definition; saves touching only other fields
+# (e.g. ``response_count``) keep the current version.
+DEFINITION_FIELDS = {'hub_id', 'title', 'is_active', 'start_date', 'end_date', 'is_deleted'}
+
+
+@dataclass(frozen=True)
+class QuestionDefinition:
+    id: object
+    text: str
+    question_type: str
+    is_required: bool
+    order: int
+
+
+@dataclass(frozen=True)
+class SurveyDefinition:
+    id: object
+    hub_id: object
+    version: int
+    title: str
+    is_active: bool
+    start_date: object
+    end_date: object
+    questions: tuple = ()
+
+
+class _LRU:
+    """Small thread-safe per-process LRU, sized by the ``setting`` named."""
+
+    def __init__(self, setting, default):
+        self._setting = setting
+        self._default = default
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = getattr(settings, self._setting, self._default)
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_lru = _LRU('SURVEYS_DEFINITION_LRU_SIZE', DEFAULT_LRU_SIZE)
+
+
+def _version_key(survey_id):
+    return f'surveys:def:{survey_id}'
+
+
+def _definition_key(survey_id, version):
+    return f'surveys:def:{survey_id}:{version}'
+
+
+def compile_definition(survey_id):
+    """Build the definition of a live survey from the database, or ``None``."""
+    row = (
+        Survey.objects.filter(pk=survey_id, is_deleted=False)
+        .values('id', 'hub_id', 'definition_version', 'title', 'is_active', 'start_date', 'end_date')
+        .first()
+    )
+    if row is None:
+        return None
+    questions = (
+        SurveyQuestion.objects.filter(survey_id=survey_id, is_deleted=False)
+        .order_by('order', 'id')
+        .values_list('id', 'text', 'question_type', 'is_required', 'order')
+    )
+    return _definition(row, questions)
+
+
+def _definition(row, questions):
+    return SurveyDefinition(
+        id=row['id'],
+        hub_id=row['hub_id'],
+        version=row['definition_version'],
+        title=row['title'],
+        is_active=row['is_active'],
+        start_date=row['start_date'],
+        end_date=row['end_date'],
+        questions=tuple(QuestionDefinition(*question) for question in questions),
+    )
+
+
+async def acompile_definition(survey_id):
+    """``compile_definition`` with async ORM reads."""
+    row = await (
+        Survey.objects.filter(pk=survey_id, is_deleted=False)
+        .values('id', 'hub_id', 'definition_version', 'title', 'is_active', 'start_date', 'end_date')
+        .afirst()
+    )
+    if row is None:
+        return None
+    questions = [
+        question async for question in SurveyQuestion.objects.filter(survey_id=survey_id, is_deleted=False)
+        .order_by('order', 'id')
+        .values_list('id', 'text', 'question_type', 'is_required', 'order')
+    ]
+    return _definition(row, questions)
+
+
+def get_definition(survey_id):
+    """The compiled definition of ``survey_id``; ``None`` if it is missing or deleted."""
+    survey_id = str(survey_id)
+    version = cache.get(_version_key(survey_id))
+    if version is not None:
+        definition = _lru.get((survey_id, version))
+        if definition is not None:
+            return definition
+        definition = cache.get(_definition_key(survey_id, version))
+        if definition is not None:
+            _lru.put((survey_id, version), definition)
+            return definition
+
+    definition = compile_definition(survey_id)
+    if definition is None:
+        return None
+    ttl = getattr(settings, 'SURVEYS_DEFINITION_CACHE_TTL', DEFAULT_CACHE_TTL)
+    cache.set_many({
+        _definition_key(survey_id, definition.version): definition,
+        _version_key(survey_id): definition.version,
+    }, ttl)
+    _lru.put((survey_id, definition.version), definition)
+    return definition
+
+
+async def aget_definition(survey_id):
+    """``get_definition`` for coroutine views."""
+    survey_id = str(survey_id)
+    version = await cache.aget(_version_key(survey_id))
+    if version is not None:
+        definition = _lru.get((survey_id, version))
+        if definition is not None:
+            return definition
+        definition = await cache.aget(_definition_key(survey_id, version))
+        if definition is not None:
+            _lru.put((survey_id, version), definition)
+            return definition
+
+    definition = await acompile_definition(survey_id)
+    if definition is None:
+        return None
+    ttl = getattr(settings, 'SURVEYS_DEFINITION_CACHE_TTL', DEFAULT_CACHE_TTL)
+    await cache.aset_many({
+        _definition_key(survey_id, definition.version): definition,
+        _version_key(survey_id): definition.version,
+    }, ttl)
+    _lru.put((survey_id, definition.version), definition)
+    return definition
+
+
+def invalidate(survey_ids):
+    cache.delete_many([_version_key(survey_id) for survey_id in survey_ids])
+
+
+def bump(survey_ids):
+    """Move ``survey_ids`` to a new definition version."""
+    survey_ids = [str(survey_id) for survey_id in survey_ids]
+    if not survey_ids:
+        return
+    Survey.all_objects.filter(pk__in=survey_ids).update(definition_version=F('definition_version') + 1)
+    # Readers recompile from the committed rows once the pointer is gone.
+    transaction.on_commit(lambda: invalidate(survey_ids))
@@ -0,0 +1,202 @@
+"""
+Streaming exports for the Surveys module.
+
+Rows are pulled from the database with ``values_list(...).iterator()`` and
+encoded as they go, so a CSV or XLSX export holds one chunk of rows in memory
+no matter how many the hub has. The XLSX writer emits a minimal single-sheet
+workbook through ``zipfile`` streaming writes (inline strings, no shared
+string table), which keeps it constant-memory as well.
+
+Under ASGI a synchronous streaming body is read to the end before the
+first byte is sent, so coroutine views use ``astream_csv``/``astream_xlsx``:
+their body is an async iterator that makes ``CHUNKS_PER_HOP`` chunks per
+hop to a thread and sends them before asking for more.
+"""
+import csv
+import datetime
+import re
+import zipfile
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+DEFAULT_CHUNK_SIZE = 2000
+CHUNKS_PER_HOP = 200
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def iter_rows(qs, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield tuples of ``fields`` from ``qs`` without caching the queryset."""
+    return qs.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class _Echo:
+    """File-like object whose ``write`` just returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, headers):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_text(value) for value in row])
+
+
+def _cell(value):
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = _ILLEGAL_XML_CHARS.sub('', _text(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _row(values):
+    return '<row>' + ''.join(_cell(value) for value in values) + '</row>'
+
+
+class _Sink:
+    """Unseekable write target that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_xlsx(rows, headers, sheet_name='Sheet1', rows_per_chunk=500):
+    """Yield the bytes of a single-sheet XLSX workbook as ``rows`` are consumed."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _ROOT_RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name, {'"': '&quot;'})))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_SHEET_HEAD + _row(headers)).encode('utf-8'))
+            pending = []
+            for row in rows:
+                pending.append(_row(row))
+                if len(pending) >= rows_per_chunk:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending.clear()
+                    data = sink.drain()
+                    if data:
+                        yield data
+            sheet.write((''.join(pending) + _SHEET_TAIL).encode('utf-8'))
+    yield sink.drain()
+
+
+def _attachment(response, filename):
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_csv(rows, headers, filename):
+    response = StreamingHttpResponse(iter_csv(rows, headers), content_type='text/csv; charset=utf-8')
+    return _attachment(response, filename)
+
+
+def stream_xlsx(rows, headers, filename):
+    response = StreamingHttpResponse(iter_xlsx(rows, headers), content_type=XLSX_CONTENT_TYPE)
+    return _attachment(response, filename)
+
+
+def _take(chunks, count):
+    """Up to ``count`` chunks of ``chunks`` joined into one, or ``None`` when it is exhausted."""
+    batch = list(islice(chunks, count))
+    if not batch:
+        return None
+    return batch[0][:0].join(batch)
+
+
+async def aiter_chunks(chunks, per_hop=CHUNKS_PER_HOP):
+    """
+    Iterate the synchronous ``chunks`` asynchronously, ``per_hop`` at a time on
+    a thread. The hops are thread sensitive, so a server-side cursor stays on
+    the connection it was opened on.
+    """
+    chunks = iter(chunks)
+    while True:
+        batch = await sync_to_async(_take)(chunks, per_hop)
+        if batch is None:
+            return
+        yield batch
+
+
+def astream_csv(rows, headers, filename):
+    """``stream_csv`` with an async body, for coroutine views."""
+    response = StreamingHttpResponse(aiter_chunks(iter_csv(rows, headers)), content_type='text/csv; charset=utf-8')
+    return _attachment(response, filename)
+
+
+def astream_xlsx(rows, headers, filename):
+    """``stream_xlsx`` with an async body, for coroutine views."""
+    response = StreamingHttpResponse(aiter_chunks(iter_xlsx(rows, headers)), content_type=XLSX_CONTENT_TYPE)
+    return _attachment(response, filename)
@@ -0,0 +1,121 @@
+"""
+Per-process memory of recent idempotency keys for the Surveys module.
+
+Kiosks and QR forms retry a submission under the same ``Idempotency-Key``.
+The unique constraint on ``(survey, idempotency_key)`` is what guarantees a
+response is stored once; ``RecentKeys`` only decides which submissions are
+worth checking before the insert:
+
+* keys in the exact LRU of the last ``SURVEYS_IDEMPOTENCY_LRU_SIZE`` keys are
+  duplicates and are dropped on the request thread;
+* keys the Bloom filter may have seen are looked up in one ``SELECT`` per
+  batch before inserting;
+* every other key, the common case, goes straight to the insert.
+
+A key first seen by another process is caught by the constraint and the
+batch is retried with every key looked up.
+"""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+DEFAULT_LRU_SIZE = 10000
+DEFAULT_BLOOM_CAPACITY = 1000000
+BLOOM_ERROR_RATE = 0.01
+
+SEEN = 'seen'
+MAYBE = 'maybe'
+NEW = 'new'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for ``capacity`` keys at ``error_rate``."""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RecentKeys:
+    """
+    Exact LRU of the newest keys in front of two Bloom filter generations.
+
+    When the current filter reaches its capacity it becomes the previous one
+    and a fresh filter starts, so memory stays bounded and the error rate
+    never climbs past the target.
+    """
+
+    def __init__(self, lru_size=None, bloom_capacity=None):
+        self._lru_size = lru_size
+        self._bloom_capacity = bloom_capacity
+        self._lock = threading.Lock()
+        self.clear()
+
+    @property
+    def lru_size(self):
+        if self._lru_size is not None:
+            return self._lru_size
+        return getattr(settings, 'SURVEYS_IDEMPOTENCY_LRU_SIZE', DEFAULT_LRU_SIZE)
+
+    @property
+    def bloom_capacity(self):
+        if self._bloom_capacity is not None:
+            return self._bloom_capacity
+        return getattr(settings, 'SURVEYS_IDEMPOTENCY_BLOOM_CAPACITY', DEFAULT_BLOOM_CAPACITY)
+
+    def clear(self):
+        with self._lock:
+            self._lru = OrderedDict()
+            self._current = None
+            self._previous = None
+
+    def check_and_add(self, key):
+        """``SEEN``, ``MAYBE`` or ``NEW`` for ``key``, which is remembered either way."""
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return SEEN
+            if self._current is None:
+                self._current = BloomFilter(self.bloom_capacity)
+            result = MAYBE if key in self._current or (self._previous is not None and key in self._previous) else NEW
+            self._lru[key] = None
+            if len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+            if self._current.count >= self._current.capacity:
+                self._previous, self._current = self._current, BloomFilter(self.bloom_capacity)
+            self._current.add(key)
+            return result
+
+    def forget(self, keys):
+        """Drop ``keys`` from the LRU, e.g. after their batch failed to write."""
+        with self._lock:
+            for key in keys:
+                self._lru.pop(key, None)
+
+
+def scoped(survey_id, key):
+    return f'{survey_id}:{key}'
+
+
+recent_keys = RecentKeys()
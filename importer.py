@@ -0,0 +1,198 @@
+"""
+Bulk survey import for the Surveys module.
+
+Survey definitions are read from JSON or CSV and written with chunked
+``bulk_create`` calls, one transaction per chunk: a chunk of surveys costs
+two ``INSERT`` statements (surveys, then questions) however many questions
+it holds.
+
+JSON: a list of surveys (or ``{"surveys": [...]}``)::
+
+    [{"title": "...", "description": "...", "is_active": true,
+      "start_date": "2026-01-01", "end_date": null,
+      "questions": [{"text": "...", "question_type": "rating", "is_required": true}]}]
+
+CSV: one row per question with the columns ``title``, ``description``,
+``is_active``, ``start_date``, ``end_date``, ``question_text``,
+``question_type``, ``is_required``. Consecutive rows with the same title
+form one survey; a row with an empty ``question_text`` adds no question.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from . import ordering, search
+from .models import Survey, SurveyQuestion
+from .signals import surveys_changed
+
+DEFAULT_CHUNK_SIZE = 500
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on', 'si', 'sí'}
+
+
+class SurveyImportError(ValueError):
+    """A survey definition could not be imported; carries the offending item."""
+
+    def __init__(self, message, item=None):
+        super().__init__(f'Survey {item}: {message}' if item is not None else message)
+        self.item = item
+
+
+@dataclass
+class ImportResult:
+    surveys: int = 0
+    questions: int = 0
+
+
+def _flag(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _date(value, item):
+    if value in (None, ''):
+        return None
+    try:
+        parsed = parse_date(str(value).strip())
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise SurveyImportError(f'invalid date {value!r}', item)
+    return parsed
+
+
+def _text(value, limit, name, item):
+    text = str(value or '').strip()
+    if len(text) > limit:
+        raise SurveyImportError(f'{name} is longer than {limit} characters', item)
+    return text
+
+
+def clean(definitions):
+    """Validate raw definitions; returns normalised dicts or raises ``SurveyImportError``."""
+    cleaned = []
+    for item, raw in enumerate(definitions, start=1):
+        if not isinstance(raw, dict):
+            raise SurveyImportError('expected an object', item)
+        title = _text(raw.get('title'), 255, 'title', item)
+        if not title:
+            raise SurveyImportError('title is required', item)
+        questions = []
+        for question in raw.get('questions') or []:
+            if isinstance(question, str):
+                question = {'text': question}
+            if not isinstance(question, dict):
+                raise SurveyImportError('expected a question object', item)
+            text = _text(question.get('text'), 500, 'question text', item)
+            if not text:
+                raise SurveyImportError('question text is required', item)
+            questions.append({
+                'text': text,
+                'question_type': _text(question.get('question_type'), 20, 'question type', item) or 'text',
+                'is_required': _flag(question.get('is_required'), True),
+            })
+        cleaned.append({
+            'title': title,
+            'description': str(raw.get('description') or '').strip(),
+            'is_active': _flag(raw.get('is_active'), True),
+            'start_date': _date(raw.get('start_date'), item),
+            'end_date': _date(raw.get('end_date'), item),
+            'questions': questions,
+        })
+    return cleaned
+
+
+def parse_json(data):
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    try:
+        payload = json.loads(data)
+    except ValueError as exc:
+        raise SurveyImportError(f'Invalid JSON: {exc}')
+    if isinstance(payload, dict):
+        payload = payload.get('surveys', [payload])
+    if not isinstance(payload, list):
+        raise SurveyImportError('Expected a list of surveys')
+    return payload
+
+
+def parse_csv(data):
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    definitions = []
+    for row in csv.DictReader(io.StringIO(data)):
+        title = (row.get('title') or '').strip()
+        if not definitions or definitions[-1]['title'] != title:
+            definitions.append({
+                'title': title,
+                'description': row.get('description'),
+                'is_active': row.get('is_active'),
+                'start_date': row.get('start_date'),
+                'end_date': row.get('end_date'),
+                'questions': [],
+            })
+        if (row.get('question_text') or '').strip():
+            definitions[-1]['questions'].append({
+                'text': row['question_text'],
+                'question_type': row.get('question_type'),
+                'is_required': row.get('is_required'),
+            })
+    return definitions
+
+
+def parse(data, fmt):
+    """Raw definitions from ``data`` in ``fmt`` (``'json'`` or ``'csv'``)."""
+    if fmt == 'json':
+        return parse_json(data)
+    if fmt == 'csv':
+        return parse_csv(data)
+    raise SurveyImportError(f'Unsupported format {fmt!r}')
+
+
+def _write_chunk(hub_id, chunk):
+    surveys, questions = [], []
+    for definition in chunk:
+        survey = Survey(
+            hub_id=hub_id,
+            title=definition['title'],
+            description=definition['description'],
+            is_active=definition['is_active'],
+            start_date=definition['start_date'],
+            end_date=definition['end_date'],
+        )
+        surveys.append(survey)
+        questions.extend(
+            SurveyQuestion(hub_id=hub_id, survey=survey, order=ordering.position(index), **question)
+            for index, question in enumerate(definition['questions'])
+        )
+    with transaction.atomic():
+        Survey.objects.bulk_create(surveys)
+        SurveyQuestion.objects.bulk_create(questions)
+        # bulk_create skips post_save, so index the new surveys here.
+        search.reindex_surveys([survey.pk for survey in surveys])
+    return surveys, questions
+
+
+def import_surveys(hub_id, definitions, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Create surveys and their questions for ``hub_id`` from raw ``definitions``.
+
+    Everything is validated before the first write; each chunk of
+    ``chunk_size`` surveys is committed in its own transaction. Returns an
+    ``ImportResult`` and the ids of the created surveys.
+    """
+    cleaned = clean(definitions)
+    result, survey_ids = ImportResult(), []
+    for start in range(0, len(cleaned), chunk_size):
+        surveys, questions = _write_chunk(hub_id, cleaned[start:start + chunk_size])
+        result.surveys += len(surveys)
+        result.questions += len(questions)
+        survey_ids.extend(survey.pk for survey in surveys)
+        surveys_changed.send(sender=Survey, hub_id=hub_id, survey_ids=[survey.pk for survey in surveys])
+    return result, survey_ids
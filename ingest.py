@@ -0,0 +1,344 @@
+"""
+Response ingestion for the Surveys module.
+
+Submissions are validated on the request thread and then buffered per
+process. A buffer is written as one batch: a single transaction holding one
+``bulk_create`` for the responses and one for all of their answers, so a
+kiosk burst costs a handful of statements instead of one INSERT per answer.
+
+A submission may carry an idempotency key; ``admit`` drops retries this
+process has just seen, and ``write_batch`` skips keys that are already stored
+so a retried submission is counted once.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+
+from . import counters, idempotency, kpis, rollups, snapshots, trends
+from .models import SurveyAnswer, SurveyResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_MAX_DELAY = 1.0
+
+YES_VALUES = {'yes', 'y', 'true', '1', 'on', 'si', 'sí'}
+NO_VALUES = {'no', 'n', 'false', '0', 'off'}
+NUMERIC_TYPES = {'rating', 'scale'}
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+
+@dataclass
+class Submission:
+    """A validated response waiting to be written."""
+    survey_id: object
+    hub_id: object
+    answers: list = field(default_factory=list)  # [(question_id, value, numeric_value, bucket)]
+    source: str = ''
+    idempotency_key: str = None
+    # Set by ``admit`` when the key may have been stored before: look it up before inserting.
+    verify: bool = False
+
+
+def code_answer(question_type, raw):
+    """
+    Normalise a raw submitted answer for ``question_type``.
+
+    Returns ``(value, numeric_value)``; raises ``ValueError`` when the answer
+    does not fit the question type.
+    """
+    if isinstance(raw, bool):
+        raw = 'yes' if raw else 'no'
+    text = str(raw).strip()
+    if question_type in NUMERIC_TYPES:
+        try:
+            number = float(text)
+        except ValueError:
+            raise ValueError(f'Expected a number, got {text!r}')
+        # NaN or infinity would poison every sum it is added to.
+        if not math.isfinite(number):
+            raise ValueError(f'Expected a finite number, got {text!r}')
+        return text, number
+    if question_type == 'yes_no':
+        lowered = text.lower()
+        if lowered in YES_VALUES:
+            return 'yes', 1.0
+        if lowered in NO_VALUES:
+            return 'no', 0.0
+        raise ValueError(f'Expected yes or no, got {text!r}')
+    return text, None
+
+
+def build_submission(survey_id, hub_id, questions, raw_answers, source='', idempotency_key=None):
+    """
+    Validate ``raw_answers`` (``{question_id: raw}``) against ``questions``.
+
+    ``questions`` is any iterable of objects exposing ``id``,
+    ``question_type`` and ``is_required``.
+    """
+    idempotency_key = str(idempotency_key).strip() if idempotency_key is not None else ''
+    if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ValueError(f'Idempotency key longer than {IDEMPOTENCY_KEY_MAX_LENGTH} characters')
+    answers = []
+    for question in questions:
+        raw = raw_answers.get(str(question.id))
+        if raw is None or str(raw).strip() == '':
+            if question.is_required:
+                raise ValueError(f'Question {question.id} is required')
+            continue
+        value, numeric_value = code_answer(question.question_type, raw)
+        bucket = rollups.bucket_for(question.question_type, value, numeric_value)
+        answers.append((question.id, value, numeric_value, bucket))
+    return Submission(
+        survey_id=survey_id, hub_id=hub_id, answers=answers, source=source[:20],
+        idempotency_key=idempotency_key or None,
+    )
+
+
+def _snapshot_rows(responses, batch):
+    rows = defaultdict(list)
+    for response, submission in zip(responses, batch):
+        rows[submission.survey_id].append((
+            response.pk,
+            response.created_at,
+            {str(question_id): (value, numeric_value) for question_id, value, numeric_value, _bucket in submission.answers},
+        ))
+    return rows
+
+
+def _scoped_key(submission):
+    return idempotency.scoped(submission.survey_id, submission.idempotency_key)
+
+
+def _unstored(batch, verify_all=False):
+    """
+    ``batch`` without repeated idempotency keys and without keys already stored.
+
+    Only submissions flagged ``verify`` are looked up, unless ``verify_all``;
+    one query covers the whole batch.
+    """
+    lookup = [s for s in batch if s.idempotency_key and (verify_all or s.verify)]
+    stored = set()
+    if lookup:
+        rows = SurveyResponse.all_objects.filter(
+            survey_id__in={s.survey_id for s in lookup},
+            idempotency_key__in={s.idempotency_key for s in lookup},
+        ).values_list('survey_id', 'idempotency_key')
+        stored = {idempotency.scoped(survey_id, key) for survey_id, key in rows}
+    unstored = []
+    for submission in batch:
+        if submission.idempotency_key:
+            key = _scoped_key(submission)
+            if key in stored:
+                continue
+            stored.add(key)
+        unstored.append(submission)
+    return unstored
+
+
+def _write(batch):
+    if not batch:
+        return 0
+    responses = []
+    answers = []
+    for submission in batch:
+        response = SurveyResponse(
+            hub_id=submission.hub_id, survey_id=submission.survey_id, source=submission.source,
+            idempotency_key=submission.idempotency_key,
+        )
+        responses.append(response)
+        for question_id, value, numeric_value, _bucket in submission.answers:
+            answers.append(SurveyAnswer(
+                hub_id=submission.hub_id, survey_id=submission.survey_id, response=response,
+                question_id=question_id, value=value, numeric_value=numeric_value,
+            ))
+    per_survey = Counter(submission.survey_id for submission in batch)
+    with transaction.atomic():
+        SurveyResponse.objects.bulk_create(responses)
+        SurveyAnswer.objects.bulk_create(answers)
+        for survey_id, count in per_survey.items():
+            counters.increment(survey_id, count)
+        transaction.on_commit(lambda: snapshots.append(_snapshot_rows(responses, batch)))
+    # The batch is stored: nothing below may raise into ``write_batch``'s retry.
+    try:
+        counters.maybe_rollup(per_survey)
+    except Exception:
+        logger.exception('Failed to roll up the response counters of %d surveys', len(per_survey))
+    _fold(batch)
+    return len(responses)
+
+
+def _fold(batch):
+    """
+    Add the committed ``batch`` to the per-question aggregates, the trend
+    buckets and the hubs' KPI snapshots.
+
+    Each is one hot row per question, per survey and period, or per hub, so
+    it is bumped after the ingest transaction, statement by statement, rather
+    than held locked while the batch inserts; concurrent batches then only
+    queue for one UPDATE. A failure must not fail the stored batch: it is
+    logged, and the ``surveys_rebuild_*`` commands (or the next day's KPI
+    refresh) repair the figures.
+    """
+    steps = (
+        ('rollups', rollups.apply),
+        ('trends', trends.apply),
+        ('KPI snapshots', lambda submissions: kpis.record_responses(Counter(s.hub_id for s in submissions))),
+    )
+    for name, apply in steps:
+        try:
+            apply(batch)
+        except Exception:
+            logger.exception('Failed to add %d survey responses to the %s', len(batch), name)
+
+
+def _write_once(batch):
+    try:
+        try:
+            return _write(_unstored(batch))
+        except IntegrityError:
+            # Another process stored one of the keys after it was admitted here.
+            return _write(_unstored(batch, verify_all=True))
+    except Exception:
+        # Let a retry of a lost submission through again.
+        idempotency.recent_keys.forget([_scoped_key(s) for s in batch if s.idempotency_key])
+        raise
+
+
+def write_batch(batch):
+    """
+    Write ``batch`` of submissions in one transaction. Returns rows written.
+
+    Every submitter has already been answered 202, so when the batch fails
+    (say, an answer to a question purged since it was validated) each
+    submission is written in its own transaction instead: one bad submission
+    is logged and dropped without losing the others. A batch of one raises.
+    """
+    if not batch:
+        return 0
+    try:
+        return _write_once(batch)
+    except Exception:
+        if len(batch) == 1:
+            raise
+        logger.warning('Failed to write %d survey responses at once; writing them one by one', len(batch), exc_info=True)
+    written = 0
+    for submission in batch:
+        try:
+            written += _write_once([submission])
+        except Exception:
+            logger.exception('Dropped a survey response to survey %s', submission.survey_id)
+    return written
+
+
+class ResponseBuffer:
+    """
+    Per-process submission buffer.
+
+    A batch is written when it reaches ``batch_size`` or when its oldest entry
+    is ``max_delay`` seconds old; a daemon thread takes care of the latter
+    while the kiosks are quiet. ``max_delay=0`` writes every submission
+    immediately on the calling thread.
+    """
+
+    def __init__(self, batch_size=None, max_delay=None):
+        self._batch_size = batch_size
+        self._max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+        self._flusher = None
+
+    @property
+    def batch_size(self):
+        if self._batch_size is not None:
+            return self._batch_size
+        return getattr(settings, 'SURVEYS_INGEST_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+    @property
+    def max_delay(self):
+        if self._max_delay is not None:
+            return self._max_delay
+        return getattr(settings, 'SURVEYS_INGEST_MAX_DELAY', DEFAULT_MAX_DELAY)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, submission):
+        """Queue ``submission``; returns the number of rows written by this call."""
+        with self._lock:
+            self._pending.append(submission)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            batch = self._take_if_due()
+        if batch is None:
+            self._ensure_flusher()
+            return 0
+        return write_batch(batch)
+
+    def flush(self):
+        """Write whatever is pending. Returns rows written."""
+        with self._lock:
+            batch = self._take()
+        return write_batch(batch)
+
+    def _take_if_due(self):
+        if len(self._pending) >= self.batch_size:
+            return self._take()
+        if time.monotonic() - self._oldest >= self.max_delay:
+            return self._take()
+        return None
+
+    def _take(self):
+        batch, self._pending, self._oldest = self._pending, [], None
+        return batch
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name='surveys-ingest', daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(max(self.max_delay, 0.05))
+            with self._lock:
+                batch = self._take_if_due() if self._pending else None
+            if batch:
+                try:
+                    write_batch(batch)
+                except Exception:
+                    logger.exception('Failed to write %d survey responses', len(batch))
+                finally:
+                    connections.close_all()
+
+
+default_buffer = ResponseBuffer()
+atexit.register(default_buffer.flush)
+
+
+def admit(submission):
+    """
+    Whether ``submission`` should be queued: ``False`` for a retry whose
+    idempotency key this process has just seen. Flags submissions whose key
+    may have been stored earlier for a lookup at write time.
+    """
+    if not submission.idempotency_key:
+        return True
+    seen = idempotency.recent_keys.check_and_add(_scoped_key(submission))
+    if seen == idempotency.SEEN:
+        return False
+    submission.verify = seen == idempotency.MAYBE
+    return True
+
+
+def submit(submission):
+    """Queue ``submission`` on the process-wide buffer."""
+    return default_buffer.add(submission)
@@ -0,0 +1,171 @@
+"""
+Dashboard KPI snapshot for the Surveys module.
+
+Each hub has one ``SurveyKpiSnapshot`` row. Survey mutations recompute the
+survey figures (one aggregate over the hub's index range), ingest batches
+bump the response figures with F-expressions, and the dashboard reads the
+row through the cache. The date dependent figures are recomputed on the first
+read of a new day. ``aget`` is the same read for coroutine views.
+"""
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Survey, SurveyCounterShard, SurveyKpiSnapshot, SurveyResponse
+
+DEFAULT_CACHE_TTL = 300
+
+KPI_FIELDS = (
+    'total_surveys', 'active_surveys', 'scheduled_surveys', 'expired_surveys',
+    'total_responses', 'responses_today', 'responses_week',
+)
+
+
+def _cache_key(hub_id):
+    return f'surveys:kpis:{hub_id}'
+
+
+def _start_of(day):
+    start = datetime.datetime.combine(day, datetime.time.min)
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
+def invalidate(hub_id):
+    cache.delete(_cache_key(hub_id))
+
+
+def _survey_figures(hub_id, today):
+    live = Survey.objects.filter(hub_id=hub_id, is_deleted=False)
+    started = Q(start_date__isnull=True) | Q(start_date__lte=today)
+    not_ended = Q(end_date__isnull=True) | Q(end_date__gte=today)
+    figures = live.aggregate(
+        total_surveys=Count('id'),
+        active_surveys=Count('id', filter=Q(is_active=True) & started & not_ended),
+        scheduled_surveys=Count('id', filter=Q(is_active=True, start_date__gt=today)),
+        expired_surveys=Count('id', filter=Q(end_date__lt=today)),
+        rolled_up=Sum('response_count'),
+    )
+    pending = SurveyCounterShard.objects.filter(
+        survey__hub_id=hub_id, survey__is_deleted=False,
+    ).aggregate(total=Sum('count'))['total']
+    figures['total_responses'] = (figures.pop('rolled_up') or 0) + (pending or 0)
+    return figures
+
+
+def _response_figures(hub_id, today):
+    week_start = today - datetime.timedelta(days=today.weekday())
+    recent = SurveyResponse.objects.filter(hub_id=hub_id, created_at__gte=_start_of(week_start))
+    return recent.aggregate(
+        responses_week=Count('id'),
+        responses_today=Count('id', filter=Q(created_at__gte=_start_of(today))),
+    )
+
+
+def refresh(hub_id):
+    """Recompute every figure for ``hub_id``."""
+    today = timezone.localdate()
+    figures = {**_survey_figures(hub_id, today), **_response_figures(hub_id, today)}
+    snapshot, _ = SurveyKpiSnapshot.objects.update_or_create(
+        hub_id=hub_id, defaults={'day': today, **figures},
+    )
+    invalidate(hub_id)
+    return snapshot
+
+
+def refresh_surveys(hub_id):
+    """Recompute the survey figures after surveys of ``hub_id`` changed."""
+    today = timezone.localdate()
+    updated = SurveyKpiSnapshot.objects.filter(hub_id=hub_id, day=today).update(
+        **_survey_figures(hub_id, today),
+    )
+    if not updated:
+        return refresh(hub_id)
+    invalidate(hub_id)
+
+
+def record_toggle(survey):
+    """
+    Move today's snapshot after ``survey.is_active`` flipped: one ``UPDATE``
+    of the figure its window puts it in, instead of re-aggregating the hub.
+    """
+    today = timezone.localdate()
+    if survey.start_date and survey.start_date > today:
+        figure = 'scheduled_surveys'
+    elif survey.end_date is None or survey.end_date >= today:
+        figure = 'active_surveys'
+    else:
+        # Ended surveys count as expired whether active or not.
+        return
+    delta = 1 if survey.is_active else -1
+    # A stale snapshot is recomputed on the next read of the day anyway.
+    SurveyKpiSnapshot.objects.filter(hub_id=survey.hub_id, day=today).update(**{figure: F(figure) + delta})
+    hub_id = survey.hub_id
+    transaction.on_commit(lambda: invalidate(hub_id))
+
+
+def record_responses(counts_by_hub):
+    """Add freshly ingested responses (``{hub_id: n}``) to today's snapshots."""
+    today = timezone.localdate()
+    for hub_id, count in counts_by_hub.items():
+        SurveyKpiSnapshot.objects.filter(hub_id=hub_id, day=today).update(
+            total_responses=F('total_responses') + count,
+            responses_today=F('responses_today') + count,
+            responses_week=F('responses_week') + count,
+        )
+        transaction.on_commit(lambda hub_id=hub_id: invalidate(hub_id))
+
+
+def get(hub_id):
+    """The dashboard figures for ``hub_id`` as a dict; one cache read when warm."""
+    today = timezone.localdate()
+    key = _cache_key(hub_id)
+    figures = cache.get(key)
+    if figures is not None and figures.get('day') == today.isoformat():
+        return figures
+    snapshot = SurveyKpiSnapshot.objects.filter(hub_id=hub_id).first()
+    if snapshot is None or snapshot.day != today:
+        snapshot = refresh(hub_id)
+    figures = {name: getattr(snapshot, name) for name in KPI_FIELDS}
+    figures['day'] = today.isoformat()
+    cache.set(key, figures, getattr(settings, 'SURVEYS_KPI_CACHE_TTL', DEFAULT_CACHE_TTL))
+    return figures
+
+
+def read(hub_id):
+    """
+    The dashboard figures for ``hub_id`` without side effects: the cached
+    figures or today's snapshot row, else computed on the fly. Never writes
+    the snapshot or the cache, so it is safe on report worker threads.
+    """
+    today = timezone.localdate()
+    figures = cache.get(_cache_key(hub_id))
+    if figures is not None and figures.get('day') == today.isoformat():
+        return figures
+    snapshot = SurveyKpiSnapshot.objects.filter(hub_id=hub_id, day=today).first()
+    if snapshot is not None:
+        figures = {name: getattr(snapshot, name) for name in KPI_FIELDS}
+    else:
+        figures = {**_survey_figures(hub_id, today), **_response_figures(hub_id, today)}
+    figures['day'] = today.isoformat()
+    return figures
+
+
+async def aget(hub_id):
+    """``get`` for coroutine views: async cache and ORM reads; the daily refresh runs on a thread."""
+    today = timezone.localdate()
+    key = _cache_key(hub_id)
+    figures = await cache.aget(key)
+    if figures is not None and figures.get('day') == today.isoformat():
+        return figures
+    snapshot = await SurveyKpiSnapshot.objects.filter(hub_id=hub_id).afirst()
+    if snapshot is None or snapshot.day != today:
+        snapshot = await sync_to_async(refresh)(hub_id)
+    figures = {name: getattr(snapshot, name) for name in KPI_FIELDS}
+    figures['day'] = today.isoformat()
+    await cache.aset(key, figures, getattr(settings, 'SURVEYS_KPI_CACHE_TTL', DEFAULT_CACHE_TTL))
+    return figures
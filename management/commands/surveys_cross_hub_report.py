@@ -0,0 +1,42 @@
+"""
+Print the cross-hub survey report, aggregating the hubs in parallel.
+
+The hubs are given explicitly: ``--hub`` (repeatable), or ``--for-hub`` to
+report what that hub sees under ``SURVEYS_REPORT_HUB_GROUPS``.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys import crosshub
+
+
+class Command(BaseCommand):
+    help = 'Compare survey figures across the given hubs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', action='append', default=[], help='Report this hub_id (repeatable)')
+        parser.add_argument('--for-hub', help='Report the hubs this hub_id sees under SURVEYS_REPORT_HUB_GROUPS')
+        parser.add_argument('--refresh', action='store_true', help='Rebuild instead of using the cached report')
+
+    def handle(self, *args, **options):
+        hub_ids = list(options['hub'])
+        if options['for_hub']:
+            hub_ids += crosshub.report_hubs(options['for_hub'])
+        if not hub_ids:
+            raise CommandError('Give the hubs to report with --hub or --for-hub')
+        report = crosshub.get(hub_ids, refresh=options['refresh'])
+        self.stdout.write(f'{"hub":<36}  {"surveys":>7}  {"open":>5}  {"responses":>9}  {"week":>7}  {"rating":>6}  {"nps":>6}')
+        for hub in report.hubs:
+            self.stdout.write(self._row(hub.hub_id, hub.total))
+        self.stdout.write(self._row('total', report.total))
+        for title, total, per_hub in report.titles():
+            self.stdout.write(f'  {title}: {total.responses} response(s) in {len(per_hub)} hub(s), '
+                              f'rating {_fmt(total.rating)}, NPS {_fmt(total.nps)}')
+        self.stdout.write(self.style.SUCCESS(f'Reported {len(report.hubs)} hub(s) as of {report.generated_at:%Y-%m-%d %H:%M}'))
+
+    def _row(self, label, aggregate):
+        return (f'{label:<36}  {aggregate.surveys:>7}  {aggregate.open_surveys:>5}  {aggregate.responses:>9}  '
+                f'{aggregate.responses_week:>7}  {_fmt(aggregate.rating):>6}  {_fmt(aggregate.nps):>6}')
+
+
+def _fmt(value):
+    return '-' if value is None else f'{value:g}'
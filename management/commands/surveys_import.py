@@ -0,0 +1,32 @@
+"""
+Import survey definitions (with their questions) from a JSON or CSV file.
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys import importer
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import surveys and questions from a JSON or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON or CSV file')
+        parser.add_argument('--hub', required=True, help='hub_id the surveys belong to')
+        parser.add_argument('--format', choices=['json', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=importer.DEFAULT_CHUNK_SIZE,
+                            help='Surveys per transaction')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        try:
+            with open(path, 'rb') as fp:
+                definitions = importer.parse(fp.read(), fmt)
+            result, _ids = importer.import_surveys(options['hub'], definitions, chunk_size=options['chunk_size'])
+        except (OSError, importer.SurveyImportError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.surveys} survey(s) with {result.questions} question(s)'
+        ))
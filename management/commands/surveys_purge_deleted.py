@@ -0,0 +1,42 @@
+"""
+Move surveys and questions soft-deleted past the retention period into the
+archive tables, or report what would move with ``--dry-run``.
+"""
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from surveys import archive
+
+
+class Command(BaseCommand):
+    help = 'Archive and purge soft-deleted surveys and questions past SURVEYS_ARCHIVE_RETENTION_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only rows of this hub_id')
+        parser.add_argument('--days', type=int, help='Retention in days (default: SURVEYS_ARCHIVE_RETENTION_DAYS)')
+        parser.add_argument('--chunk-size', type=int, help='Rows per transaction (default: SURVEYS_ARCHIVE_CHUNK_SIZE)')
+        parser.add_argument('--pause', type=float, help='Seconds between chunks (default: SURVEYS_ARCHIVE_PAUSE)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be moved')
+
+    def handle(self, *args, **options):
+        before = archive.cutoff()
+        if options['days'] is not None:
+            before = timezone.now() - datetime.timedelta(days=options['days'])
+        if options['dry_run']:
+            report = archive.plan(before, hub_id=options['hub'])
+        else:
+            report = archive.purge(
+                before, hub_id=options['hub'], chunk_size=options['chunk_size'], pause=options['pause'],
+            )
+
+        for table, rows in report.rows.items():
+            size = report.bytes.get(table)
+            self.stdout.write(f'  {table}: {rows} row(s)' + (f', ~{size} bytes' if size is not None else ''))
+        verb = 'Would archive' if report.dry_run else f'Archived in {report.chunks} chunk(s)'
+        total_bytes = report.total_bytes
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {report.total_rows} row(s) deleted before {before:%Y-%m-%d %H:%M}'
+            + (f', reclaiming ~{total_bytes} bytes' if total_bytes is not None else '')
+        ))
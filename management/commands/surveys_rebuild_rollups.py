@@ -0,0 +1,28 @@
+"""
+Recompute per-question answer rollups from stored answers.
+"""
+from django.core.management.base import BaseCommand
+
+from surveys import rollups
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Rebuild QuestionRollup/QuestionRollupBucket rows from stored answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only surveys of this hub_id')
+        parser.add_argument('--survey', action='append', default=[], help='Only this survey id (repeatable)')
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.all()
+        if options['hub']:
+            surveys = surveys.filter(hub_id=options['hub'])
+        if options['survey']:
+            surveys = surveys.filter(id__in=options['survey'])
+
+        rebuilt = 0
+        for survey in surveys.only('id').iterator():
+            rollups.rebuild(survey)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {rebuilt} survey(s)'))
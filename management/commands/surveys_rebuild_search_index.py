@@ -0,0 +1,34 @@
+"""
+Rebuild the token search index (SurveySearchToken) from survey and question text.
+"""
+from django.core.management.base import BaseCommand
+
+from surveys import search
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the surveys token search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only surveys of this hub_id')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        if not backend.maintains_tokens:
+            self.stdout.write(f'The {backend.name} search backend does not use the token index')
+            return
+        surveys = Survey.all_objects.order_by('pk')
+        if options['hub']:
+            surveys = surveys.filter(hub_id=options['hub'])
+        batch, tokens, count = [], 0, 0
+        for survey_id in surveys.values_list('pk', flat=True).iterator():
+            batch.append(survey_id)
+            if len(batch) >= options['batch_size']:
+                tokens += search.reindex_surveys(batch)
+                count += len(batch)
+                batch = []
+        tokens += search.reindex_surveys(batch)
+        count += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} survey(s), {tokens} token(s)'))
@@ -0,0 +1,31 @@
+"""
+Rebuild the columnar response snapshots of surveys from stored answers.
+"""
+from django.core.management.base import BaseCommand
+
+from surveys import definitions, snapshots
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Rebuild memory-mapped response snapshots from stored answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only surveys of this hub_id')
+        parser.add_argument('--survey', action='append', default=[], help='Only this survey id (repeatable)')
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.all()
+        if options['hub']:
+            surveys = surveys.filter(hub_id=options['hub'])
+        if options['survey']:
+            surveys = surveys.filter(id__in=options['survey'])
+
+        rebuilt = rows = 0
+        for survey_id in surveys.values_list('id', flat=True).iterator():
+            definition = definitions.get_definition(survey_id)
+            if definition is None:
+                continue
+            rows += snapshots.rebuild(definition)['rows']
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt snapshots for {rebuilt} survey(s), {rows} response(s)'))
@@ -0,0 +1,34 @@
+"""
+Recompute response trend buckets from stored responses and prune old hourly buckets.
+"""
+from django.core.management.base import BaseCommand
+
+from surveys import trends
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Rebuild SurveyTrendBucket/QuestionTrendBucket rows and prune expired hourly buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only surveys of this hub_id')
+        parser.add_argument('--survey', action='append', default=[], help='Only this survey id (repeatable)')
+        parser.add_argument('--prune-only', action='store_true', help='Only delete hourly buckets past retention')
+
+    def handle(self, *args, **options):
+        pruned = trends.prune()
+        if options['prune_only']:
+            self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} hourly bucket(s)'))
+            return
+
+        surveys = Survey.objects.all()
+        if options['hub']:
+            surveys = surveys.filter(hub_id=options['hub'])
+        if options['survey']:
+            surveys = surveys.filter(id__in=options['survey'])
+
+        rebuilt = 0
+        for survey in surveys.only('id', 'hub_id').iterator():
+            trends.rebuild(survey)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt trends for {rebuilt} survey(s), pruned {pruned} hourly bucket(s)'))
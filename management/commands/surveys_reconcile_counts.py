@@ -0,0 +1,35 @@
+"""
+Fold sharded response counters into ``Survey.response_count`` and, unless
+``--rollup-only`` is given, recompute the true count from stored responses.
+"""
+from django.core.management.base import BaseCommand
+
+from surveys import counters
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = 'Roll up sharded response counters and reconcile Survey.response_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only surveys of this hub_id')
+        parser.add_argument('--survey', action='append', default=[], help='Only this survey id (repeatable)')
+        parser.add_argument('--rollup-only', action='store_true', help='Skip the recount from stored responses')
+
+    def handle(self, *args, **options):
+        surveys = Survey.all_objects.all()
+        if options['hub']:
+            surveys = surveys.filter(hub_id=options['hub'])
+        if options['survey']:
+            surveys = surveys.filter(id__in=options['survey'])
+
+        survey_ids = None if not (options['hub'] or options['survey']) else surveys.values_list('id', flat=True)
+        rolled = counters.rollup(survey_ids)
+        self.stdout.write(f'Rolled up counters for {rolled} survey(s)')
+        if options['rollup_only']:
+            return
+
+        changed = counters.reconcile(surveys)
+        for survey_id, (old, new) in changed.items():
+            self.stdout.write(f'  {survey_id}: {old} -> {new}')
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {len(changed)} survey(s)'))
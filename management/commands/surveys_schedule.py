@@ -0,0 +1,40 @@
+"""
+Close surveys whose end date has passed and publish every hub's open set.
+
+Run once a day shortly after midnight, or keep it running with ``--loop``;
+the loop repeats the work whenever the local date changes.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from surveys import scheduling
+from surveys.models import Survey
+from surveys.signals import surveys_changed
+
+
+class Command(BaseCommand):
+    help = 'Deactivate expired surveys and publish the cached open-survey sets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and repeat at each day boundary')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between date checks with --loop')
+
+    def handle(self, *args, **options):
+        day = self._run()
+        while options['loop']:
+            time.sleep(options['interval'])
+            if timezone.localdate() != day:
+                day = self._run()
+
+    def _run(self):
+        day = timezone.localdate()
+        closed = scheduling.close_expired(day)
+        for hub_id, survey_ids in closed.items():
+            surveys_changed.send(sender=Survey, hub_id=hub_id, survey_ids=survey_ids)
+        hubs = scheduling.publish(day)
+        self.stdout.write(self.style.SUCCESS(
+            f'{day}: closed {sum(map(len, closed.values()))} survey(s), published open sets for {hubs} hub(s)'
+        ))
+        return day
@@ -0,0 +1,283 @@
+"""
+Request instrumentation for the Surveys module.
+
+``instrumented`` wraps a view and ``instrumented_tool`` an assistant tool's
+``execute``. Each call records wall time, database query count and time,
+rows rendered and response bytes into per-process histograms, which
+``render_prometheus`` exposes in the Prometheus text format. Requests slower
+than ``SURVEYS_SLOW_REQUEST_MS`` are logged with the SQL they ran.
+
+Streaming responses are measured until their last chunk has been sent.
+Queries reach the current call's probe through one execute wrapper installed
+for good on every connection, which looks the probe up in a context
+variable; ``sync_to_async`` carries that variable into the thread a coroutine
+view's ORM calls run on, so concurrent requests never touch each other's
+probes.
+"""
+import contextvars
+import functools
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_REQUEST_MS = 500
+MAX_CAPTURED_SQL = 50
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+METRICS = {
+    'surveys_request_seconds': ('Wall time per call', SECONDS_BUCKETS),
+    'surveys_db_queries': ('Database queries per call', COUNT_BUCKETS),
+    'surveys_db_seconds': ('Database time per call', SECONDS_BUCKETS),
+    'surveys_rows_rendered': ('Rows rendered or returned per call', COUNT_BUCKETS),
+    'surveys_response_bytes': ('Response body size per call', BYTES_BUCKETS),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, safe to update from several threads."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+
+_histograms = {}
+_registry_lock = threading.Lock()
+# A context variable rather than a thread local: ``sync_to_async`` carries
+# it into the worker thread of a coroutine view's ORM calls.
+_current = contextvars.ContextVar('surveys_probe', default=None)
+
+
+def histogram(metric, endpoint):
+    key = (metric, endpoint)
+    with _registry_lock:
+        if key not in _histograms:
+            _histograms[key] = Histogram(METRICS[metric][1])
+        return _histograms[key]
+
+
+def reset():
+    with _registry_lock:
+        _histograms.clear()
+
+
+class _Probe:
+    """Measures one call; also the ``execute_wrapper`` that counts its queries."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = None
+        self.sql = []
+        self.parent = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            if len(self.sql) < MAX_CAPTURED_SQL:
+                self.sql.append((elapsed, sql))
+
+    def add_rows(self, count):
+        self.rows = (self.rows or 0) + count
+
+    def finish(self, response_bytes=None):
+        elapsed = time.perf_counter() - self.started
+        histogram('surveys_request_seconds', self.endpoint).observe(elapsed)
+        histogram('surveys_db_queries', self.endpoint).observe(self.queries)
+        histogram('surveys_db_seconds', self.endpoint).observe(self.db_seconds)
+        if self.rows is not None:
+            histogram('surveys_rows_rendered', self.endpoint).observe(self.rows)
+        if response_bytes is not None:
+            histogram('surveys_response_bytes', self.endpoint).observe(response_bytes)
+        slow_ms = getattr(settings, 'SURVEYS_SLOW_REQUEST_MS', DEFAULT_SLOW_REQUEST_MS)
+        if slow_ms is not None and elapsed * 1000 >= slow_ms:
+            statements = '\n'.join(
+                f'  {seconds * 1000:.1f}ms {sql}' for seconds, sql in sorted(self.sql, key=lambda item: -item[0])
+            )
+            logger.warning(
+                'Slow surveys call %s: %.0fms, %d queries (%.0fms)\n%s',
+                self.endpoint, elapsed * 1000, self.queries, self.db_seconds * 1000, statements,
+            )
+
+
+def _dispatch(execute, sql, params, many, context):
+    """The permanent execute wrapper: time the query for the current probe and the probes it is nested in."""
+    probe = _current.get()
+    while probe is not None:
+        execute = functools.partial(probe, execute)
+        probe = probe.parent
+    return execute(sql, params, many, context)
+
+
+def _install(conn):
+    if _dispatch not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_dispatch)
+
+
+@receiver(connection_created, dispatch_uid='surveys_metrics_dispatch')
+def _install_on_connect(sender, connection, **kwargs):
+    _install(connection)
+
+
+class _Active:
+    """Make ``probe`` the current call's probe, nested in whichever was current."""
+
+    def __init__(self, probe):
+        self.probe = probe
+
+    def __enter__(self):
+        self.previous = _current.get()
+        self.probe.parent = self.previous
+        _current.set(self.probe)
+        # Connections opened before this module was imported.
+        _install(connection)
+        return self.probe
+
+    def __exit__(self, *exc):
+        _current.set(self.previous)
+
+
+def note_rows(count):
+    """Record that the current call rendered ``count`` rows."""
+    probe = _current.get()
+    if probe is not None:
+        probe.add_rows(count)
+
+
+def counted(rows):
+    """Yield from ``rows``, adding each one to the current call's row count."""
+    for row in rows:
+        note_rows(1)
+        yield row
+
+
+def _stream(probe, chunks):
+    sent = 0
+    try:
+        with _Active(probe):
+            for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+    finally:
+        probe.finish(sent)
+
+
+async def _astream(probe, chunks):
+    sent = 0
+    try:
+        with _Active(probe):
+            async for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+    finally:
+        probe.finish(sent)
+
+
+def instrumented(view):
+    """Record latency, queries, rows and bytes for every call to ``view``."""
+    endpoint = view.__name__
+
+    def finish(probe, response):
+        if getattr(response, 'streaming', False):
+            stream = _astream if response.is_async else _stream
+            response.streaming_content = stream(probe, response.streaming_content)
+        else:
+            probe.finish(len(response.content))
+        return response
+
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            probe = _Probe(endpoint)
+            with _Active(probe):
+                response = await view(request, *args, **kwargs)
+            return finish(probe, response)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        probe = _Probe(endpoint)
+        with _Active(probe):
+            response = view(request, *args, **kwargs)
+        return finish(probe, response)
+    return wrapper
+
+
+def instrumented_tool(cls):
+    """Class decorator: instrument ``cls.execute`` under ``tool:<name>``."""
+    execute = cls.execute
+    endpoint = f'tool:{cls.name}'
+
+    @functools.wraps(execute)
+    def wrapper(self, args, request):
+        probe = _Probe(endpoint)
+        with _Active(probe):
+            result = execute(self, args, request)
+        if isinstance(result, dict):
+            for value in result.values():
+                if isinstance(value, list):
+                    probe.add_rows(len(value))
+        probe.finish()
+        return result
+
+    cls.execute = wrapper
+    return cls
+
+
+def _labels(endpoint, **extra):
+    items = {'endpoint': endpoint, **extra}
+    return ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"')) for key, value in items.items())
+
+
+def render_prometheus():
+    """All histograms of this process in the Prometheus text exposition format."""
+    with _registry_lock:
+        items = sorted(_histograms.items())
+    lines = []
+    for metric, (help_text, _buckets) in METRICS.items():
+        series = [(endpoint, hist) for (name, endpoint), hist in items if name == metric]
+        if not series:
+            continue
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for endpoint, hist in series:
+            counts, count, total = hist.snapshot()
+            for bound, bucket_count in zip(hist.buckets, counts):
+                lines.append(f'{metric}_bucket{{{_labels(endpoint, le=bound)}}} {bucket_count}')
+            lines.append(f'{metric}_bucket{{{_labels(endpoint, le="+Inf")}}} {count}')
+            lines.append(f'{metric}_sum{{{_labels(endpoint)}}} {total}')
+            lines.append(f'{metric}_count{{{_labels(endpoint)}}} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0002_surveyresponse_surveyanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Shard')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Count')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='surveys.survey')),
+            ],
+            options={
+                'db_table': 'surveys_surveycountershard',
+                'constraints': [models.UniqueConstraint(fields=('survey', 'shard'), name='surveys_countershard_survey_shard_uniq')],
+            },
+        ),
+    ]
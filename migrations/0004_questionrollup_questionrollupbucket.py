@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0003_surveycountershard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Count')),
+                ('numeric_count', models.BigIntegerField(default=0, verbose_name='Numeric Count')),
+                ('value_sum', models.FloatField(default=0, verbose_name='Sum')),
+                ('value_sum_sq', models.FloatField(default=0, verbose_name='Sum of Squares')),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rollup', to='surveys.surveyquestion')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_rollups', to='surveys.survey')),
+            ],
+            options={
+                'db_table': 'surveys_questionrollup',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionRollupBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(max_length=100, verbose_name='Value')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Count')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollup_buckets', to='surveys.surveyquestion')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_rollup_buckets', to='surveys.survey')),
+            ],
+            options={
+                'db_table': 'surveys_questionrollupbucket',
+                'constraints': [models.UniqueConstraint(fields=('question', 'value'), name='surveys_rollupbucket_question_value_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SEARCH_INDEXES = [
+    (
+        'surveys_survey_search_tsv',
+        "CREATE INDEX IF NOT EXISTS surveys_survey_search_tsv ON surveys_survey USING gin "
+        "(to_tsvector('simple'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '')))",
+    ),
+    (
+        'surveys_question_search_tsv',
+        "CREATE INDEX IF NOT EXISTS surveys_question_search_tsv ON surveys_surveyquestion USING gin "
+        "(to_tsvector('simple'::regconfig, coalesce(text, '')))",
+    ),
+]
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _name, sql in SEARCH_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _sql in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def build_tokens(apps, schema_editor):
+    from surveys.search import survey_tokens
+
+    Survey = apps.get_model('surveys', 'Survey')
+    SurveyQuestion = apps.get_model('surveys', 'SurveyQuestion')
+    SurveySearchToken = apps.get_model('surveys', 'SurveySearchToken')
+
+    texts = {}
+    for survey_id, text in SurveyQuestion.objects.filter(is_deleted=False).values_list('survey_id', 'text').iterator():
+        texts.setdefault(survey_id, []).append(text)
+    rows = []
+    surveys = Survey.objects.values_list('id', 'hub_id', 'title', 'description').iterator()
+    for survey_id, hub_id, title, description in surveys:
+        for token, weight in survey_tokens(title, description, texts.get(survey_id, [])).items():
+            rows.append(SurveySearchToken(hub_id=hub_id, survey_id=survey_id, token=token, weight=weight))
+        if len(rows) >= 5000:
+            SurveySearchToken.objects.bulk_create(rows)
+            rows = []
+    SurveySearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0004_questionrollup_questionrollupbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveySearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('token', models.CharField(max_length=64, verbose_name='Token')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='Weight')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='surveys.survey')),
+            ],
+            options={
+                'db_table': 'surveys_surveysearchtoken',
+                'indexes': [models.Index(fields=['hub_id', 'token'], name='surveys_searchtoken_hub_tok')],
+            },
+        ),
+        migrations.RunPython(build_tokens, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
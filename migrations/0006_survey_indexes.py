@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0005_surveysearchtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'title', 'id'], name='surveys_live_hub_title'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'is_active', 'id'], name='surveys_live_hub_active'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'response_count', 'id'], name='surveys_live_hub_responses'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'start_date', 'id'], name='surveys_live_hub_start'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'end_date', 'id'], name='surveys_live_hub_end'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='surveys_live_hub_created'),
+        ),
+        migrations.AddIndex(
+            model_name='surveyquestion',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['survey', 'order'], name='surveys_q_live_survey_order'),
+        ),
+        migrations.AddIndex(
+            model_name='surveyresponse',
+            index=models.Index(fields=['survey', 'created_at'], name='surveys_resp_survey_created'),
+        ),
+        migrations.AddIndex(
+            model_name='surveyresponse',
+            index=models.Index(fields=['hub_id', 'created_at'], name='surveys_resp_hub_created'),
+        ),
+    ]
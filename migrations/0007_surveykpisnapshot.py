@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0006_survey_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyKpiSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True, unique=True)),
+                ('day', models.DateField(verbose_name='Day')),
+                ('total_surveys', models.PositiveIntegerField(default=0, verbose_name='Total Surveys')),
+                ('active_surveys', models.PositiveIntegerField(default=0, verbose_name='Active Surveys')),
+                ('scheduled_surveys', models.PositiveIntegerField(default=0, verbose_name='Scheduled Surveys')),
+                ('expired_surveys', models.PositiveIntegerField(default=0, verbose_name='Expired Surveys')),
+                ('total_responses', models.BigIntegerField(default=0, verbose_name='Total Responses')),
+                ('responses_today', models.BigIntegerField(default=0, verbose_name='Responses Today')),
+                ('responses_week', models.BigIntegerField(default=0, verbose_name='Responses This Week')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'surveys_surveykpisnapshot',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0007_surveykpisnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='definition_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
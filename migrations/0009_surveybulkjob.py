@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0008_survey_definition_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyBulkJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('action', models.CharField(choices=[('activate', 'Activate'), ('deactivate', 'Deactivate'), ('delete', 'Delete')], max_length=20, verbose_name='Action')),
+                ('search_query', models.CharField(blank=True, max_length=255, verbose_name='Search')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Processed')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'surveys_surveybulkjob',
+                'indexes': [models.Index(fields=['hub_id', 'created_at'], name='surveys_bulkjob_hub_created')],
+            },
+        ),
+    ]
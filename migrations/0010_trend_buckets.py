@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0009_surveybulkjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyTrendBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4, verbose_name='Granularity')),
+                ('start', models.DateTimeField(verbose_name='Start')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Count')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_buckets', to='surveys.survey')),
+            ],
+            options={
+                'db_table': 'surveys_surveytrendbucket',
+                'indexes': [
+                    models.Index(fields=['hub_id', 'granularity', 'start'], name='surveys_trend_hub_start'),
+                    models.Index(fields=['granularity', 'start'], name='surveys_trend_gran_start'),
+                ],
+                'constraints': [models.UniqueConstraint(fields=('survey', 'granularity', 'start'), name='surveys_trend_survey_start_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionTrendBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4, verbose_name='Granularity')),
+                ('start', models.DateTimeField(verbose_name='Start')),
+                ('value', models.CharField(max_length=100, verbose_name='Value')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Count')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_buckets', to='surveys.surveyquestion')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_trend_buckets', to='surveys.survey')),
+            ],
+            options={
+                'db_table': 'surveys_questiontrendbucket',
+                'indexes': [models.Index(fields=['granularity', 'start'], name='surveys_qtrend_gran_start')],
+                'constraints': [models.UniqueConstraint(fields=('question', 'granularity', 'start', 'value'), name='surveys_qtrend_question_start_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0010_trend_buckets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_deleted', False)), fields=['end_date'], name='surveys_live_active_end'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 6.0.2 on 2026-10-18 22:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0011_survey_active_end_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSurvey',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('title', models.CharField(max_length=255, verbose_name='Title')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('is_active', models.BooleanField(default=False, verbose_name='Is Active')),
+                ('start_date', models.DateField(blank=True, null=True, verbose_name='Start Date')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='End Date')),
+                ('response_count', models.PositiveIntegerField(default=0, verbose_name='Response Count')),
+            ],
+            options={
+                'abstract': False,
+                'db_table': 'surveys_archivedsurvey',
+                'indexes': [models.Index(fields=['hub_id', 'archived_at'], name='surveys_arch_hub_archived')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSurveyQuestion',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('survey_id', models.UUIDField(db_index=True)),
+                ('text', models.CharField(max_length=500, verbose_name='Text')),
+                ('question_type', models.CharField(max_length=20, verbose_name='Question Type')),
+                ('is_required', models.BooleanField(default=True, verbose_name='Is Required')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Order')),
+            ],
+            options={
+                'abstract': False,
+                'db_table': 'surveys_archivedsurveyquestion',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSurveyResponse',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('survey_id', models.UUIDField(db_index=True)),
+                ('source', models.CharField(blank=True, max_length=20, verbose_name='Source')),
+            ],
+            options={
+                'abstract': False,
+                'db_table': 'surveys_archivedsurveyresponse',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSurveyAnswer',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('survey_id', models.UUIDField(db_index=True)),
+                ('response_id', models.UUIDField()),
+                ('question_id', models.UUIDField()),
+                ('value', models.TextField(blank=True, verbose_name='Value')),
+                ('numeric_value', models.FloatField(blank=True, null=True, verbose_name='Numeric Value')),
+            ],
+            options={
+                'abstract': False,
+                'db_table': 'surveys_archivedsurveyanswer',
+            },
+        ),
+    ]
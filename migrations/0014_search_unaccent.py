@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:10
+
+from django.db import migrations
+
+
+# ``unaccent`` is only STABLE; index expressions need an IMMUTABLE function.
+CREATE_UNACCENT = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE OR REPLACE FUNCTION surveys_unaccent(text) RETURNS text AS "
+    "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$ "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT",
+]
+
+UNACCENTED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS surveys_survey_search_tsv ON surveys_survey USING gin "
+    "(to_tsvector('simple'::regconfig, surveys_unaccent(coalesce(title, '') || ' ' || coalesce(description, ''))))",
+    "CREATE INDEX IF NOT EXISTS surveys_question_search_tsv ON surveys_surveyquestion USING gin "
+    "(to_tsvector('simple'::regconfig, surveys_unaccent(coalesce(text, ''))))",
+]
+
+ACCENTED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS surveys_survey_search_tsv ON surveys_survey USING gin "
+    "(to_tsvector('simple'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '')))",
+    "CREATE INDEX IF NOT EXISTS surveys_question_search_tsv ON surveys_surveyquestion USING gin "
+    "(to_tsvector('simple'::regconfig, coalesce(text, '')))",
+]
+
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS surveys_survey_search_tsv",
+    "DROP INDEX IF EXISTS surveys_question_search_tsv",
+]
+
+
+def unaccent_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in CREATE_UNACCENT + DROP_INDEXES + UNACCENTED_INDEXES:
+        schema_editor.execute(sql)
+
+
+def accent_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in DROP_INDEXES + ACCENTED_INDEXES + ["DROP FUNCTION IF EXISTS surveys_unaccent(text)"]:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0013_surveyresponse_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(unaccent_indexes, accent_indexes),
+    ]
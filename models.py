@@ -10,9 +10,23 @@ class Survey(HubBaseModel):
     start_date = models.DateField(null=True, blank=True, verbose_name=_('Start Date'))
     end_date = models.DateField(null=True, blank=True, verbose_name=_('End Date'))
     response_count = models.PositiveIntegerField(default=0, verbose_name=_('Response Count'))
+    # Bumped by every survey or question edit; keys the compiled definition cache.
+    definition_version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta(HubBaseModel.Meta):
         db_table = 'surveys_survey'
+        # One partial index per datatable sort column; ``description`` is an
+        # unbounded TextField and is deliberately left out.
+        indexes = [
+            models.Index(fields=['hub_id', 'title', 'id'], name='surveys_live_hub_title', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'is_active', 'id'], name='surveys_live_hub_active', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'response_count', 'id'], name='surveys_live_hub_responses', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'start_date', 'id'], name='surveys_live_hub_start', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'end_date', 'id'], name='surveys_live_hub_end', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'created_at', 'id'], name='surveys_live_hub_created', condition=models.Q(is_deleted=False)),
+            # Cross-hub scan of ``scheduling.close_expired``.
+            models.Index(fields=['end_date'], name='surveys_live_active_end', condition=models.Q(is_deleted=False, is_active=True)),
+        ]
 
     def __str__(self):
         return self.title
@@ -27,7 +41,311 @@ class SurveyQuestion(HubBaseModel):
 
     class Meta(HubBaseModel.Meta):
         db_table = 'surveys_surveyquestion'
+        indexes = [
+            models.Index(fields=['survey', 'order'], name='surveys_q_live_survey_order', condition=models.Q(is_deleted=False)),
+        ]
 
     def __str__(self):
         return str(self.id)
 
+
+class SurveyResponse(HubBaseModel):
+    survey = models.ForeignKey('Survey', on_delete=models.CASCADE, related_name='responses')
+    source = models.CharField(max_length=20, blank=True, verbose_name=_('Source'))
+    # Sent by the client so a retried submission is stored once.
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'surveys_surveyresponse'
+        indexes = [
+            models.Index(fields=['survey', 'created_at'], name='surveys_resp_survey_created'),
+            models.Index(fields=['hub_id', 'created_at'], name='surveys_resp_hub_created'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['survey', 'idempotency_key'], name='surveys_resp_survey_idem_uniq',
+                condition=models.Q(idempotency_key__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.id)
+
+
+class SurveyAnswer(HubBaseModel):
+    survey = models.ForeignKey('Survey', on_delete=models.CASCADE, related_name='answers')
+    response = models.ForeignKey('SurveyResponse', on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey('SurveyQuestion', on_delete=models.CASCADE, related_name='answers')
+    value = models.TextField(blank=True, verbose_name=_('Value'))
+    numeric_value = models.FloatField(null=True, blank=True, verbose_name=_('Numeric Value'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'surveys_surveyanswer'
+
+    def __str__(self):
+        return str(self.id)
+
+
+class SurveyCounterShard(models.Model):
+    """
+    One slice of a survey's pending response count.
+
+    Writers bump a random shard instead of the survey row; ``counters.rollup``
+    periodically folds the shards into ``Survey.response_count``.
+    """
+    survey = models.ForeignKey('Survey', on_delete=models.CASCADE, related_name='counter_shards')
+    shard = models.PositiveSmallIntegerField(verbose_name=_('Shard'))
+    count = models.BigIntegerField(default=0, verbose_name=_('Count'))
+
+    class Meta:
+        db_table = 'surveys_surveycountershard'
+        constraints = [
+            models.UniqueConstraint(fields=['survey', 'shard'], name='surveys_countershard_survey_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.survey_id}#{self.shard}'
+
+
+class QuestionRollup(models.Model):
+    """Running totals for one question, maintained as answers are ingested."""
+    survey = models.ForeignKey('Survey', on_delete=models.CASCADE, related_name='question_rollups')
+    question = models.OneToOneField('SurveyQuestion', on_delete=models.CASCADE, related_name='rollup')
+    count = models.BigIntegerField(default=0, verbose_name=_('Count'))
+    numeric_count = models.BigIntegerField(default=0, verbose_name=_('Numeric Count'))
+    value_sum = models.FloatField(default=0, verbose_name=_('Sum'))
+    value_sum_sq = models.FloatField(default=0, verbose_name=_('Sum of Squares'))
+
+    class Meta:
+        db_table = 'surveys_questionrollup'
+
+    def __str__(self):
+        return str(self.question_id)
+
+
+class QuestionRollupBucket(models.Model):
+    """Histogram bucket: how many answers to a question had a given value."""
+    survey = models.ForeignKey('Survey', on_delete=models.CASCADE, related_name='question_rollup_buckets')
+    question = models.ForeignKey('SurveyQuestion', on_delete=models.CASCADE, related_name='rollup_buckets')
+    value = models.CharField(max_length=100, verbose_name=_('Value'))
+    count = models.BigIntegerField(default=0, verbose_name=_('Count'))
+
+    class Meta:
+        db_table = 'surveys_questionrollupbucket'
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'value'], name='surveys_rollupbucket_question_value_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.question_id}={self.value}'
+
+
+class SurveySearchToken(models.Model):
+    """
+    Inverted index entry: ``token`` occurs in a survey's title, description
+    or question text. Maintained by ``search.reindex_surveys``.
+    """
+    hub_id = models.UUIDField(null=True, blank=True, editable=False)
+    survey = models.ForeignKey('Survey', on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64, verbose_name=_('Token'))
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name=_('Weight'))
+
+    class Meta:
+        db_table = 'surveys_surveysearchtoken'
+        indexes = [
+            models.Index(fields=['hub_id', 'token'], name='surveys_searchtoken_hub_tok'),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class SurveyKpiSnapshot(models.Model):
+    """
+    Per-hub dashboard figures, kept current by the write paths so the
+    dashboard never aggregates on read. ``day`` is the local date the date
+    dependent figures were computed for.
+    """
+    hub_id = models.UUIDField(unique=True, null=True, blank=True, editable=False)
+    day = models.DateField(verbose_name=_('Day'))
+    total_surveys = models.PositiveIntegerField(default=0, verbose_name=_('Total Surveys'))
+    active_surveys = models.PositiveIntegerField(default=0, verbose_name=_('Active Surveys'))
+    scheduled_surveys = models.PositiveIntegerField(default=0, verbose_name=_('Scheduled Surveys'))
+    expired_surveys = models.PositiveIntegerField(default=0, verbose_name=_('Expired Surveys'))
+    total_responses = models.BigIntegerField(default=0, verbose_name=_('Total Responses'))
+    responses_today = models.BigIntegerField(default=0, verbose_name=_('Responses Today'))
+    responses_week = models.BigIntegerField(default=0, verbose_name=_('Responses This Week'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'surveys_surveykpisnapshot'
+
+    def __str__(self):
+        return f'{self.hub_id} @ {self.day}'
+
+
+class SurveyBulkJob(models.Model):
+    """
+    A bulk action over every survey matching a list filter, run in the
+    background by ``bulkjobs`` in bounded primary-key chunks.
+    """
+    ACTION_CHOICES = [
+        ('activate', _('Activate')),
+        ('deactivate', _('Deactivate')),
+        ('delete', _('Delete')),
+    ]
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('running', _('Running')),
+        ('done', _('Done')),
+        ('failed', _('Failed')),
+    ]
+
+    hub_id = models.UUIDField(null=True, blank=True, editable=False)
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES, verbose_name=_('Action'))
+    search_query = models.CharField(max_length=255, blank=True, verbose_name=_('Search'))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name=_('Status'))
+    total = models.PositiveIntegerField(default=0, verbose_name=_('Total'))
+    processed = models.PositiveIntegerField(default=0, verbose_name=_('Processed'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'surveys_surveybulkjob'
+        indexes = [
+            models.Index(fields=['hub_id', 'created_at'], name='surveys_bulkjob_hub_created'),
+        ]
+
+    def __str__(self):
+        return f'{self.action} #{self.pk}'
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+    @property
+    def percent(self):
+        if self.status == 'done':
+            return 100
+        return int(self.processed * 100 / self.total) if self.total else 0
+
+
+class SurveyTrendBucket(models.Model):
+    """Responses a survey received in one hour or local day, maintained on ingest."""
+    GRANULARITY_CHOICES = [
+        ('hour', _('Hour')),
+        ('day', _('Day')),
+    ]
+
+    hub_id = models.UUIDField(null=True, blank=True, editable=False)
+    survey = models.ForeignKey('Survey', on_delete=models.CASCADE, related_name='trend_buckets')
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES, verbose_name=_('Granularity'))
+    start = models.DateTimeField(verbose_name=_('Start'))
+    count = models.BigIntegerField(default=0, verbose_name=_('Count'))
+
+    class Meta:
+        db_table = 'surveys_surveytrendbucket'
+        constraints = [
+            models.UniqueConstraint(fields=['survey', 'granularity', 'start'], name='surveys_trend_survey_start_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['hub_id', 'granularity', 'start'], name='surveys_trend_hub_start'),
+            models.Index(fields=['granularity', 'start'], name='surveys_trend_gran_start'),
+        ]
+
+    def __str__(self):
+        return f'{self.survey_id} {self.granularity} {self.start:%Y-%m-%d %H:%M}'
+
+
+class QuestionTrendBucket(models.Model):
+    """Answers with a given value to one question in one hour or local day."""
+    survey = models.ForeignKey('Survey', on_delete=models.CASCADE, related_name='question_trend_buckets')
+    question = models.ForeignKey('SurveyQuestion', on_delete=models.CASCADE, related_name='trend_buckets')
+    granularity = models.CharField(max_length=4, choices=SurveyTrendBucket.GRANULARITY_CHOICES, verbose_name=_('Granularity'))
+    start = models.DateTimeField(verbose_name=_('Start'))
+    value = models.CharField(max_length=100, verbose_name=_('Value'))
+    count = models.BigIntegerField(default=0, verbose_name=_('Count'))
+
+    class Meta:
+        db_table = 'surveys_questiontrendbucket'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['question', 'granularity', 'start', 'value'], name='surveys_qtrend_question_start_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'start'], name='surveys_qtrend_gran_start'),
+        ]
+
+    def __str__(self):
+        return f'{self.question_id} {self.granularity} {self.start:%Y-%m-%d %H:%M}={self.value}'
+
+
+class ArchivedRow(models.Model):
+    """
+    Common columns of the archive tables. Rows keep their original primary
+    key; the live rows they came from are gone, so references are plain UUIDs.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    hub_id = models.UUIDField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return str(self.id)
+
+
+class ArchivedSurvey(ArchivedRow):
+    """A ``Survey`` moved out of the live table by ``archive.purge``."""
+    title = models.CharField(max_length=255, verbose_name=_('Title'))
+    description = models.TextField(blank=True, verbose_name=_('Description'))
+    is_active = models.BooleanField(default=False, verbose_name=_('Is Active'))
+    start_date = models.DateField(null=True, blank=True, verbose_name=_('Start Date'))
+    end_date = models.DateField(null=True, blank=True, verbose_name=_('End Date'))
+    response_count = models.PositiveIntegerField(default=0, verbose_name=_('Response Count'))
+
+    class Meta:
+        db_table = 'surveys_archivedsurvey'
+        indexes = [
+            models.Index(fields=['hub_id', 'archived_at'], name='surveys_arch_hub_archived'),
+        ]
+
+
+class ArchivedSurveyQuestion(ArchivedRow):
+    """A ``SurveyQuestion`` moved out with its survey, or on its own once past retention."""
+    survey_id = models.UUIDField(db_index=True)
+    text = models.CharField(max_length=500, verbose_name=_('Text'))
+    question_type = models.CharField(max_length=20, verbose_name=_('Question Type'))
+    is_required = models.BooleanField(default=True, verbose_name=_('Is Required'))
+    order = models.PositiveIntegerField(default=0, verbose_name=_('Order'))
+
+    class Meta:
+        db_table = 'surveys_archivedsurveyquestion'
+
+
+class ArchivedSurveyResponse(ArchivedRow):
+    """A ``SurveyResponse`` of an archived survey."""
+    survey_id = models.UUIDField(db_index=True)
+    source = models.CharField(max_length=20, blank=True, verbose_name=_('Source'))
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
+    class Meta:
+        db_table = 'surveys_archivedsurveyresponse'
+
+
+class ArchivedSurveyAnswer(ArchivedRow):
+    """A ``SurveyAnswer`` of an archived survey or question."""
+    survey_id = models.UUIDField(db_index=True)
+    response_id = models.UUIDField()
+    question_id = models.UUIDField()
+    value = models.TextField(blank=True, verbose_name=_('Value'))
+    numeric_value = models.FloatField(null=True, blank=True, verbose_name=_('Numeric Value'))
+
+    class Meta:
+        db_table = 'surveys_archivedsurveyanswer'
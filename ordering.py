@@ -0,0 +1,110 @@
+"""
+Question ordering for the Surveys module.
+
+``SurveyQuestion.order`` is sparse: new surveys number their questions
+``STEP``, ``2 * STEP``, ... so a question can move between two others by
+taking a value in the gap, without renumbering the rest.
+
+``reorder`` applies a whole new order. It keeps the longest run of questions
+that are already in the right relative order where they are and gives only
+the moved ones new values inside the gaps, so a drag and drop rewrites one
+row. The changed rows are written by a single ``UPDATE ... CASE``. When a gap
+is used up, every question of the survey is renumbered to ``STEP`` spacing
+in that same statement.
+"""
+from bisect import bisect_left
+
+from django.db import transaction
+from django.db.models import Case, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+from . import definitions
+from .models import SurveyQuestion
+
+STEP = 1024
+
+
+class OrderingError(ValueError):
+    """The requested order does not match the survey's questions."""
+
+
+def position(index):
+    """``order`` of the question at ``index`` in freshly numbered questions."""
+    return (index + 1) * STEP
+
+
+def _kept(orders):
+    """Indexes of a longest strictly increasing subsequence of ``orders``."""
+    tails, tail_indexes, previous = [], [], [None] * len(orders)
+    for i, order in enumerate(orders):
+        j = bisect_left(tails, order)
+        if j == len(tails):
+            tails.append(order)
+            tail_indexes.append(i)
+        else:
+            tails[j] = order
+            tail_indexes[j] = i
+        previous[i] = tail_indexes[j - 1] if j else None
+    kept = set()
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        kept.add(i)
+        i = previous[i]
+    return kept
+
+
+def plan(current, question_ids):
+    """
+    New ``order`` values that put ``question_ids`` in sequence, given their
+    ``current`` orders (``{id: order}``). Returns ``{id: order}`` for the
+    questions that change, or for all of them when the gaps are used up.
+    """
+    orders = [current[question_id] for question_id in question_ids]
+    kept = _kept(orders)
+    changes = {}
+    low, run = 0, []
+    for i, question_id in enumerate(question_ids + [None]):
+        if question_id is not None and i not in kept:
+            run.append(question_id)
+            continue
+        if run:
+            high = orders[i] if question_id is not None else low + STEP * (len(run) + 1)
+            gap = (high - low) // (len(run) + 1)
+            if gap < 1:
+                return {qid: position(index) for index, qid in enumerate(question_ids)}
+            changes.update((qid, low + gap * (n + 1)) for n, qid in enumerate(run))
+            run = []
+        if question_id is not None:
+            low = orders[i]
+    return changes
+
+
+def reorder(survey_id, question_ids):
+    """
+    Put the live questions of ``survey_id`` in the order of ``question_ids``,
+    which must list each of them exactly once. Returns the rows rewritten.
+    """
+    question_ids = [str(question_id) for question_id in question_ids]
+    if len(set(question_ids)) != len(question_ids):
+        raise OrderingError('Each question may appear only once')
+    with transaction.atomic():
+        current = {
+            str(question_id): order
+            for question_id, order in SurveyQuestion.objects.select_for_update()
+            .filter(survey_id=survey_id, is_deleted=False).values_list('id', 'order')
+        }
+        if set(question_ids) != set(current):
+            raise OrderingError('The new order must list every question of the survey')
+        changes = plan(current, question_ids)
+        if not changes:
+            return 0
+        SurveyQuestion.objects.filter(pk__in=list(changes)).update(
+            order=Case(
+                *[When(pk=question_id, then=Value(order)) for question_id, order in changes.items()],
+                output_field=PositiveIntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+        # ``update`` skips ``post_save``; the compiled definition holds the order.
+        definitions.bump([survey_id])
+    return len(changes)
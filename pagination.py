@@ -0,0 +1,166 @@
+"""
+Keyset (cursor) pagination for the Surveys module.
+
+Pages are addressed by the sort key of the last (or first) row shown plus
+the primary key as a tiebreaker, so fetching page 1000 costs the same index
+range scan as page 1 and no ``COUNT(*)``/``OFFSET`` is needed. Cursors are
+opaque URL-safe tokens.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_key, value, pk, backwards=False):
+    payload = {'s': sort_key, 'v': value, 'k': str(pk), 'b': backwards}
+    raw = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        return payload['s'], payload['v'], payload['k'], bool(payload.get('b'))
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor(token)
+
+
+def _beyond(field, value, pk, greater, nullable):
+    """
+    Rows strictly after ``(value, pk)`` in the direction of ``greater``.
+
+    NULLs sort where the database puts them natively (largest on PostgreSQL,
+    smallest on SQLite/MySQL) so plain ``ORDER BY field, id`` keeps using the
+    index. A row-after-key disjunction alone gives the planner no range to
+    seek to, so it is AND-ed with the redundant bound ``field >= value``
+    (``<=`` going backwards) that starts the index scan at the cursor.
+    """
+    nulls_largest = connection.features.nulls_order_largest
+    op = 'gt' if greater else 'lt'
+    tie = Q(**{f'pk__{op}': pk})
+    if value is None:
+        q = Q(**{f'{field}__isnull': True}) & tie
+        if greater != nulls_largest:
+            q |= Q(**{f'{field}__isnull': False})
+        return q
+    bound = Q(**{f"{field}__{'gte' if greater else 'lte'}": value})
+    q = Q(**{f'{field}__{op}': value}) | (Q(**{field: value}) & tie)
+    if nullable and greater == nulls_largest:
+        null = Q(**{f'{field}__isnull': True})
+        return (bound | null) & (q | null)
+    return bound & q
+
+
+class CursorPage:
+    """One page of a keyset-paginated queryset."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, approximate_total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.approximate_total = approximate_total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class CursorPaginator:
+    """
+    Paginate ``qs`` ordered by ``field`` (ascending unless ``descending``)
+    with ``pk`` as tiebreaker.
+    """
+
+    def __init__(self, qs, field, descending=False, per_page=12):
+        self.field = field
+        self.descending = descending
+        self.per_page = per_page
+        self.sort_key = f'-{field}' if descending else field
+        self.qs = qs
+        self._model_field = qs.model._meta.get_field(field)
+        self.nullable = self._model_field.null
+
+    def _ordered(self, backwards):
+        prefix = '-' if self.descending != backwards else ''
+        return self.qs.order_by(f'{prefix}{self.field}', f'{prefix}pk')
+
+    def _cursor(self, obj, backwards):
+        if isinstance(obj, dict):
+            # ``values()`` rows must include the sort field and the primary key.
+            value, pk = obj[self.field], obj[self.qs.model._meta.pk.attname]
+        else:
+            value, pk = self._model_field.value_from_object(obj), obj.pk
+        return encode_cursor(self.sort_key, value, pk, backwards)
+
+    def get_page(self, token=None, approximate_total=False):
+        backwards = False
+        qs = self._ordered(False)
+        if token:
+            try:
+                sort_key, value, pk, backwards = decode_cursor(token)
+                if sort_key != self.sort_key:
+                    raise InvalidCursor(token)
+                value = self._model_field.to_python(value)
+                greater = self.descending == backwards
+                qs = self._ordered(backwards).filter(_beyond(self.field, value, pk, greater, self.nullable))
+            except (InvalidCursor, ValidationError):
+                token, backwards = None, False
+                qs = self._ordered(False)
+
+        rows = list(qs[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if backwards:
+                next_cursor = self._cursor(rows[-1], False)
+                if more:
+                    previous_cursor = self._cursor(rows[0], True)
+            else:
+                if more:
+                    next_cursor = self._cursor(rows[-1], False)
+                if token:
+                    previous_cursor = self._cursor(rows[0], True)
+        total = approximate_count(self.qs) if approximate_total else None
+        return CursorPage(rows, next_cursor, previous_cursor, total)
+
+
+def approximate_count(qs):
+    """
+    Planner row estimate for ``qs`` on PostgreSQL, ``None`` elsewhere.
+
+    Costs one ``EXPLAIN`` instead of a ``COUNT(*)`` over every matching row.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = qs.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,200 @@
+"""
+Per-question answer rollups for the Surveys module.
+
+Every ingested batch folds its answers into ``QuestionRollup`` (count, sum,
+sum of squares) and ``QuestionRollupBucket`` (value histogram) rows, so the
+Responses tab reads O(buckets) rows per question instead of scanning answers.
+"""
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import QuestionRollup, QuestionRollupBucket, SurveyAnswer, SurveyQuestion
+
+NUMERIC_TYPES = {'rating', 'scale'}
+BUCKETED_TYPES = NUMERIC_TYPES | {'yes_no', 'multiple_choice'}
+NPS_TYPES = {'scale'}
+MAX_BUCKET_LENGTH = 100
+
+
+def bucket_for(question_type, value, numeric_value):
+    """Histogram bucket for an answer, or ``None`` if the type is not bucketed."""
+    if question_type not in BUCKETED_TYPES:
+        return None
+    if question_type in NUMERIC_TYPES and numeric_value is not None:
+        return f'{numeric_value:g}'
+    return value[:MAX_BUCKET_LENGTH]
+
+
+@dataclass
+class _Delta:
+    survey_id: object = None
+    count: int = 0
+    numeric_count: int = 0
+    value_sum: float = 0.0
+    value_sum_sq: float = 0.0
+    buckets: Counter = field(default_factory=Counter)
+
+
+def _bump(model, lookup, defaults, **increments):
+    """``UPDATE ... SET col = col + n`` for ``lookup``, creating the row on first use."""
+    rows = model.objects.filter(**lookup)
+    if rows.update(**{name: F(name) + amount for name, amount in increments.items()}):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults, **increments)
+    except IntegrityError:
+        rows.update(**{name: F(name) + amount for name, amount in increments.items()})
+
+
+def apply(submissions):
+    """
+    Fold ``submissions`` into the rollup tables.
+
+    Called once the ingest transaction has committed; issues one statement
+    per touched question and one per touched bucket regardless of batch size.
+    """
+    deltas = defaultdict(_Delta)
+    for submission in submissions:
+        for question_id, _value, numeric_value, bucket in submission.answers:
+            delta = deltas[question_id]
+            delta.survey_id = submission.survey_id
+            delta.count += 1
+            if numeric_value is not None:
+                delta.numeric_count += 1
+                delta.value_sum += numeric_value
+                delta.value_sum_sq += numeric_value * numeric_value
+            if bucket is not None:
+                delta.buckets[bucket] += 1
+
+    for question_id, delta in deltas.items():
+        _bump(
+            QuestionRollup, {'question_id': question_id}, {'survey_id': delta.survey_id},
+            count=delta.count, numeric_count=delta.numeric_count,
+            value_sum=delta.value_sum, value_sum_sq=delta.value_sum_sq,
+        )
+        for bucket, count in delta.buckets.items():
+            _bump(
+                QuestionRollupBucket, {'question_id': question_id, 'value': bucket},
+                {'survey_id': delta.survey_id}, count=count,
+            )
+
+
+def rebuild(survey):
+    """Recompute the rollups of ``survey`` from its stored answers."""
+    question_types = dict(
+        SurveyQuestion.all_objects.filter(survey=survey).values_list('id', 'question_type')
+    )
+    deltas = defaultdict(_Delta)
+    answers = SurveyAnswer.objects.filter(survey=survey, is_deleted=False).values_list(
+        'question_id', 'value', 'numeric_value',
+    )
+    for question_id, value, numeric_value in answers.iterator(chunk_size=5000):
+        delta = deltas[question_id]
+        delta.count += 1
+        if numeric_value is not None:
+            delta.numeric_count += 1
+            delta.value_sum += numeric_value
+            delta.value_sum_sq += numeric_value * numeric_value
+        bucket = bucket_for(question_types.get(question_id), value, numeric_value)
+        if bucket is not None:
+            delta.buckets[bucket] += 1
+
+    with transaction.atomic():
+        QuestionRollupBucket.objects.filter(survey=survey).delete()
+        QuestionRollup.objects.filter(survey=survey).delete()
+        QuestionRollup.objects.bulk_create([
+            QuestionRollup(
+                survey=survey, question_id=question_id, count=delta.count,
+                numeric_count=delta.numeric_count, value_sum=delta.value_sum,
+                value_sum_sq=delta.value_sum_sq,
+            )
+            for question_id, delta in deltas.items()
+        ])
+        QuestionRollupBucket.objects.bulk_create([
+            QuestionRollupBucket(survey=survey, question_id=question_id, value=bucket, count=count)
+            for question_id, delta in deltas.items()
+            for bucket, count in delta.buckets.items()
+        ])
+    return len(deltas)
+
+
+@dataclass
+class QuestionStats:
+    """Summary of one question, computed from its rollup rows."""
+    question: object
+    count: int = 0
+    mean: float = None
+    stddev: float = None
+    distribution: list = field(default_factory=list)  # [(value, count, percent)]
+    nps: float = None
+
+
+def _sort_key(question_type):
+    if question_type in NUMERIC_TYPES:
+        def key(item):
+            try:
+                return (0, float(item[0]))
+            except ValueError:
+                return (1, item[0])
+        return key
+    return lambda item: (-item[1], item[0])
+
+
+def _nps(buckets):
+    promoters = detractors = total = 0
+    for value, count in buckets.items():
+        try:
+            score = float(value)
+        except ValueError:
+            continue
+        total += count
+        if score >= 9:
+            promoters += count
+        elif score <= 6:
+            detractors += count
+    if not total:
+        return None
+    return round(100.0 * (promoters - detractors) / total, 1)
+
+
+def survey_stats(survey, questions=None):
+    """
+    ``QuestionStats`` for every question of ``survey``, in display order.
+
+    Two queries: one for the rollup rows and one for the buckets.
+    """
+    if questions is None:
+        questions = list(survey.questions.filter(is_deleted=False).order_by('order'))
+    rollups = {r.question_id: r for r in QuestionRollup.objects.filter(survey=survey)}
+    buckets = defaultdict(dict)
+    for question_id, value, count in QuestionRollupBucket.objects.filter(survey=survey).values_list(
+        'question_id', 'value', 'count',
+    ):
+        buckets[question_id][value] = count
+
+    result = []
+    for question in questions:
+        stats = QuestionStats(question=question)
+        rollup = rollups.get(question.id)
+        if rollup is not None:
+            stats.count = rollup.count
+            if rollup.numeric_count:
+                n = rollup.numeric_count
+                stats.mean = rollup.value_sum / n
+                variance = max(rollup.value_sum_sq / n - stats.mean * stats.mean, 0.0)
+                stats.stddev = math.sqrt(variance)
+        question_buckets = buckets.get(question.id, {})
+        total = sum(question_buckets.values())
+        stats.distribution = [
+            (value, count, round(100.0 * count / total, 1) if total else 0.0)
+            for value, count in sorted(question_buckets.items(), key=_sort_key(question.question_type))
+        ]
+        if question.question_type in NPS_TYPES:
+            stats.nps = _nps(question_buckets)
+        result.append(stats)
+    return result
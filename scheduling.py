@@ -0,0 +1,121 @@
+"""
+Survey windows for the Surveys module.
+
+A survey is *open* when it is live, ``is_active`` and today (local date) lies
+between its optional ``start_date`` and ``end_date``. Scheduled surveys keep
+``is_active=True`` and simply join the open set on their start date;
+``close_expired`` deactivates surveys whose ``end_date`` has passed with one
+set-based ``UPDATE``.
+
+Each hub's open set is published to the cache as ``surveys:open:<hub_id>:<date>``.
+Because the key carries the date, a new day starts from a fresh set without
+any invalidation, and the submission path checks eligibility with one cache
+read (``ais_open`` for coroutine views). Survey changes drop the hub's key through ``surveys_changed`` and
+``post_save``. The ``surveys_schedule`` command runs ``close_expired`` and
+``publish`` at day boundaries.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Survey
+
+DEFAULT_CACHE_TTL = 3600
+WINDOW_FIELDS = {'is_active', 'is_deleted', 'start_date', 'end_date'}
+
+
+def _cache_key(hub_id, day):
+    return f'surveys:open:{hub_id}:{day.isoformat()}'
+
+
+def open_filter(day):
+    """``Q`` of the surveys open on ``day``."""
+    return (
+        Q(is_deleted=False, is_active=True)
+        & (Q(start_date__isnull=True) | Q(start_date__lte=day))
+        & (Q(end_date__isnull=True) | Q(end_date__gte=day))
+    )
+
+
+def _ttl():
+    return getattr(settings, 'SURVEYS_OPEN_SET_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+
+def open_surveys(hub_id, day=None):
+    """``frozenset`` of the ids (as strings) of ``hub_id``'s surveys open on ``day``."""
+    day = day or timezone.localdate()
+    key = _cache_key(hub_id, day)
+    surveys = cache.get(key)
+    if surveys is None:
+        surveys = frozenset(
+            str(survey_id)
+            for survey_id in Survey.all_objects.filter(open_filter(day), hub_id=hub_id).values_list('id', flat=True)
+        )
+        cache.set(key, surveys, _ttl())
+    return surveys
+
+
+def is_open(hub_id, survey_id):
+    return str(survey_id) in open_surveys(hub_id)
+
+
+async def aopen_surveys(hub_id, day=None):
+    """``open_surveys`` with async cache and ORM reads."""
+    day = day or timezone.localdate()
+    key = _cache_key(hub_id, day)
+    surveys = await cache.aget(key)
+    if surveys is None:
+        surveys = frozenset([
+            str(survey_id)
+            async for survey_id in Survey.all_objects.filter(open_filter(day), hub_id=hub_id).values_list('id', flat=True)
+        ])
+        await cache.aset(key, surveys, _ttl())
+    return surveys
+
+
+async def ais_open(hub_id, survey_id):
+    return str(survey_id) in await aopen_surveys(hub_id)
+
+
+def invalidate(hub_id):
+    cache.delete(_cache_key(hub_id, timezone.localdate()))
+
+
+def publish(day=None):
+    """
+    Compute and cache the open set of every hub with live surveys.
+
+    One query for all hubs; returns the number of hubs published.
+    """
+    day = day or timezone.localdate()
+    hubs = set(Survey.objects.filter(is_deleted=False).values_list('hub_id', flat=True).distinct())
+    open_ids = defaultdict(set)
+    for hub_id, survey_id in Survey.all_objects.filter(open_filter(day)).values_list('hub_id', 'id'):
+        open_ids[hub_id].add(str(survey_id))
+    cache.set_many({_cache_key(hub_id, day): frozenset(open_ids.get(hub_id, ())) for hub_id in hubs}, _ttl())
+    return len(hubs)
+
+
+def close_expired(day=None):
+    """
+    Deactivate every active survey whose ``end_date`` is before ``day``.
+
+    One ``UPDATE`` for all hubs. Returns ``{hub_id: [survey ids]}`` of the
+    surveys closed; callers announce them with ``surveys_changed``.
+    """
+    day = day or timezone.localdate()
+    expired = Survey.objects.filter(is_deleted=False, is_active=True, end_date__lt=day)
+    with transaction.atomic():
+        rows = list(expired.select_for_update().values_list('hub_id', 'id'))
+        if rows:
+            Survey.all_objects.filter(pk__in=[survey_id for _, survey_id in rows]).update(
+                is_active=False, updated_at=timezone.now(),
+            )
+    closed = defaultdict(list)
+    for hub_id, survey_id in rows:
+        closed[hub_id].append(survey_id)
+    return dict(closed)
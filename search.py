@@ -0,0 +1,188 @@
+"""
+Indexed search for the Surveys module.
+
+Two backends answer the list's ``q`` parameter:
+
+* ``postgres`` — full-text search over GIN expression indexes on the survey
+  title/description and on question text (created by migration 0005).
+* ``tokens`` — a maintained inverted index (``SurveySearchToken``) queried
+  with b-tree prefix range scans; used on SQLite and other backends.
+
+Both match every query term as a prefix, cover ``SurveyQuestion.text`` and
+annotate a ``search_rank`` to order by.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    BooleanField, Count, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from .models import Survey, SurveyQuestion, SurveySearchToken
+
+TITLE_WEIGHT = 4
+QUESTION_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+_PREFIX_END = '\U0010ffff'
+
+
+def tokenize(text):
+    """Lower-cased, accent-stripped words of ``text`` (at least two characters)."""
+    if not text:
+        return []
+    folded = unicodedata.normalize('NFKD', text.lower())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return [
+        word[:MAX_TOKEN_LENGTH] for word in _WORD.findall(folded)
+        if len(word) >= MIN_TOKEN_LENGTH
+    ]
+
+
+def survey_tokens(title, description, question_texts):
+    """``{token: weight}`` for one survey."""
+    weights = defaultdict(int)
+    for token in set(tokenize(title)):
+        weights[token] += TITLE_WEIGHT
+    for token in set(tokenize(description)):
+        weights[token] += DESCRIPTION_WEIGHT
+    for token in set(token for text in question_texts for token in tokenize(text)):
+        weights[token] += QUESTION_WEIGHT
+    return weights
+
+
+def query_terms(query):
+    """Distinct terms of a user query, in order, capped at ``MAX_QUERY_TERMS``."""
+    terms = []
+    for term in tokenize(query):
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_QUERY_TERMS]
+
+
+# ----------------------------------------------------------------------
+# Token index backend
+# ----------------------------------------------------------------------
+
+class TokenIndexBackend:
+    name = 'tokens'
+    maintains_tokens = True
+
+    @staticmethod
+    def _term_q(term):
+        return Q(token__gte=term, token__lt=term + _PREFIX_END)
+
+    def search(self, qs, hub_id, query):
+        terms = query_terms(query)
+        if not terms:
+            return qs.annotate(search_rank=Value(0, output_field=IntegerField()))
+        any_term = Q()
+        for term in terms:
+            any_term |= self._term_q(term)
+        # One count per term: a token can match several overlapping prefixes
+        # ("sat" and "satisfaction"), so it has to count towards each of them.
+        term_counts = {f'term_{i}': Count('pk', filter=self._term_q(term)) for i, term in enumerate(terms)}
+        matches = (
+            SurveySearchToken.objects.filter(any_term, hub_id=hub_id)
+            .values('survey_id')
+            .annotate(**term_counts, rank=Sum('weight'))
+            .filter(**{f'{name}__gt': 0 for name in term_counts})
+        )
+        rank = Subquery(matches.filter(survey_id=OuterRef('pk')).values('rank')[:1])
+        return qs.filter(pk__in=matches.values('survey_id')).annotate(
+            search_rank=Coalesce(rank, Value(0), output_field=IntegerField()),
+        )
+
+
+# ----------------------------------------------------------------------
+# PostgreSQL full-text backend
+# ----------------------------------------------------------------------
+
+# Must stay identical to the index expressions in migration 0014. The text is
+# unaccented like the query terms, which ``tokenize`` folds.
+SURVEY_TSVECTOR = (
+    "to_tsvector('simple'::regconfig, "
+    "surveys_unaccent(coalesce(surveys_survey.title, '') || ' ' || coalesce(surveys_survey.description, '')))"
+)
+QUESTION_TSVECTOR = "to_tsvector('simple'::regconfig, surveys_unaccent(coalesce(q.text, '')))"
+# Weighted like the token backend: title above question text above description.
+RANK_TSVECTOR = (
+    "setweight(to_tsvector('simple'::regconfig, surveys_unaccent(coalesce(surveys_survey.title, ''))), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, surveys_unaccent(coalesce(("
+    "SELECT string_agg(q.text, ' ') FROM surveys_surveyquestion q "
+    "WHERE q.survey_id = surveys_survey.id AND NOT q.is_deleted), ''))), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, surveys_unaccent(coalesce(surveys_survey.description, ''))), 'C')"
+)
+
+
+class PostgresSearchBackend:
+    name = 'postgres'
+    maintains_tokens = False
+
+    def search(self, qs, hub_id, query):
+        terms = query_terms(query)
+        if not terms:
+            return qs.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        matches = RawSQL(
+            f"({SURVEY_TSVECTOR} @@ to_tsquery('simple'::regconfig, %s) OR EXISTS ("
+            f"SELECT 1 FROM surveys_surveyquestion q WHERE q.survey_id = surveys_survey.id "
+            f"AND NOT q.is_deleted AND {QUESTION_TSVECTOR} @@ to_tsquery('simple'::regconfig, %s)))",
+            [tsquery, tsquery], output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({RANK_TSVECTOR}, to_tsquery('simple'::regconfig, %s))",
+            [tsquery], output_field=FloatField(),
+        )
+        return qs.filter(matches).annotate(search_rank=rank)
+
+
+def get_backend():
+    choice = getattr(settings, 'SURVEYS_SEARCH_BACKEND', 'auto')
+    if choice == 'auto':
+        choice = 'postgres' if connection.vendor == 'postgresql' else 'tokens'
+    if choice == 'postgres':
+        return PostgresSearchBackend()
+    return TokenIndexBackend()
+
+
+def search_surveys(qs, hub_id, query):
+    """Filter ``qs`` to surveys matching ``query``, annotated with ``search_rank``."""
+    return get_backend().search(qs, hub_id, query)
+
+
+# ----------------------------------------------------------------------
+# Token maintenance
+# ----------------------------------------------------------------------
+
+def reindex_surveys(survey_ids):
+    """Rebuild the token rows of ``survey_ids`` (no-op for the postgres backend)."""
+    if not get_backend().maintains_tokens:
+        return 0
+    survey_ids = list(survey_ids)
+    if not survey_ids:
+        return 0
+    surveys = Survey.all_objects.filter(pk__in=survey_ids).values_list('id', 'hub_id', 'title', 'description')
+    texts = defaultdict(list)
+    questions = SurveyQuestion.objects.filter(survey_id__in=survey_ids, is_deleted=False)
+    for survey_id, text in questions.values_list('survey_id', 'text'):
+        texts[survey_id].append(text)
+
+    rows = [
+        SurveySearchToken(hub_id=hub_id, survey_id=survey_id, token=token, weight=weight)
+        for survey_id, hub_id, title, description in surveys
+        for token, weight in survey_tokens(title, description, texts[survey_id]).items()
+    ]
+    with transaction.atomic():
+        SurveySearchToken.objects.filter(survey_id__in=survey_ids).delete()
+        SurveySearchToken.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,90 @@
+"""
+Signal receivers for the Surveys module.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import definitions, kpis, scheduling, search
+from .models import Survey, SurveyQuestion
+
+SEARCHABLE_SURVEY_FIELDS = {'title', 'description'}
+
+# Sent by every path that creates, edits, toggles or deletes surveys,
+# including bulk updates that bypass ``post_save``.
+# Arguments: ``hub_id``, ``survey_ids`` (list, may be empty when unknown),
+# ``saved`` (optional: the rows went through ``save()``, whose ``post_save``
+# receivers already bumped their definitions) and ``kpis_recorded``
+# (optional: the sender already adjusted the KPI snapshot).
+surveys_changed = Signal()
+
+
+@receiver(surveys_changed)
+def refresh_kpis(sender, hub_id, kpis_recorded=False, **kwargs):
+    if kpis_recorded:
+        return
+    kpis.refresh_surveys(hub_id)
+
+
+@receiver(surveys_changed)
+def bump_changed_definitions(sender, survey_ids=(), saved=False, **kwargs):
+    if saved:
+        return
+    definitions.bump(survey_ids)
+
+
+@receiver(surveys_changed)
+def invalidate_open_surveys(sender, hub_id, **kwargs):
+    transaction.on_commit(lambda: scheduling.invalidate(hub_id))
+
+
+@receiver(post_save, sender=Survey)
+def invalidate_saved_survey_window(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not scheduling.WINDOW_FIELDS.intersection(update_fields):
+        return
+    hub_id = instance.hub_id
+    # After commit, so a concurrent reader cannot re-cache the old window.
+    transaction.on_commit(lambda: scheduling.invalidate(hub_id))
+
+
+@receiver(post_save, sender=Survey)
+def bump_saved_survey_definition(sender, instance, created=False, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and not definitions.DEFINITION_FIELDS.intersection(update_fields):
+        return
+    definitions.bump([instance.pk])
+    # Keep the in-memory copy in step so a later full save does not roll it back.
+    instance.definition_version += 1
+
+
+@receiver(post_save, sender=SurveyQuestion)
+def bump_question_definition(sender, instance, **kwargs):
+    definitions.bump([instance.survey_id])
+
+
+@receiver(post_delete, sender=SurveyQuestion)
+def bump_deleted_question_definition(sender, instance, **kwargs):
+    definitions.bump([instance.survey_id])
+
+
+@receiver(post_save, sender=Survey)
+def reindex_saved_survey(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHABLE_SURVEY_FIELDS.intersection(update_fields):
+        return
+    search.reindex_surveys([instance.pk])
+
+
+@receiver(post_save, sender=SurveyQuestion)
+def reindex_question_survey(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'text', 'is_deleted'}.intersection(update_fields):
+        return
+    search.reindex_surveys([instance.survey_id])
+
+
+@receiver(post_delete, sender=SurveyQuestion)
+def reindex_after_question_delete(sender, instance, **kwargs):
+    # The survey itself may be going away in the same cascade; only rebuild
+    # its tokens once that is settled.
+    survey_id = instance.survey_id
+    transaction.on_commit(lambda: search.reindex_surveys([survey_id]))
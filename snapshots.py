@@ -0,0 +1,469 @@
+"""
+Columnar response snapshots for the Surveys module.
+
+A snapshot holds every response of one survey as fixed-width columns on disk,
+opened with ``mmap`` so all worker processes reading it share the same page
+cache instead of each holding a copy of the answers::
+
+    <SURVEYS_SNAPSHOT_DIR>/<survey_id>/
+        header.json            schema, definition version, row count
+        g<generation>/
+            responses.uuid     16-byte response ids
+            created.f8         response times (POSIX seconds)
+            <question_id>.f8   rating / scale / yes_no: the numeric value, NaN if skipped
+            <question_id>.i4   multiple_choice: code into the header's labels, -1 if skipped
+            <question_id>.off  text: int64 end offset of each row in ...
+            <question_id>.str  ... the UTF-8 string table (an empty string means skipped)
+
+Columns use the byte order recorded in the header. ``header.json`` is replaced
+atomically and is the only thing readers trust: its ``rows`` says how much of
+each column file is valid, so a torn append is ignored and truncated by the
+next writer. Writers serialise on an ``flock`` per survey.
+
+``open_snapshot`` only reads the header. A survey with
+``SURVEYS_SNAPSHOT_MIN_RESPONSES`` responses but no snapshot of its current
+definition, or one holding fewer responses than the caller's watermark (a lost
+append, another host's directory), gets a rebuild into a new generation
+directory scheduled on a small per-process thread pool, and readers use the
+database until it is written. ``append`` extends the snapshot on the same pool
+after each ingest batch commits. ``surveys_rebuild_snapshots`` rebuilds
+snapshots by hand.
+"""
+import array
+import bisect
+import fcntl
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .models import SurveyAnswer, SurveyResponse
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 1
+DEFAULT_MIN_RESPONSES = 1000
+DEFAULT_WORKERS = 1
+REBUILD_CHUNK_SIZE = 5000
+MISSING_CODE = -1
+
+# Columns holding ``SurveyAnswer.numeric_value``.
+VALUE_TYPES = {'rating', 'scale', 'yes_no'}
+# Columns holding a code into the header's labels.
+CHOICE_TYPES = {'multiple_choice'}
+
+_WIDTHS = {'f8': 8, 'i4': 4, 'text': 8}
+
+
+def snapshot_dir():
+    return getattr(settings, 'SURVEYS_SNAPSHOT_DIR', None) or os.path.join(tempfile.gettempdir(), 'surveys-snapshots')
+
+
+def _survey_dir(survey_id):
+    return os.path.join(snapshot_dir(), str(survey_id))
+
+
+def _generation_dir(survey_id, generation):
+    return os.path.join(_survey_dir(survey_id), f'g{generation}')
+
+
+def column_kind(question_type):
+    if question_type in VALUE_TYPES:
+        return 'f8'
+    if question_type in CHOICE_TYPES:
+        return 'i4'
+    return 'text'
+
+
+def read_header(survey_id):
+    """The current header of ``survey_id``'s snapshot, or ``None``."""
+    try:
+        with open(os.path.join(_survey_dir(survey_id), 'header.json'), encoding='utf-8') as fh:
+            header = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if header.get('format') != FORMAT or header.get('byteorder') != sys.byteorder:
+        return None
+    return header
+
+
+def _write_header(survey_id, header):
+    path = os.path.join(_survey_dir(survey_id), 'header.json')
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as fh:
+        json.dump(header, fh)
+    os.replace(temporary, path)
+
+
+@contextmanager
+def _locked(survey_id):
+    directory = _survey_dir(survey_id)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, '.lock'), 'a') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _extend(path, valid_bytes, data):
+    with open(path, 'ab') as fh:
+        fh.truncate(valid_bytes)
+        fh.write(data)
+
+
+def _append_rows(directory, header, rows):
+    """
+    Append ``rows`` of ``(response_id, created_at, {question_id: (value, numeric_value)})``
+    to the column files in ``directory``, updating ``header`` in place.
+    """
+    count = header['rows']
+    ids = bytearray()
+    created = array.array('d')
+    buffers = {}
+    for column in header['columns']:
+        if column['kind'] == 'f8':
+            buffers[column['id']] = array.array('d')
+        elif column['kind'] == 'i4':
+            buffers[column['id']] = array.array('i')
+        else:
+            buffers[column['id']] = (array.array('q'), bytearray())
+    codes = {
+        question_id: {label: code for code, label in enumerate(labels)}
+        for question_id, labels in header['labels'].items()
+    }
+
+    for response_id, created_at, answers in rows:
+        ids += response_id.bytes
+        created.append(created_at.timestamp())
+        for column in header['columns']:
+            answer = answers.get(column['id'])
+            buffer = buffers[column['id']]
+            if column['kind'] == 'f8':
+                buffer.append(math.nan if answer is None or answer[1] is None else answer[1])
+            elif column['kind'] == 'i4':
+                if answer is None:
+                    buffer.append(MISSING_CODE)
+                    continue
+                labels = codes[column['id']]
+                if answer[0] not in labels:
+                    labels[answer[0]] = len(labels)
+                    header['labels'][column['id']].append(answer[0])
+                buffer.append(labels[answer[0]])
+            else:
+                offsets, strings = buffer
+                if answer is not None:
+                    strings += answer[0].encode('utf-8')
+                offsets.append(column['bytes'] + len(strings))
+
+    _extend(os.path.join(directory, 'responses.uuid'), count * 16, ids)
+    _extend(os.path.join(directory, 'created.f8'), count * 8, created.tobytes())
+    for column in header['columns']:
+        path = os.path.join(directory, column['id'])
+        buffer = buffers[column['id']]
+        if column['kind'] == 'text':
+            offsets, strings = buffer
+            _extend(f'{path}.off', count * 8, offsets.tobytes())
+            _extend(f'{path}.str', column['bytes'], strings)
+            column['bytes'] += len(strings)
+        else:
+            _extend(f"{path}.{column['kind']}", count * _WIDTHS[column['kind']], buffer.tobytes())
+    header['rows'] = count + len(rows)
+
+
+def _with_answers(responses):
+    answers = defaultdict(dict)
+    rows = SurveyAnswer.objects.filter(
+        response_id__in=[response_id for response_id, _ in responses], is_deleted=False,
+    ).values_list('response_id', 'question_id', 'value', 'numeric_value')
+    for response_id, question_id, value, number in rows:
+        answers[response_id][str(question_id)] = (value, number)
+    return [(response_id, created_at, answers.get(response_id, {})) for response_id, created_at in responses]
+
+
+def _database_rows(survey_id):
+    responses = (
+        SurveyResponse.objects.filter(survey_id=survey_id, is_deleted=False)
+        .order_by('created_at', 'id').values_list('id', 'created_at')
+    )
+    chunk = []
+    for row in responses.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) >= REBUILD_CHUNK_SIZE:
+            yield _with_answers(chunk)
+            chunk = []
+    if chunk:
+        yield _with_answers(chunk)
+
+
+def _rebuild(definition, responses=None):
+    previous = read_header(definition.id)
+    generation = previous['generation'] + 1 if previous else 1
+    directory = _generation_dir(definition.id, generation)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    header = {
+        'format': FORMAT,
+        'byteorder': sys.byteorder,
+        'survey_id': str(definition.id),
+        'version': definition.version,
+        'generation': generation,
+        'rows': 0,
+        'rebuilt_rows': 0,
+        # ``[created_at, id hex]`` of the last rebuilt row; rows are rebuilt in that order.
+        'rebuilt_until': None,
+        # The response watermark the rows cover: the rebuild read every response
+        # counted in ``responses``, and each append adds its rows.
+        'watermark': 0,
+        'columns': [
+            {'id': str(question.id), 'type': question.question_type, 'kind': column_kind(question.question_type), 'bytes': 0}
+            for question in definition.questions
+        ],
+        'labels': {str(question.id): [] for question in definition.questions if question.question_type in CHOICE_TYPES},
+    }
+    for rows in _database_rows(definition.id):
+        _append_rows(directory, header, rows)
+        response_id, created_at, _answers = rows[-1]
+        header['rebuilt_until'] = [created_at.timestamp(), response_id.hex]
+    header['rebuilt_rows'] = header['rows']
+    header['watermark'] = max(header['rows'], responses or 0)
+    _write_header(definition.id, header)
+    if previous:
+        # Readers that still map the old generation keep their pages until they close.
+        shutil.rmtree(_generation_dir(definition.id, previous['generation']), ignore_errors=True)
+    return header
+
+
+def rebuild(definition):
+    """Write a fresh snapshot of ``definition``'s survey from the database; returns its header."""
+    with _locked(definition.id):
+        return _rebuild(definition)
+
+
+def _is_current(header, definition, responses=None):
+    """Whether ``header`` is of ``definition``'s version and covers a watermark of ``responses``."""
+    return (
+        header is not None and header['version'] == definition.version
+        and (responses is None or header.get('watermark', header['rows']) >= responses)
+    )
+
+
+def _refresh(definition, responses=None):
+    """Rebuild ``definition``'s snapshot unless another worker already has; returns its header."""
+    with _locked(definition.id):
+        header = read_header(definition.id)
+        if not _is_current(header, definition, responses):
+            header = _rebuild(definition, responses)
+        return header
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_scheduled = set()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix='surveys-snapshots')
+        return _executor
+
+
+def _workers():
+    return getattr(settings, 'SURVEYS_SNAPSHOT_WORKERS', DEFAULT_WORKERS)
+
+
+def _refresh_in_thread(definition, responses):
+    try:
+        _refresh(definition, responses)
+    except Exception:
+        logger.exception('Failed to rebuild the snapshot of survey %s', definition.id)
+    finally:
+        with _executor_lock:
+            _scheduled.discard(definition.id)
+        connections.close_all()
+
+
+def schedule_rebuild(definition, responses=None):
+    """
+    Rebuild ``definition``'s snapshot in the background, once per survey at a
+    time, unless it already covers a watermark of ``responses`` by then.
+    ``SURVEYS_SNAPSHOT_WORKERS = 0`` rebuilds inline instead and returns the
+    new header; otherwise returns ``None``.
+    """
+    if _workers() <= 0:
+        return _refresh(definition, responses)
+    with _executor_lock:
+        if definition.id in _scheduled:
+            return None
+        _scheduled.add(definition.id)
+    _get_executor().submit(_refresh_in_thread, definition, responses)
+    return None
+
+
+def discard(survey_id):
+    """Remove ``survey_id``'s snapshot from disk, e.g. once the survey is purged."""
+    shutil.rmtree(_survey_dir(survey_id), ignore_errors=True)
+
+
+def _rebuilt(survey_id, header, response_id, created_at):
+    """
+    Whether the rows written by the last rebuild include this response.
+
+    A response after the header's ``rebuilt_until`` cannot be among them. One
+    at or before it (its batch committed while the rebuild ran) is looked up
+    by binary search, as the rebuilt rows are in ``(created_at, id)`` order.
+    """
+    until = header.get('rebuilt_until')
+    timestamp = created_at.timestamp()
+    if until is None or (timestamp, response_id.hex) > tuple(until):
+        return False
+    count = header['rebuilt_rows']
+    directory = _generation_dir(survey_id, header['generation'])
+    with open(os.path.join(directory, 'created.f8'), 'rb') as created_fh, \
+            open(os.path.join(directory, 'responses.uuid'), 'rb') as ids_fh, \
+            mmap.mmap(created_fh.fileno(), count * 8, access=mmap.ACCESS_READ) as created_map, \
+            mmap.mmap(ids_fh.fileno(), count * 16, access=mmap.ACCESS_READ) as ids, \
+            memoryview(created_map) as raw, raw.cast('d') as created:
+        position = bisect.bisect_left(created, timestamp)
+        while position < count and created[position] == timestamp:
+            if ids[position * 16:position * 16 + 16] == response_id.bytes:
+                return True
+            position += 1
+    return False
+
+
+def append(rows_by_survey):
+    """
+    Add freshly committed responses to the snapshots that exist.
+
+    ``rows_by_survey`` maps a survey id to rows shaped as for ``_append_rows``.
+    The append runs on the snapshot pool (inline with
+    ``SURVEYS_SNAPSHOT_WORKERS = 0``), so a submitting request never waits for
+    the lock a rebuild holds. Never builds a snapshot; failures are logged, and
+    the rows they lose leave the snapshot behind the watermark, which rebuilds
+    it on the next read.
+    """
+    if _workers() <= 0:
+        _append(rows_by_survey)
+    else:
+        _get_executor().submit(_append_in_thread, rows_by_survey)
+
+
+def _append_in_thread(rows_by_survey):
+    try:
+        _append(rows_by_survey)
+    except Exception:
+        logger.exception('Failed to append responses to snapshots')
+
+
+def _append(rows_by_survey):
+    for survey_id, rows in rows_by_survey.items():
+        if not rows or read_header(survey_id) is None:
+            continue
+        try:
+            with _locked(survey_id):
+                header = read_header(survey_id)
+                # A rebuild that ran after this batch committed already holds it.
+                if header is None or _rebuilt(survey_id, header, rows[0][0], rows[0][1]):
+                    continue
+                _append_rows(_generation_dir(survey_id, header['generation']), header, rows)
+                header['watermark'] = header.get('watermark', header['rows'] - len(rows)) + len(rows)
+                _write_header(survey_id, header)
+        except OSError:
+            logger.exception('Failed to append %d responses to the snapshot of survey %s', len(rows), survey_id)
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of one generation of a survey's snapshot."""
+
+    def __init__(self, survey_id, header):
+        self.header = header
+        self.rows = header['rows']
+        self.version = header['version']
+        self._directory = _generation_dir(survey_id, header['generation'])
+        self._columns = {column['id']: column for column in header['columns']}
+        self._maps = []
+
+    def _map(self, name, length):
+        if not length:
+            return memoryview(b'')
+        with open(os.path.join(self._directory, name), 'rb') as fh:
+            mapped = mmap.mmap(fh.fileno(), length, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)
+
+    def kind(self, question_id):
+        return self._columns[str(question_id)]['kind']
+
+    def labels(self, question_id):
+        return tuple(self.header['labels'].get(str(question_id), ()))
+
+    def response_ids(self):
+        ids = self._map('responses.uuid', self.rows * 16)
+        return [uuid.UUID(bytes=bytes(ids[i:i + 16])) for i in range(0, len(ids), 16)]
+
+    def created(self):
+        return self._map('created.f8', self.rows * 8).cast('d')
+
+    def values(self, question_id):
+        """``float64`` values of a rating, scale or yes_no column."""
+        return self._map(f'{question_id}.f8', self.rows * 8).cast('d')
+
+    def codes(self, question_id):
+        """``int32`` label codes of a multiple_choice column."""
+        return self._map(f'{question_id}.i4', self.rows * 4).cast('i')
+
+    def offsets(self, question_id):
+        """``int64`` end offsets of a text column's rows."""
+        return self._map(f'{question_id}.off', self.rows * 8).cast('q')
+
+    def text(self, question_id):
+        """The answers of a text column, ``''`` where skipped."""
+        offsets = self.offsets(question_id)
+        strings = self._map(f'{question_id}.str', offsets[-1] if self.rows else 0)
+        start, result = 0, []
+        for end in offsets:
+            result.append(bytes(strings[start:end]).decode('utf-8'))
+            start = end
+        return result
+
+    def close(self):
+        """Unmap the columns; views handed out must have been released."""
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+
+def open_snapshot(definition, responses=None):
+    """
+    The ``Snapshot`` of ``definition``'s current version, or ``None``.
+
+    ``responses`` is the survey's response watermark if the caller knows it;
+    a snapshot covering less is behind and not returned. Reads the header
+    only. Without a current snapshot, a rebuild is scheduled when
+    ``responses`` reaches ``SURVEYS_SNAPSHOT_MIN_RESPONSES``; the caller reads
+    the database meanwhile.
+    """
+    header = read_header(definition.id)
+    if not _is_current(header, definition, responses):
+        if responses is None or responses < getattr(settings, 'SURVEYS_SNAPSHOT_MIN_RESPONSES', DEFAULT_MIN_RESPONSES):
+            return None
+        header = schedule_rebuild(definition, responses)
+        if header is None:
+            return None
+    return Snapshot(definition.id, header)
@@ -0,0 +1,128 @@
+"""
+Benchmarks for the surveys module.
+
+Skipped unless ``SURVEYS_BENCH=1`` is set; run with ``pytest -s`` to see the
+figures.
+
+``measure`` collects throughput, p50/p99 latency and peak traced memory for
+a callable; ``record`` writes them to ``SURVEYS_BENCH_OUTPUT`` and compares
+them with ``baseline.json`` (``SURVEYS_BENCH_UPDATE_BASELINE=1`` rewrites the
+baseline from the current run). ``assert_no_regression`` skips a case that
+has no baseline yet.
+"""
+import json
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+BENCH_ENABLED = os.environ.get('SURVEYS_BENCH') == '1'
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+OUTPUT_PATH = Path(os.environ.get('SURVEYS_BENCH_OUTPUT', Path(__file__).with_name('results.json')))
+# A case regresses when its p50 exceeds the baseline by more than this factor.
+TOLERANCE = float(os.environ.get('SURVEYS_BENCH_TOLERANCE', '1.5'))
+
+bench = pytest.mark.skipif(not BENCH_ENABLED, reason='set SURVEYS_BENCH=1 to run benchmarks')
+
+
+@contextmanager
+def timed():
+    """Yield a dict whose ``seconds`` key is filled in on exit."""
+    result = {'seconds': 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+
+def report(name, **figures):
+    """Print one benchmark line."""
+    parts = ', '.join(
+        f'{key}={value:.2f}' if isinstance(value, float) else f'{key}={value}'
+        for key, value in figures.items()
+    )
+    print(f'[bench] {name}: {parts}')
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(fn, iterations=20, warmup=1):
+    """
+    Call ``fn`` ``iterations`` times; returns throughput (calls/s), p50/p99
+    (ms) and the peak traced memory (KiB) of one extra traced call.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'throughput': len(samples) / sum(samples),
+        'p50_ms': statistics.median(samples) * 1000,
+        'p99_ms': _percentile(samples, 0.99) * 1000,
+        'peak_kib': peak / 1024,
+    }
+
+
+_results_lock = threading.Lock()
+
+
+def _load(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def record(name, scale, figures):
+    """
+    Store ``figures`` for case ``name`` at ``scale`` and return the baseline
+    figures for the same case (``None`` when there are none yet).
+    """
+    key = f'{scale}:{name}'
+    with _results_lock:
+        results = _load(OUTPUT_PATH)
+        results[key] = figures
+        OUTPUT_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        baseline = _load(BASELINE_PATH)
+        if os.environ.get('SURVEYS_BENCH_UPDATE_BASELINE') == '1':
+            baseline.setdefault('results', {})[key] = figures
+            BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+    report(name, **figures)
+    return baseline.get('results', {}).get(key)
+
+
+def assert_no_regression(name, scale, figures):
+    """
+    ``record`` the figures and fail if p50 regressed beyond ``TOLERANCE``.
+
+    A case without a baseline is skipped, not passed, so the report shows
+    that nothing was compared; its figures are still in ``OUTPUT_PATH``.
+    """
+    baseline = record(name, scale, figures)
+    if baseline is None:
+        pytest.skip(
+            f'no baseline for {scale}:{name} in {BASELINE_PATH.name}; '
+            'record one with SURVEYS_BENCH_UPDATE_BASELINE=1'
+        )
+    assert figures['p50_ms'] <= baseline['p50_ms'] * TOLERANCE, (
+        f'{name} p50 {figures["p50_ms"]:.1f}ms vs baseline {baseline["p50_ms"]:.1f}ms'
+    )
@@ -0,0 +1,33 @@
+"""Fixtures shared by the surveys benchmarks."""
+import pytest
+from django.contrib.auth.hashers import make_password
+
+from apps.accounts.models import LocalUser
+
+from . import datagen
+
+
+@pytest.fixture(scope='session')
+def dataset(django_db_setup, django_db_blocker):
+    """The seeded synthetic dataset, generated once per session and committed."""
+    with django_db_blocker.unblock():
+        return datagen.generate()
+
+
+@pytest.fixture
+def bench_client(client, dataset, store_config):
+    """Client logged in as an admin of the dataset's first hub."""
+    hub_id = dataset.hub_ids[0]
+    user = LocalUser.objects.create(
+        hub_id=hub_id, name='Bench Admin', email='bench@test.com', role='admin',
+        pin_hash=make_password('1234'), is_active=True,
+    )
+    session = client.session
+    session['local_user_id'] = str(user.id)
+    session['user_name'] = user.name
+    session['user_email'] = user.email
+    session['user_role'] = user.role
+    session['hub_id'] = str(hub_id)
+    session['store_config_checked'] = True
+    session.save()
+    return client
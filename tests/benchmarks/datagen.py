@@ -0,0 +1,124 @@
+"""
+Seeded synthetic data for the surveys benchmarks.
+
+``generate`` builds hubs, surveys, questions and responses through the same
+bulk paths production uses (``importer.import_surveys`` and
+``ingest.write_batch``), so counters, rollups, search tokens and KPI
+snapshots are populated as well. The same ``seed`` always produces the same
+data. ``SCALES`` names the presets selected by ``SURVEYS_BENCH_SCALE``.
+"""
+import os
+import random
+import uuid
+from dataclasses import dataclass, field
+
+from surveys import counters, importer, ingest, kpis
+from surveys.models import Survey, SurveyQuestion
+
+SCALES = {
+    # hubs, surveys per hub, questions per survey, responses per survey
+    'small': (2, 500, 5, 20),
+    'medium': (4, 2500, 8, 50),
+    'large': (8, 5000, 10, 100),
+}
+DEFAULT_SEED = 20261018
+RESPONSE_BATCH = 1000
+
+WORDS = (
+    'checkout delivery staff store menu price quality service cleanliness wait time '
+    'parking website app support returns loyalty kiosk breakfast lunch dinner drinks '
+    'feedback experience satisfaction visit order product recommend friendly fast'
+).split()
+QUESTION_TYPES = ('rating', 'scale', 'yes_no', 'multiple_choice', 'text')
+CHOICES = ('Downtown', 'Airport', 'Mall', 'Online')
+
+
+@dataclass
+class Dataset:
+    seed: int
+    scale: tuple
+    hub_ids: list = field(default_factory=list)
+
+    @property
+    def surveys(self):
+        return len(self.hub_ids) * self.scale[1]
+
+    @property
+    def responses(self):
+        return self.surveys * self.scale[3]
+
+
+def current_scale():
+    return SCALES[os.environ.get('SURVEYS_BENCH_SCALE', 'small')]
+
+
+def _phrase(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _definitions(rng, surveys, questions):
+    for i in range(surveys):
+        yield {
+            'title': f'{_phrase(rng, 3)} {i:05d}',
+            'description': _phrase(rng, rng.randint(0, 12)),
+            'is_active': rng.random() < 0.8,
+            'start_date': f'2026-{rng.randint(1, 12):02d}-01' if rng.random() < 0.5 else None,
+            'questions': [
+                {'text': _phrase(rng, 6) + '?', 'question_type': rng.choice(QUESTION_TYPES), 'is_required': rng.random() < 0.5}
+                for _ in range(questions)
+            ],
+        }
+
+
+def _raw_answer(rng, question_type):
+    if question_type == 'rating':
+        return str(rng.randint(1, 5))
+    if question_type == 'scale':
+        return str(rng.randint(0, 10))
+    if question_type == 'yes_no':
+        return rng.choice(('yes', 'no'))
+    if question_type == 'multiple_choice':
+        return rng.choice(CHOICES)
+    return _phrase(rng, 5)
+
+
+def _submissions(rng, hub_id, responses):
+    questions = {}
+    # Ordered by seeded columns so the answers drawn are the same on every run.
+    rows = (
+        SurveyQuestion.objects.filter(hub_id=hub_id)
+        .order_by('survey__title', 'order')
+        .only('id', 'survey_id', 'question_type', 'is_required')
+    )
+    for question in rows.iterator():
+        questions.setdefault(question.survey_id, []).append(question)
+    for survey_id, survey_questions in questions.items():
+        for _ in range(responses):
+            raw = {str(q.id): _raw_answer(rng, q.question_type) for q in survey_questions}
+            yield ingest.build_submission(survey_id, hub_id, survey_questions, raw, rng.choice(('kiosk', 'qr', 'web')))
+
+
+def generate(scale=None, seed=DEFAULT_SEED):
+    """Populate the database for ``scale`` (a ``SCALES`` tuple) and return a ``Dataset``."""
+    hubs, surveys, questions, responses = scale or current_scale()
+    rng = random.Random(seed)
+    dataset = Dataset(seed=seed, scale=(hubs, surveys, questions, responses))
+    for _ in range(hubs):
+        hub_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        dataset.hub_ids.append(hub_id)
+        importer.import_surveys(hub_id, list(_definitions(rng, surveys, questions)))
+        batch = []
+        for submission in _submissions(rng, hub_id, responses):
+            batch.append(submission)
+            if len(batch) >= RESPONSE_BATCH:
+                ingest.write_batch(batch)
+                batch = []
+        ingest.write_batch(batch)
+        kpis.refresh(hub_id)
+    counters.rollup()
+    return dataset
+
+
+def survey_ids(hub_id):
+    return list(Survey.objects.filter(hub_id=hub_id, is_deleted=False).values_list('id', flat=True))
+
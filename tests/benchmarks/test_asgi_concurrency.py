@@ -0,0 +1,139 @@
+"""
+Requests per worker under ASGI: the sync and coroutine variants of the
+dashboard, surveys list and submit views, driven through Django's ASGI
+handler on one event loop (one worker) at increasing concurrency.
+"""
+import asyncio
+import importlib
+import json
+import os
+import time
+
+import pytest
+from django.conf import settings as django_settings
+from django.contrib.auth.hashers import make_password
+from django.core.asgi import get_asgi_application
+from django.urls import clear_url_caches, reverse
+from django.utils.crypto import get_random_string
+
+from apps.accounts.models import LocalUser
+from apps.configuration.models import StoreConfig
+from surveys import ingest
+from surveys import urls as surveys_urls
+from surveys.models import Survey, SurveyQuestion
+from . import _percentile, assert_no_regression, bench
+
+SCALE = os.environ.get('SURVEYS_BENCH_SCALE', 'small')
+REQUESTS = int(os.environ.get('SURVEYS_BENCH_ASGI_REQUESTS', '200'))
+CONCURRENCY = (1, 8, 32)
+
+
+@pytest.fixture
+def asgi_session(dataset, django_db_blocker):
+    """A committed user, session and open survey; requests run on their own threads and connections."""
+    hub_id = dataset.hub_ids[0]
+    with django_db_blocker.unblock():
+        config = StoreConfig.get_solo()
+        config.is_configured = True
+        config.save()
+        user = LocalUser.objects.create(
+            hub_id=hub_id, name='ASGI Bench', email='asgi-bench@test.com', role='admin',
+            pin_hash=make_password('1234'), is_active=True,
+        )
+        session = importlib.import_module(django_settings.SESSION_ENGINE).SessionStore()
+        session.update({
+            'local_user_id': str(user.id), 'user_name': user.name, 'user_email': user.email,
+            'user_role': user.role, 'hub_id': str(hub_id), 'store_config_checked': True,
+        })
+        session.create()
+        survey = Survey.objects.create(hub_id=hub_id, title='ASGI bench', is_active=True)
+        question = SurveyQuestion.objects.create(
+            hub_id=hub_id, survey=survey, text='Rate us', question_type='rating', is_required=True,
+        )
+    csrf = get_random_string(32)
+    cookie = f'{django_settings.SESSION_COOKIE_NAME}={session.session_key}; {django_settings.CSRF_COOKIE_NAME}={csrf}'
+    yield {'cookie': cookie, 'csrf': csrf, 'survey': survey, 'question': question}
+    with django_db_blocker.unblock():
+        ingest.default_buffer.flush()
+        Survey.all_objects.filter(pk=survey.pk).delete()
+        session.delete()
+        user.delete()
+
+
+def _route(settings, enabled):
+    settings.SURVEYS_ASYNC_VIEWS = enabled
+    importlib.reload(surveys_urls)
+    clear_url_caches()
+
+
+async def _request(app, method, path, headers, body=b''):
+    """Send one request through ``app``; returns ``(status, seconds)``."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+        'method': method, 'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+        'headers': [(name.encode(), value.encode()) for name, value in headers.items()],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client stays connected; the handler cancels this wait when it is done.
+        return await asyncio.get_running_loop().create_future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return status[0], time.perf_counter() - started
+
+
+async def _drive(app, calls, concurrency):
+    """Run ``calls`` with at most ``concurrency`` in flight; returns ``(seconds, latencies)``."""
+    pending = iter(calls)
+    latencies = []
+
+    async def client():
+        for method, path, headers, body in pending:
+            status, seconds = await _request(app, method, path, headers, body)
+            assert status in (200, 202), (method, path, status)
+            latencies.append(seconds)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies
+
+
+def _calls(session, view):
+    headers = {'host': 'testserver', 'cookie': session['cookie']}
+    if view == 'dashboard':
+        return [('GET', reverse('surveys:dashboard'), headers, b'')] * REQUESTS
+    if view == 'list':
+        return [('GET', reverse('surveys:surveys_list'), headers, b'')] * REQUESTS
+    url = reverse('surveys:survey_submit', args=[session['survey'].pk])
+    post_headers = {**headers, 'content-type': 'application/json', 'x-csrftoken': session['csrf']}
+    body = json.dumps({'answers': {str(session['question'].id): '5'}, 'source': 'bench'}).encode()
+    return [('POST', url, post_headers, body)] * REQUESTS
+
+
+@bench
+@pytest.mark.parametrize('concurrency', CONCURRENCY)
+@pytest.mark.parametrize('view', ['dashboard', 'list', 'submit'])
+@pytest.mark.parametrize('variant', ['sync', 'async'])
+def test_requests_per_worker(asgi_session, django_db_blocker, settings, view, variant, concurrency):
+    _route(settings, variant == 'async')
+    try:
+        app = get_asgi_application()
+        with django_db_blocker.unblock():
+            seconds, latencies = asyncio.run(_drive(app, _calls(asgi_session, view), concurrency))
+    finally:
+        _route(settings, False)
+    assert_no_regression(f'asgi {view} {variant} concurrency={concurrency}', SCALE, {
+        'throughput': len(latencies) / seconds,
+        'p50_ms': _percentile(latencies, 0.5) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+    })
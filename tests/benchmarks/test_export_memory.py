@@ -0,0 +1,46 @@
+"""Streaming export peak memory as the number of surveys grows."""
+import tracemalloc
+
+import pytest
+
+from surveys import exports
+from surveys.models import Survey
+
+from . import bench, report, timed
+
+SIZES = (1000, 5000, 20000)
+FIELDS = ['title', 'is_active', 'response_count', 'description', 'start_date', 'end_date']
+HEADERS = ['Title', 'Is Active', 'Response Count', 'Description', 'Start Date', 'End Date']
+
+
+def _peak(encoder, qs):
+    tracemalloc.start()
+    try:
+        size = 0
+        for chunk in encoder(exports.iter_rows(qs, FIELDS), HEADERS):
+            size += len(chunk)
+        return tracemalloc.get_traced_memory()[1], size
+    finally:
+        tracemalloc.stop()
+
+
+@bench
+@pytest.mark.django_db
+@pytest.mark.parametrize('encoder', [exports.iter_csv, exports.iter_xlsx], ids=['csv', 'xlsx'])
+def test_export_peak_memory_is_flat(hub_id, encoder):
+    peaks = []
+    created = 0
+    for size in SIZES:
+        Survey.objects.bulk_create([
+            Survey(hub_id=hub_id, title=f'Survey {i}', description='Lorem ipsum ' * 20)
+            for i in range(created, size)
+        ], batch_size=1000)
+        created = size
+        qs = Survey.objects.filter(hub_id=hub_id, is_deleted=False).order_by('title')
+        with timed() as t:
+            peak, size_bytes = _peak(encoder, qs)
+        peaks.append(peak)
+        report(f'export {encoder.__name__}', rows=size, peak_kib=peak / 1024, bytes=size_bytes,
+               rows_per_sec=size / t['seconds'])
+    # 20x the rows must not mean anywhere near 20x the memory.
+    assert peaks[-1] < peaks[0] * 2
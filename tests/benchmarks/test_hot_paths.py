@@ -0,0 +1,117 @@
+"""
+Hot-path benchmarks over the seeded dataset: the surveys list, exports,
+dashboard, bulk actions and AI tools. Figures are recorded per scale and
+compared with ``baseline.json``.
+"""
+import os
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from surveys import bulkjobs
+from surveys.views import SURVEY_SORT_FIELDS
+from . import assert_no_regression, bench, measure
+from .datagen import survey_ids
+
+SCALE = os.environ.get('SURVEYS_BENCH_SCALE', 'small')
+ITERATIONS = int(os.environ.get('SURVEYS_BENCH_ITERATIONS', '20'))
+
+pytestmark = [bench, pytest.mark.django_db]
+
+
+def _get(client, url, **params):
+    def call():
+        response = client.get(url, params)
+        assert response.status_code == 200
+        if response.streaming:
+            for _chunk in response.streaming_content:
+                pass
+    return call
+
+
+@pytest.mark.parametrize('field', sorted(SURVEY_SORT_FIELDS))
+@pytest.mark.parametrize('direction', ['asc', 'desc'])
+def test_list_sort(bench_client, field, direction):
+    call = _get(bench_client, reverse('surveys:surveys_list'), sort=field, dir=direction, per_page=48)
+    assert_no_regression(f'list sort={field} dir={direction}', SCALE, measure(call, ITERATIONS))
+
+
+@pytest.mark.parametrize('query', ['feedback', 'checkout staff', 'zzz'])
+def test_list_search(bench_client, query):
+    call = _get(bench_client, reverse('surveys:surveys_list'), q=query, per_page=48)
+    assert_no_regression(f'list search={query}', SCALE, measure(call, ITERATIONS))
+
+
+@pytest.mark.parametrize('paginate', ['', 'cursor'])
+def test_list_deep_page(bench_client, dataset, paginate):
+    url = reverse('surveys:surveys_list')
+    if paginate:
+        # Walk to the last page once, then time fetching it.
+        cursor = ''
+        while True:
+            page = bench_client.get(url, {'paginate': 'cursor', 'cursor': cursor, 'per_page': 48}).context['page_obj']
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        call = _get(bench_client, url, paginate='cursor', cursor=cursor, per_page=48)
+    else:
+        call = _get(bench_client, url, page=dataset.scale[1] // 48 + 1, per_page=48)
+    assert_no_regression(f'list deep page paginate={paginate or "offset"}', SCALE, measure(call, ITERATIONS))
+
+
+def test_list_all_rows(bench_client):
+    call = _get(bench_client, reverse('surveys:surveys_list'), per_page=0)
+    assert_no_regression('list per_page=0', SCALE, measure(call, max(ITERATIONS // 4, 3)))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'excel'])
+def test_export(bench_client, fmt):
+    call = _get(bench_client, reverse('surveys:surveys_list'), export=fmt)
+    assert_no_regression(f'export {fmt}', SCALE, measure(call, max(ITERATIONS // 4, 3)))
+
+
+@pytest.mark.parametrize('warm', [False, True], ids=['cold', 'warm'])
+def test_dashboard(bench_client, warm):
+    url = reverse('surveys:dashboard')
+    get = _get(bench_client, url)
+
+    def call():
+        if not warm:
+            cache.clear()
+        get()
+    assert_no_regression(f'dashboard {"warm" if warm else "cold"}', SCALE, measure(call, ITERATIONS))
+
+
+def test_bulk_action_ids(bench_client, dataset):
+    ids = ','.join(str(pk) for pk in survey_ids(dataset.hub_ids[0])[:100])
+    url = reverse('surveys:surveys_bulk_action')
+    actions = iter(['deactivate', 'activate'] * (ITERATIONS + 2))
+
+    def call():
+        assert bench_client.post(url, {'ids': ids, 'action': next(actions)}).status_code == 200
+    assert_no_regression('bulk ids=100', SCALE, measure(call, ITERATIONS))
+
+
+def test_bulk_job_matching(dataset, settings, django_capture_on_commit_callbacks):
+    settings.SURVEYS_BULK_WORKERS = 0
+    hub_id = dataset.hub_ids[0]
+    actions = iter(['deactivate', 'activate'] * 4)
+
+    def call():
+        with django_capture_on_commit_callbacks(execute=True):
+            bulkjobs.start(hub_id, next(actions), 'feedback')
+    assert_no_regression('bulk job search=feedback', SCALE, measure(call, iterations=3))
+
+
+@pytest.mark.parametrize('args', [
+    {}, {'search': 'feedback'}, {'sort': 'response_count', 'descending': True}, {'aggregate': True},
+], ids=['page', 'search', 'sorted', 'aggregate'])
+def test_ai_list_surveys(dataset, args):
+    pytest.importorskip('assistant.tools')
+    from surveys.ai_tools import ListSurveys
+    request = SimpleNamespace(session={'hub_id': str(dataset.hub_ids[0])})
+    tool = ListSurveys()
+    name = 'ai list_surveys ' + (','.join(f'{k}={v}' for k, v in args.items()) or 'page')
+    assert_no_regression(name, SCALE, measure(lambda: tool.execute(args, request), ITERATIONS))
@@ -0,0 +1,35 @@
+"""Bulk import throughput: per-row creates vs chunked bulk_create."""
+import pytest
+
+from surveys import importer
+from surveys.models import Survey, SurveyQuestion
+from . import bench, report, timed
+
+SURVEYS = 500
+QUESTIONS = 10
+
+
+@bench
+@pytest.mark.django_db
+def test_import_throughput(hub_id):
+    definitions = [
+        {'title': f'Imported {i}', 'questions': [f'Question {j}' for j in range(QUESTIONS)]}
+        for i in range(SURVEYS)
+    ]
+
+    with timed() as per_row:
+        for definition in importer.clean(definitions):
+            survey = Survey.objects.create(
+                hub_id=hub_id, title=definition['title'], description=definition['description'],
+            )
+            for order, question in enumerate(definition['questions']):
+                SurveyQuestion.objects.create(hub_id=hub_id, survey=survey, order=order, **question)
+
+    with timed() as bulk:
+        importer.import_surveys(hub_id, definitions)
+
+    report('import', surveys=SURVEYS, questions=SURVEYS * QUESTIONS,
+           per_row_seconds=per_row['seconds'], bulk_seconds=bulk['seconds'],
+           speedup=per_row['seconds'] / bulk['seconds'])
+    assert Survey.objects.filter(hub_id=hub_id).count() == 2 * SURVEYS
+    assert bulk['seconds'] < per_row['seconds']
@@ -0,0 +1,36 @@
+"""Response ingestion throughput: one row per transaction vs batched."""
+import pytest
+
+from surveys import ingest
+from surveys.models import SurveyResponse
+from . import bench, report, timed
+
+N = 2000
+
+
+def _submission(survey, questions):
+    raw = {str(questions[0].id): '5', str(questions[1].id): 'no', str(questions[3].id): 'Great service'}
+    return ingest.build_submission(survey.pk, survey.hub_id, questions, raw, 'bench')
+
+
+@bench
+@pytest.mark.django_db
+def test_ingest_throughput(survey, survey_questions):
+    submission = _submission(survey, survey_questions)
+
+    with timed() as single:
+        for _ in range(N):
+            ingest.write_batch([submission])
+
+    buffer = ingest.ResponseBuffer(batch_size=500, max_delay=60)
+    with timed() as batched:
+        for _ in range(N):
+            buffer.add(submission)
+        buffer.flush()
+
+    single_rate = N / single['seconds']
+    batched_rate = N / batched['seconds']
+    report('ingest', responses=N, single_per_sec=single_rate, batched_per_sec=batched_rate,
+           speedup=batched_rate / single_rate)
+    assert SurveyResponse.objects.filter(survey=survey).count() == 2 * N
+    assert batched_rate > single_rate
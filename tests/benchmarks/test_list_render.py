@@ -0,0 +1,42 @@
+"""Datatable render time for 12/48/96-row pages, cold vs warm row cache."""
+import pytest
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from surveys.models import Survey
+from surveys.views import _row_context
+from . import bench, report, timed
+
+ROUNDS = 20
+
+
+@bench
+@pytest.mark.django_db
+@pytest.mark.parametrize('per_page', [12, 48, 96])
+def test_list_render(hub_id, per_page):
+    Survey.objects.bulk_create([
+        Survey(hub_id=hub_id, title=f'Survey {i:03d}', description='Benchmark survey ' * 4)
+        for i in range(per_page)
+    ])
+    page = Paginator(Survey.objects.filter(hub_id=hub_id).order_by('title'), per_page).get_page(1)
+    rows = list(page)
+    request = RequestFactory().get('/')
+
+    def render():
+        context = {'surveys': page, 'page_obj': page, 'per_page': per_page, **_row_context()}
+        return render_to_string('surveys/partials/surveys_list.html', context, request=request)
+
+    with timed() as cold:
+        for _ in range(ROUNDS):
+            cache.clear()
+            render()
+    render()
+    with timed() as warm:
+        for _ in range(ROUNDS):
+            render()
+
+    report('list_render', rows=len(rows), cold_ms=cold['seconds'] * 1000 / ROUNDS,
+           warm_ms=warm['seconds'] * 1000 / ROUNDS, speedup=cold['seconds'] / warm['seconds'])
+    assert warm['seconds'] < cold['seconds']
@@ -0,0 +1,51 @@
+"""Ingest throughput under duplicate-heavy retry storms vs unique submissions."""
+import pytest
+
+from surveys import idempotency, ingest
+from surveys.models import SurveyResponse
+from . import bench, report, timed
+
+UNIQUE = 2000
+RETRIES = 4  # every submission arrives this many times in the storm
+
+
+def _run(survey, questions, keys, forget_every=None):
+    """Admit and buffer one submission per key; ``forget_every`` simulates retries landing on other workers."""
+    raw = {str(questions[0].id): '5', str(questions[1].id): 'no'}
+    buffer = ingest.ResponseBuffer(batch_size=500, max_delay=60)
+    for i, key in enumerate(keys):
+        if forget_every and i % forget_every == 0:
+            idempotency.recent_keys.clear()
+        submission = ingest.build_submission(survey.pk, survey.hub_id, questions, raw, 'bench', key)
+        if ingest.admit(submission):
+            buffer.add(submission)
+    buffer.flush()
+
+
+@bench
+@pytest.mark.django_db
+def test_retry_storm_throughput(survey, survey_questions):
+    idempotency.recent_keys.clear()
+    with timed() as unique:
+        _run(survey, survey_questions, [f'unique-{i}' for i in range(UNIQUE)])
+
+    storm_keys = [f'storm-{i // RETRIES}' for i in range(UNIQUE * RETRIES)]
+    with timed() as storm:
+        _run(survey, survey_questions, storm_keys)
+
+    # Retries spread over workers: the LRU misses and the constraint catches them.
+    spread_keys = [f'spread-{i % UNIQUE}' for i in range(UNIQUE * RETRIES)]
+    with timed() as spread:
+        _run(survey, survey_questions, spread_keys, forget_every=UNIQUE)
+
+    unique_rate = UNIQUE / unique['seconds']
+    storm_rate = UNIQUE / storm['seconds']
+    spread_rate = UNIQUE / spread['seconds']
+    report('retry_storm', unique_responses=UNIQUE, retries=RETRIES, unique_per_sec=unique_rate,
+           storm_stored_per_sec=storm_rate, spread_stored_per_sec=spread_rate,
+           storm_submissions_per_sec=storm_rate * RETRIES)
+    idempotency.recent_keys.clear()
+
+    assert SurveyResponse.objects.filter(survey=survey).count() == 3 * UNIQUE
+    # Dropping retries in memory must not slow down storing the originals.
+    assert storm_rate > 0.8 * unique_rate
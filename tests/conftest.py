@@ -7,9 +7,24 @@ from django.contrib.auth.hashers import make_password
 
 from apps.accounts.models import LocalUser
 from apps.configuration.models import HubConfig, StoreConfig
+from surveys import ingest
 from surveys.models import Survey, SurveyQuestion
 
 
+def ingest_answers(survey, questions, answers, capture=None):
+    """
+    Write ``answers`` (``{question_id: raw value}`` dicts) to ``survey`` as one
+    ingest batch. Pass ``django_capture_on_commit_callbacks`` as ``capture`` to
+    run the batch's on-commit hooks too.
+    """
+    batch = [ingest.build_submission(survey.pk, survey.hub_id, questions, raw) for raw in answers]
+    if capture is None:
+        ingest.write_batch(batch)
+        return
+    with capture(execute=True):
+        ingest.write_batch(batch)
+
+
 @pytest.fixture
 def hub_id():
     """Test hub_id."""
@@ -78,3 +93,16 @@ def survey(db, hub_id):
         response_count=5,
     )
 
+
+@pytest.fixture
+def survey_questions(db, hub_id, survey):
+    """One question of each answer type on the test Survey."""
+    return [
+        SurveyQuestion.objects.create(hub_id=hub_id, survey=survey, text=text, question_type=qtype, is_required=required, order=i)
+        for i, (text, qtype, required) in enumerate([
+            ('How would you rate us?', 'rating', True),
+            ('Would you come back?', 'yes_no', True),
+            ('Which store?', 'multiple_choice', False),
+            ('Anything else?', 'text', False),
+        ])
+    ]
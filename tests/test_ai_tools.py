@@ -0,0 +1,87 @@
+"""Tests for surveys assistant tools."""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from surveys.models import Survey
+
+
+@pytest.fixture(autouse=True)
+def assistant_tools():
+    pytest.importorskip('assistant.tools')
+
+
+def _request(hub_id):
+    return SimpleNamespace(session={'hub_id': str(hub_id)})
+
+
+@pytest.mark.django_db
+class TestListSurveys:
+    """``list_surveys`` tool tests."""
+
+    @pytest.fixture
+    def tool(self):
+        from surveys.ai_tools import ListSurveys
+        return ListSurveys()
+
+    @pytest.mark.parametrize('limit', ['ten', [5], {'n': 5}])
+    def test_bad_limit_uses_default(self, tool, survey, limit):
+        result = tool.execute({'limit': limit}, _request(survey.hub_id))
+        assert [row['id'] for row in result['surveys']] == [str(survey.pk)]
+
+    def test_limit_is_clamped(self, tool, hub_id):
+        from surveys.ai_tools import LIST_MAX_LIMIT
+        Survey.objects.bulk_create([Survey(hub_id=hub_id, title=f'S{i:03}') for i in range(LIST_MAX_LIMIT + 1)])
+        result = tool.execute({'limit': '500'}, _request(hub_id))
+        assert len(result['surveys']) == LIST_MAX_LIMIT
+        assert result['next_cursor']
+
+
+@pytest.mark.django_db
+class TestUpdateSurvey:
+    """``update_survey`` tool tests."""
+
+    @pytest.fixture
+    def tool(self):
+        from surveys.ai_tools import UpdateSurvey
+        return UpdateSurvey()
+
+    def test_updates(self, tool, survey):
+        result = tool.execute({'survey_id': str(survey.pk), 'title': 'Renamed'}, _request(survey.hub_id))
+        assert result['updated']
+        survey.refresh_from_db()
+        assert survey.title == 'Renamed'
+
+    def test_other_hub_is_not_found(self, tool, survey):
+        result = tool.execute({'survey_id': str(survey.pk), 'title': 'Renamed'}, _request(uuid.uuid4()))
+        assert result == {'error': 'Survey not found'}
+        survey.refresh_from_db()
+        assert survey.title != 'Renamed'
+
+    def test_deleted_survey_is_not_found(self, tool, survey):
+        Survey.objects.filter(pk=survey.pk).update(is_deleted=True)
+        result = tool.execute({'survey_id': str(survey.pk), 'title': 'Renamed'}, _request(survey.hub_id))
+        assert result == {'error': 'Survey not found'}
+
+
+@pytest.mark.django_db
+class TestDeleteSurvey:
+    """``delete_survey`` tool tests."""
+
+    @pytest.fixture
+    def tool(self):
+        from surveys.ai_tools import DeleteSurvey
+        return DeleteSurvey()
+
+    def test_deletes(self, tool, survey):
+        assert tool.execute({'survey_id': str(survey.pk)}, _request(survey.hub_id)) == {'deleted': True}
+        assert not Survey.objects.filter(pk=survey.pk, is_deleted=False).exists()
+
+    def test_other_hub_is_not_found(self, tool, survey):
+        result = tool.execute({'survey_id': str(survey.pk)}, _request(uuid.uuid4()))
+        assert result == {'error': 'Survey not found'}
+        assert Survey.objects.filter(pk=survey.pk, is_deleted=False).exists()
+
+    def test_malformed_id(self, tool, survey):
+        assert tool.execute({'survey_id': 'not-a-uuid'}, _request(survey.hub_id)) == {'error': 'Survey not found'}
@@ -0,0 +1,129 @@
+"""Tests for surveys vectorised response analytics."""
+import pytest
+from django.core.cache import cache
+
+from surveys import analytics, definitions, snapshots
+from .conftest import ingest_answers
+
+pytest.importorskip('numpy')
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    cache.clear()
+    analytics._matrices.clear()
+    definitions._lru.clear()
+    yield
+    analytics._matrices.clear()
+    definitions._lru.clear()
+
+
+@pytest.fixture
+def answered(survey, survey_questions):
+    rating, yes_no, choice, text = survey_questions
+    ingest_answers(survey, survey_questions, [
+        {str(rating.id): '5', str(yes_no.id): 'yes', str(choice.id): 'Centre', str(text.id): 'Great'},
+        {str(rating.id): '4', str(yes_no.id): 'yes', str(choice.id): 'Airport'},
+        {str(rating.id): '2', str(yes_no.id): 'no', str(choice.id): 'Centre'},
+        {str(rating.id): '1', str(yes_no.id): 'no'},
+    ])
+    return survey_questions
+
+
+@pytest.mark.django_db
+class TestAnalytics:
+    """Response matrix, filter, stats and cross-tab tests."""
+
+    def test_load_codes_columns(self, survey, answered):
+        rating, yes_no, choice, text = answered
+        matrix = analytics.load(definitions.get_definition(survey.pk))
+        assert matrix.size == 4
+        assert sorted(matrix.column(rating.id).values.tolist()) == [1.0, 2.0, 4.0, 5.0]
+        assert sorted(matrix.column(yes_no.id).values.tolist()) == [0.0, 0.0, 1.0, 1.0]
+        assert set(matrix.column(choice.id).labels) == {'Centre', 'Airport'}
+        assert int((matrix.column(text.id).values == 1.0).sum()) == 1
+
+    def test_stats(self, survey, answered):
+        rating, yes_no, choice, text = answered
+        stats = {s.question.id: s for s in analytics.analyse(survey.pk).questions}
+        assert stats[rating.id].mean == pytest.approx(3.0)
+        assert stats[rating.id].median == pytest.approx(3.0)
+        assert dict(stats[rating.id].percentiles)[25] == pytest.approx(1.75)
+        assert stats[rating.id].distribution[0] == ('1', 1, 25.0)
+        assert stats[yes_no.id].mean == pytest.approx(0.5)
+        assert stats[choice.id].distribution[0] == ('Centre', 2, 66.7)
+        assert stats[text.id].count == 1 and stats[text.id].distribution == []
+
+    def test_nps(self, survey, survey_questions):
+        nps = survey.questions.create(hub_id=survey.hub_id, text='Recommend?', question_type='scale', is_required=False)
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions + [nps], [
+            {str(rating.id): '5', str(yes_no.id): 'yes', str(nps.id): v} for v in ('10', '9', '7', '3')
+        ])
+        stats = {s.question.id: s for s in analytics.analyse(survey.pk).questions}
+        assert stats[nps.id].nps == 25.0
+        assert stats[rating.id].nps is None
+
+    def test_filters(self, survey, answered):
+        rating, yes_no, choice, _text = answered
+        analysis = analytics.analyse(survey.pk, [analytics.Filter.parse(f'{rating.id}:gte:4')])
+        assert analysis.matched == 2
+        stats = {s.question.id: s for s in analysis.questions}
+        assert stats[yes_no.id].distribution == [('yes', 2, 100.0)]
+
+        analysis = analytics.analyse(survey.pk, [
+            analytics.Filter(str(choice.id), 'eq', 'Centre'),
+            analytics.Filter(str(yes_no.id), 'eq', 'no'),
+        ])
+        assert analysis.matched == 1
+        assert analytics.analyse(survey.pk, [analytics.Filter(str(choice.id), 'eq', 'Mall')]).matched == 0
+        # Unanswered rows never pass, not even a "not equal" filter.
+        assert analytics.analyse(survey.pk, [analytics.Filter(str(choice.id), 'ne', 'Mall')]).matched == 3
+
+    def test_invalid_filters(self, survey, answered):
+        rating, _yes_no, choice, text = answered
+        with pytest.raises(analytics.AnalyticsError):
+            analytics.Filter.parse(f'{rating.id}:between:4')
+        for item in (
+            analytics.Filter(str(rating.id), 'gte', 'lots'),
+            analytics.Filter(str(choice.id), 'gt', 'Centre'),
+            analytics.Filter(str(text.id), 'eq', 'Great'),
+            analytics.Filter('missing', 'eq', '1'),
+        ):
+            with pytest.raises(analytics.AnalyticsError):
+                analytics.analyse(survey.pk, [item])
+
+    def test_cross_tab(self, survey, answered):
+        _rating, yes_no, choice, _text = answered
+        crosstab = analytics.analyse(survey.pk, crosstab=(str(choice.id), str(yes_no.id))).crosstab
+        table = {label: dict(zip(crosstab.column_labels, counts)) for label, counts, _total in crosstab.rows()}
+        assert table == {'Centre': {'no': 1, 'yes': 1}, 'Airport': {'no': 0, 'yes': 1}}
+        assert crosstab.total == 3
+        assert crosstab.column_totals == [1, 2]
+
+    def test_cached_per_watermark(self, survey, answered, django_assert_num_queries):
+        rating = answered[0]
+        first = analytics.analyse(survey.pk)
+        # Warm: the definition comes from the LRU and only the watermark is read.
+        with django_assert_num_queries(2):
+            assert analytics.analyse(survey.pk) == first
+        ingest_answers(survey, answered, [{str(rating.id): '3', str(answered[1].id): 'yes'}])
+        second = analytics.analyse(survey.pk)
+        assert second.watermark == first.watermark + 1
+        assert second.responses == 5
+
+    def test_snapshot_matches_database(self, settings, tmp_path, survey, answered):
+        definition = definitions.get_definition(survey.pk)
+        from_database = [analytics.analyse_column(column, slice(None)) for column in analytics.load(definition).columns.values()]
+        settings.SURVEYS_SNAPSHOT_DIR = str(tmp_path)
+        settings.SURVEYS_SNAPSHOT_MIN_RESPONSES = 0
+        settings.SURVEYS_SNAPSHOT_WORKERS = 0
+        matrix = analytics.load(definition, watermark=4)
+        assert snapshots.read_header(survey.pk)['rows'] == matrix.size == 4
+        assert [analytics.analyse_column(column, slice(None)) for column in matrix.columns.values()] == from_database
+
+    def test_question_edit_moves_to_new_version(self, survey, answered):
+        analytics.analyse(survey.pk)
+        answered[3].delete()
+        analysis = analytics.analyse(survey.pk)
+        assert answered[3].id not in {s.question.id for s in analysis.questions}
@@ -0,0 +1,87 @@
+"""Tests for surveys archival of soft-deleted rows."""
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from surveys import archive
+from surveys.models import (
+    ArchivedSurvey, ArchivedSurveyAnswer, ArchivedSurveyQuestion, ArchivedSurveyResponse,
+    QuestionRollup, Survey, SurveyAnswer, SurveyQuestion, SurveyResponse,
+)
+from .conftest import ingest_answers
+
+LONG_AGO = timezone.now() - datetime.timedelta(days=365)
+
+
+def _delete(model, pk, when=LONG_AGO):
+    model.all_objects.filter(pk=pk).update(is_deleted=True, deleted_at=when)
+
+
+@pytest.fixture
+def answered(survey, survey_questions):
+    rating, yes_no = survey_questions[:2]
+    ingest_answers(survey, survey_questions, [{str(rating.id): str(v), str(yes_no.id): 'yes'} for v in (1, 2, 3)])
+    return survey_questions
+
+
+@pytest.mark.django_db
+class TestArchive:
+    """Plan, purge and resume tests."""
+
+    def test_plan_is_dry_run(self, survey, answered):
+        _delete(Survey, survey.pk)
+        report = archive.plan()
+        assert report.dry_run
+        assert report.rows == {
+            'surveys_surveyanswer': 6, 'surveys_surveyresponse': 3,
+            'surveys_surveyquestion': 4, 'surveys_survey': 1,
+        }
+        assert Survey.all_objects.filter(pk=survey.pk).exists()
+        assert not ArchivedSurvey.objects.exists()
+
+    def test_purge_survey_cascades(self, survey, answered):
+        _delete(Survey, survey.pk)
+        report = archive.purge(chunk_size=2, pause=0)
+        assert report.total_rows == 14
+        assert report.chunks == 6  # 3 answer chunks, 2 response chunks and the survey itself
+        assert not Survey.all_objects.filter(pk=survey.pk).exists()
+        assert not SurveyAnswer.all_objects.filter(survey_id=survey.pk).exists()
+        archived = ArchivedSurvey.objects.get(pk=survey.pk)
+        assert (archived.title, archived.hub_id) == (survey.title, survey.hub_id)
+        assert ArchivedSurveyQuestion.objects.filter(survey_id=survey.pk).count() == 4
+        assert ArchivedSurveyResponse.objects.filter(survey_id=survey.pk).count() == 3
+        assert sorted(ArchivedSurveyAnswer.objects.filter(question_id=answered[0].id).values_list('value', flat=True)) == ['1', '2', '3']
+
+    def test_purge_question_only(self, survey, answered):
+        rating = answered[0]
+        _delete(SurveyQuestion, rating.pk)
+        archive.purge(pause=0)
+        assert Survey.objects.filter(pk=survey.pk).exists()
+        assert SurveyResponse.objects.filter(survey=survey).count() == 3
+        assert not SurveyQuestion.all_objects.filter(pk=rating.pk).exists()
+        assert not QuestionRollup.objects.filter(question_id=rating.pk).exists()
+        assert ArchivedSurveyAnswer.objects.filter(question_id=rating.pk).count() == 3
+
+    def test_within_retention_is_kept(self, survey, answered):
+        _delete(Survey, survey.pk, when=timezone.now())
+        assert archive.purge(pause=0).total_rows == 0
+        assert Survey.all_objects.filter(pk=survey.pk).exists()
+
+    def test_resumes_after_interruption(self, survey, answered):
+        _delete(Survey, survey.pk)
+        # An earlier run moved one chunk of answers and stopped.
+        first = list(SurveyAnswer.all_objects.filter(survey_id=survey.pk).order_by('pk').values_list('pk', flat=True)[:2])
+        archive._move(SurveyAnswer, first)
+        assert SurveyAnswer.all_objects.filter(survey_id=survey.pk).count() == 4
+        archive.purge(pause=0)
+        assert not Survey.all_objects.filter(pk=survey.pk).exists()
+        assert ArchivedSurveyAnswer.objects.filter(survey_id=survey.pk).count() == 6
+
+    def test_command_dry_run(self, survey, answered, capsys):
+        _delete(Survey, survey.pk)
+        call_command('surveys_purge_deleted', '--dry-run')
+        assert 'Would archive 14 row(s)' in capsys.readouterr().out
+        call_command('surveys_purge_deleted', '--pause', '0')
+        assert ArchivedSurvey.objects.filter(pk=survey.pk).exists()
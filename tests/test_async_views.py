@@ -0,0 +1,195 @@
+"""Tests for the coroutine variants of the dashboard, list and submit views."""
+import importlib
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import clear_url_caches, reverse
+
+from surveys import asyncviews, definitions, exports, kpis, metrics, scheduling
+from surveys import urls as surveys_urls
+from surveys.models import Survey, SurveyResponse
+
+
+def _route(settings, enabled):
+    if enabled:
+        settings.SURVEYS_ASYNC_VIEWS = True
+    elif hasattr(settings, 'SURVEYS_ASYNC_VIEWS'):
+        del settings.SURVEYS_ASYNC_VIEWS
+    importlib.reload(surveys_urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_routes(settings):
+    _route(settings, True)
+    yield
+    _route(settings, False)
+
+
+@pytest.fixture
+def aclient(async_client, auth_client):
+    """Async client sharing the authenticated session of ``auth_client``."""
+    async_client.cookies = auth_client.cookies
+    return async_client
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    cache.clear()
+    metrics.reset()
+    yield
+    cache.clear()
+    metrics.reset()
+
+
+class TestAsyncView:
+    """Adapter tests with stand-in decorators."""
+
+    @staticmethod
+    def _deny(view):
+        def wrapper(request, *args, **kwargs):
+            if request.GET.get('deny'):
+                return HttpResponse('denied', status=403)
+            return view(request, *args, **kwargs)
+        return wrapper
+
+    @staticmethod
+    def _render(view):
+        def wrapper(request, *args, **kwargs):
+            return HttpResponse(json.dumps(view(request, *args, **kwargs)))
+        return wrapper
+
+    def _view(self, calls):
+        @asyncviews.async_view(guards=[self._deny], renderers=[self._render])
+        async def view(request, value):
+            calls.append(value)
+            if value == 'raw':
+                return HttpResponse('raw')
+            return {'value': value}
+        return view
+
+    def test_context_is_rendered(self):
+        calls = []
+        response = async_to_sync(self._view(calls))(RequestFactory().get('/'), 'x')
+        assert json.loads(response.content) == {'value': 'x'} and calls == ['x']
+
+    def test_guard_response_skips_view(self):
+        calls = []
+        response = async_to_sync(self._view(calls))(RequestFactory().get('/', {'deny': '1'}), 'x')
+        assert response.status_code == 403 and calls == []
+
+    def test_response_skips_renderers(self):
+        response = async_to_sync(self._view([]))(RequestFactory().get('/'), 'raw')
+        assert response.content == b'raw'
+
+
+class TestAiterChunks:
+    """Async export bodies."""
+
+    def test_chunks_are_grouped_per_hop(self):
+        async def collect():
+            return [chunk async for chunk in exports.aiter_chunks(iter(['a', 'b', 'c', 'd', 'e']), per_hop=2)]
+        assert async_to_sync(collect)() == ['ab', 'cd', 'e']
+
+    def test_empty(self):
+        async def collect():
+            return [chunk async for chunk in exports.aiter_chunks(iter([]))]
+        assert async_to_sync(collect)() == []
+
+
+@pytest.mark.django_db
+class TestAsyncReads:
+    """Async twins of the cached reads agree with the sync ones."""
+
+    def test_kpis(self, hub_id, survey):
+        assert async_to_sync(kpis.aget)(hub_id) == kpis.get(hub_id)
+
+    def test_definition(self, survey, survey_questions):
+        definition = async_to_sync(definitions.aget_definition)(survey.pk)
+        assert definition == definitions.get_definition(survey.pk)
+        assert len(definition.questions) == len(survey_questions)
+
+    def test_missing_definition(self, survey):
+        Survey.objects.filter(pk=survey.pk).update(is_deleted=True)
+        assert async_to_sync(definitions.aget_definition)(survey.pk) is None
+
+    def test_open_surveys(self, hub_id, survey):
+        assert async_to_sync(scheduling.aopen_surveys)(hub_id) == scheduling.open_surveys(hub_id)
+        assert async_to_sync(scheduling.ais_open)(hub_id, survey.pk)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('async_routes')
+class TestAsyncViews:
+    """The coroutine views served through the URLconf."""
+
+    def test_dashboard(self, aclient):
+        response = async_to_sync(aclient.get)(reverse('surveys:dashboard'), headers={'HX-Request': 'true'})
+        assert response.status_code == 200
+        assert response.context['trend'].granularity == 'day'
+
+    def test_dashboard_requires_auth(self, async_client):
+        response = async_to_sync(async_client.get)(reverse('surveys:dashboard'))
+        assert response.status_code == 302
+
+    def test_list(self, aclient, survey):
+        response = async_to_sync(aclient.get)(reverse('surveys:surveys_list'), {'q': 'test', 'sort': 'title'})
+        assert response.status_code == 200
+        assert [item.pk for item in response.context['page_obj']] == [survey.pk]
+        assert metrics.histogram('surveys_rows_rendered', 'surveys_list_async').snapshot()[2] == 1
+        assert metrics.histogram('surveys_db_queries', 'surveys_list_async').snapshot()[2] > 0
+
+    def test_list_cursor(self, aclient, survey):
+        response = async_to_sync(aclient.get)(reverse('surveys:surveys_list'), {'paginate': 'cursor'})
+        assert response.status_code == 200
+        assert response.context['paginate'] == 'cursor'
+
+    def test_list_table_refresh(self, aclient, survey):
+        response = async_to_sync(aclient.get)(
+            reverse('surveys:surveys_list'), headers={'HX-Request': 'true', 'HX-Target': 'datatable-body'},
+        )
+        assert response.status_code == 200
+        assert survey.title.encode() in response.content
+
+    @pytest.mark.parametrize('fmt', ['csv', 'excel'])
+    def test_export_streams_asynchronously(self, aclient, survey, fmt):
+        response = async_to_sync(aclient.get)(reverse('surveys:surveys_list'), {'export': fmt})
+        assert response.status_code == 200
+        # A sync body would be read whole before sending under ASGI.
+        assert response.is_async
+        body = async_to_sync(self._read)(response)
+        if fmt == 'csv':
+            assert survey.title.encode() in body
+        else:
+            assert body.startswith(b'PK')
+        assert metrics.histogram('surveys_rows_rendered', 'surveys_list_async').snapshot()[2] == 1
+        assert metrics.histogram('surveys_response_bytes', 'surveys_list_async').snapshot()[2] == len(body)
+
+    @staticmethod
+    async def _read(response):
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    def test_submit(self, aclient, settings, survey, survey_questions):
+        settings.SURVEYS_INGEST_MAX_DELAY = 0
+        url = reverse('surveys:survey_submit', args=[survey.pk])
+        answers = {str(survey_questions[0].id): '4', str(survey_questions[1].id): 'yes'}
+        payload = json.dumps({'answers': answers, 'source': 'kiosk'})
+        post = async_to_sync(aclient.post)
+        first = post(url, payload, content_type='application/json', headers={'Idempotency-Key': 'async-1'})
+        retry = post(url, payload, content_type='application/json', headers={'Idempotency-Key': 'async-1'})
+        assert (first.status_code, retry.status_code) == (202, 200)
+        assert SurveyResponse.objects.filter(survey=survey, source='kiosk').count() == 1
+
+    def test_submit_requires_post(self, aclient, survey):
+        response = async_to_sync(aclient.get)(reverse('surveys:survey_submit', args=[survey.pk]))
+        assert response.status_code == 405
+
+    def test_submit_inactive(self, aclient, survey, survey_questions):
+        Survey.objects.filter(pk=survey.pk).update(is_active=False)
+        definitions.invalidate([str(survey.pk)])
+        response = async_to_sync(aclient.post)(reverse('surveys:survey_submit', args=[survey.pk]), {})
+        assert response.status_code == 409
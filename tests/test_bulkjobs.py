@@ -0,0 +1,85 @@
+"""Tests for surveys background bulk actions."""
+import pytest
+from django.urls import reverse
+
+from surveys import bulkjobs, kpis
+from surveys.models import Survey, SurveyBulkJob
+
+
+@pytest.fixture
+def inline_jobs(settings):
+    settings.SURVEYS_BULK_WORKERS = 0
+    settings.SURVEYS_BULK_CHUNK_SIZE = 2
+
+
+@pytest.fixture
+def hub_surveys(db, hub_id):
+    return [
+        Survey.objects.create(hub_id=hub_id, title=title, is_active=True)
+        for title in ['Checkout feedback', 'Delivery feedback', 'Staff review', 'Store feedback', 'Menu']
+    ]
+
+
+@pytest.mark.django_db
+class TestBulkJobs:
+    """Bulk job tests."""
+
+    def test_runs_in_chunks(self, hub_id, hub_surveys, inline_jobs, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            job = bulkjobs.start(hub_id, 'deactivate')
+        job.refresh_from_db()
+        assert job.status == 'done'
+        assert (job.total, job.processed) == (5, 5)
+        assert not Survey.objects.filter(hub_id=hub_id, is_active=True).exists()
+
+    def test_kpis_refreshed_once(self, monkeypatch, hub_id, hub_surveys, inline_jobs, django_capture_on_commit_callbacks):
+        refreshed = []
+        real_refresh = kpis.refresh_surveys
+        monkeypatch.setattr(kpis, 'refresh_surveys', lambda hub: refreshed.append(hub) or real_refresh(hub))
+        with django_capture_on_commit_callbacks(execute=True):
+            bulkjobs.start(hub_id, 'deactivate')
+        # Three chunks of two, one aggregate.
+        assert refreshed == [hub_id]
+        assert kpis.get(hub_id)['active_surveys'] == 0
+
+    def test_only_matching_surveys(self, hub_id, hub_surveys, inline_jobs, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            job = bulkjobs.start(hub_id, 'delete', 'feedback')
+        job.refresh_from_db()
+        assert job.processed == 3
+        assert sorted(Survey.objects.filter(hub_id=hub_id).values_list('title', flat=True)) == ['Menu', 'Staff review']
+
+    def test_other_hubs_untouched(self, hub_id, hub_surveys, inline_jobs, django_capture_on_commit_callbacks):
+        other = Survey.objects.create(title='Checkout feedback', is_active=True)
+        with django_capture_on_commit_callbacks(execute=True):
+            bulkjobs.start(hub_id, 'deactivate')
+        other.refresh_from_db()
+        assert other.is_active
+
+    def test_unknown_action(self, hub_id):
+        with pytest.raises(ValueError):
+            bulkjobs.start(hub_id, 'explode')
+
+    def test_bulk_view_starts_job(self, auth_client, admin_user, inline_jobs, django_capture_on_commit_callbacks):
+        Survey.objects.create(hub_id=admin_user.hub_id, title='One', is_active=True)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = auth_client.post(reverse('surveys:surveys_bulk_action'), {'action': 'deactivate', 'scope': 'matching'})
+        assert response.status_code == 200
+        assert b'surveys-bulk-job' in response.content
+        job = SurveyBulkJob.objects.get(hub_id=admin_user.hub_id)
+        assert job.action == 'deactivate'
+
+    def test_progress_endpoint(self, auth_client, admin_user):
+        job = SurveyBulkJob.objects.create(hub_id=admin_user.hub_id, action='activate', status='running', total=10, processed=4)
+        url = reverse('surveys:surveys_bulk_job', args=[job.pk])
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        assert 'HX-Trigger' not in response
+        SurveyBulkJob.objects.filter(pk=job.pk).update(status='done', processed=10)
+        response = auth_client.get(url)
+        assert response['HX-Trigger'] == 'surveys-bulk-done'
+
+    def test_progress_endpoint_other_hub(self, auth_client):
+        job = SurveyBulkJob.objects.create(action='activate')
+        response = auth_client.get(reverse('surveys:surveys_bulk_job', args=[job.pk]))
+        assert response.status_code == 404
@@ -0,0 +1,47 @@
+"""Tests for surveys sharded response counters."""
+import pytest
+from django.core.management import call_command
+
+from surveys import counters
+from surveys.models import SurveyCounterShard, SurveyResponse
+
+
+@pytest.mark.django_db
+class TestCounters:
+    """Sharded counter tests."""
+
+    def test_increment_does_not_touch_survey(self, survey):
+        for _ in range(10):
+            counters.increment(survey.pk)
+        survey.refresh_from_db()
+        assert survey.response_count == 5
+        assert counters.pending(survey.pk) == 10
+        assert counters.total(survey.pk) == 15
+
+    def test_shards_bounded(self, survey, settings):
+        settings.SURVEYS_COUNTER_SHARDS = 2
+        for _ in range(20):
+            counters.increment(survey.pk)
+        assert SurveyCounterShard.objects.filter(survey=survey).count() <= 2
+
+    def test_rollup(self, survey):
+        counters.increment(survey.pk, 3)
+        counters.increment(survey.pk, 4)
+        assert counters.rollup() == 1
+        survey.refresh_from_db()
+        assert survey.response_count == 12
+        assert counters.pending(survey.pk) == 0
+
+    def test_reconcile(self, survey):
+        SurveyResponse.objects.bulk_create([SurveyResponse(hub_id=survey.hub_id, survey=survey) for _ in range(3)])
+        counters.increment(survey.pk, 1)
+        call_command('surveys_reconcile_counts', survey=[str(survey.pk)])
+        survey.refresh_from_db()
+        assert survey.response_count == 3
+        assert counters.total(survey.pk) == 3
+
+    def test_rollup_only(self, survey):
+        counters.increment(survey.pk, 2)
+        call_command('surveys_reconcile_counts', rollup_only=True)
+        survey.refresh_from_db()
+        assert survey.response_count == 7
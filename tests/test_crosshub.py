@@ -0,0 +1,120 @@
+"""Tests for surveys cross-hub reports."""
+import uuid
+
+import pytest
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from surveys import crosshub, ingest
+from surveys.models import Survey, SurveyKpiSnapshot, SurveyQuestion
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _hub(hub_id, ratings, scores, title='Visit'):
+    survey = Survey.objects.create(hub_id=hub_id, title=title)
+    rating = SurveyQuestion.objects.create(hub_id=hub_id, survey=survey, text='Rate', question_type='rating', order=1024)
+    nps = SurveyQuestion.objects.create(hub_id=hub_id, survey=survey, text='Recommend?', question_type='scale', order=2048)
+    ingest.write_batch([
+        ingest.build_submission(survey.pk, hub_id, [rating, nps], {str(rating.id): r, str(nps.id): s})
+        for r, s in zip(ratings, scores)
+    ])
+    return survey
+
+
+@pytest.fixture
+def hubs(db, hub_id):
+    other = uuid.uuid4()
+    _hub(hub_id, ['5', '4'], ['10', '9'])
+    _hub(other, ['1', '2', '3'], ['3', '7', '10'])
+    return str(hub_id), str(other)
+
+
+@pytest.mark.django_db
+class TestCrossHub:
+    """Aggregation, merge and cache tests."""
+
+    @pytest.fixture(autouse=True)
+    def _inline(self, settings):
+        settings.SURVEYS_REPORT_WORKERS = 0
+
+    def test_aggregate_hub(self, hubs):
+        report = crosshub.aggregate_hub(hubs[0])
+        assert (report.total.surveys, report.total.open_surveys, report.total.responses) == (1, 1, 2)
+        assert report.total.rating == 4.5
+        assert report.total.nps == 100.0
+
+    def test_merged_report(self, hubs):
+        report = crosshub.build(list(hubs))
+        assert [hub.hub_id for hub in report.hubs] == [hubs[1], hubs[0]]
+        assert report.total.responses == 5
+        assert report.total.rating == 3.0
+        # 3 promoters, 1 passive, 1 detractor.
+        assert report.total.nps == 40.0
+        title, total, per_hub = report.titles()[0]
+        assert (title, total.surveys, set(per_hub)) == ('Visit', 2, set(hubs))
+
+    def test_merge_is_sum(self):
+        merged = crosshub.Aggregate(responses=2, rating_sum=9, rating_count=2).merge(
+            crosshub.Aggregate(responses=3, rating_sum=6, rating_count=3),
+        )
+        assert (merged.responses, merged.rating) == (5, 3.0)
+        assert crosshub.Aggregate().rating is None
+
+    def test_report_hubs_default_to_own_hub(self, hubs):
+        assert crosshub.report_hubs(hubs[0]) == [hubs[0]]
+
+    def test_report_hubs_group(self, settings, hubs):
+        settings.SURVEYS_REPORT_HUB_GROUPS = {hubs[0]: [hubs[1]]}
+        assert crosshub.report_hubs(hubs[0]) == sorted(hubs)
+        # Grants are one way.
+        assert crosshub.report_hubs(hubs[1]) == [hubs[1]]
+
+    def test_aggregate_does_not_write_kpis(self, hubs):
+        SurveyKpiSnapshot.objects.all().delete()
+        crosshub.aggregate_hub(hubs[0])
+        assert not SurveyKpiSnapshot.objects.exists()
+
+    def test_cached(self, hubs, django_assert_num_queries):
+        first = crosshub.get(hubs)
+        with django_assert_num_queries(0):
+            assert crosshub.get(hubs).generated_at == first.generated_at
+        assert crosshub.get(hubs, refresh=True).generated_at > first.generated_at
+
+    def test_view(self, settings, auth_client, hubs):
+        settings.SURVEYS_REPORT_HUB_GROUPS = {hubs[0]: [hubs[1]]}
+        response = auth_client.get(reverse('surveys:cross_hub_report'))
+        assert response.status_code == 200
+        assert response.context['report'].total.responses == 5
+
+    def test_view_without_group_shows_own_hub(self, auth_client, hubs):
+        report = auth_client.get(reverse('surveys:cross_hub_report')).context['report']
+        assert [hub.hub_id for hub in report.hubs] == [hubs[0]]
+        assert report.total.responses == 2
+
+    def test_command(self, hubs, capsys):
+        call_command('surveys_cross_hub_report', hub=list(hubs))
+        out = capsys.readouterr().out
+        assert 'Reported 2 hub(s)' in out
+        assert 'Visit: 5 response(s) in 2 hub(s)' in out
+
+    def test_command_requires_hubs(self, hubs):
+        with pytest.raises(CommandError):
+            call_command('surveys_cross_hub_report')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_thread_pool_matches_inline(settings, hubs):
+    """Partials computed on the pool merge to the same report as inline."""
+    settings.SURVEYS_REPORT_WORKERS = 0
+    inline = crosshub.build(list(hubs))
+    settings.SURVEYS_REPORT_WORKERS = 4
+    pooled = crosshub.build(list(hubs))
+    assert pooled.total == inline.total
+    assert pooled.by_title == inline.by_title
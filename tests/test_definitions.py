@@ -0,0 +1,70 @@
+"""Tests for surveys compiled definitions."""
+import pytest
+from django.core.cache import cache
+
+from surveys import definitions
+from surveys.models import Survey, SurveyQuestion
+from surveys.signals import surveys_changed
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    definitions._lru.clear()
+    yield
+    definitions._lru.clear()
+
+
+@pytest.mark.django_db
+class TestDefinitions:
+    """Compiled definition cache tests."""
+
+    def test_compile(self, survey, survey_questions):
+        definition = definitions.compile_definition(survey.pk)
+        assert definition.title == survey.title
+        assert [q.id for q in definition.questions] == [q.id for q in survey_questions]
+        assert definition.questions[0].question_type == 'rating'
+        assert definition.questions[0].is_required
+
+    def test_missing_or_deleted(self, survey):
+        Survey.objects.filter(pk=survey.pk).update(is_deleted=True)
+        assert definitions.get_definition(survey.pk) is None
+
+    def test_warm_lookup_runs_no_queries(self, survey, survey_questions, django_assert_num_queries):
+        definitions.get_definition(survey.pk)
+        with django_assert_num_queries(0):
+            assert len(definitions.get_definition(survey.pk).questions) == 4
+
+    def test_shared_cache_fills_lru(self, survey, survey_questions, django_assert_num_queries):
+        definitions.get_definition(survey.pk)
+        definitions._lru.clear()
+        with django_assert_num_queries(0):
+            assert definitions.get_definition(survey.pk).id == survey.pk
+
+    def test_question_edit_bumps_version(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        before = definitions.get_definition(survey.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            SurveyQuestion.objects.create(hub_id=survey.hub_id, survey=survey, text='New?', order=9)
+        after = definitions.get_definition(survey.pk)
+        assert after.version > before.version
+        assert len(after.questions) == 5
+
+    def test_toggle_bumps_version(self, survey, django_capture_on_commit_callbacks):
+        definitions.get_definition(survey.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            survey.is_active = False
+            survey.save(update_fields=['is_active', 'updated_at'])
+        assert not definitions.get_definition(survey.pk).is_active
+
+    def test_response_count_keeps_version(self, survey):
+        survey.response_count = 10
+        survey.save(update_fields=['response_count'])
+        survey.refresh_from_db()
+        assert survey.definition_version == 1
+
+    def test_surveys_changed_bumps_version(self, survey, django_capture_on_commit_callbacks):
+        definitions.get_definition(survey.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            Survey.objects.filter(pk=survey.pk).update(title='Bulk')
+            surveys_changed.send(sender=Survey, hub_id=survey.hub_id, survey_ids=[survey.pk])
+        assert definitions.get_definition(survey.pk).title == 'Bulk'
+        assert cache.get(definitions._version_key(survey.pk)) == 2
@@ -0,0 +1,96 @@
+"""Tests for surveys idempotent response submission."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from surveys import counters, idempotency, ingest
+from surveys.models import Survey, SurveyResponse
+
+
+@pytest.fixture(autouse=True)
+def clean_keys():
+    idempotency.recent_keys.clear()
+    yield
+    idempotency.recent_keys.clear()
+
+
+def _submission(survey, questions, key):
+    raw = {str(questions[0].id): '4', str(questions[1].id): 'yes'}
+    return ingest.build_submission(survey.pk, survey.hub_id, questions, raw, 'kiosk', key)
+
+
+class TestRecentKeys:
+    """Bloom filter and LRU tests."""
+
+    def test_bloom_has_no_false_negatives(self):
+        bloom = idempotency.BloomFilter(1000)
+        keys = [f'key-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        assert false_positives < 300
+
+    def test_lru_then_bloom(self):
+        recent = idempotency.RecentKeys(lru_size=2, bloom_capacity=100)
+        assert recent.check_and_add('a') == idempotency.NEW
+        assert recent.check_and_add('a') == idempotency.SEEN
+        recent.check_and_add('b')
+        recent.check_and_add('c')
+        # Evicted from the LRU, still remembered by the filter.
+        assert recent.check_and_add('a') == idempotency.MAYBE
+
+    def test_bloom_generations_rotate(self):
+        recent = idempotency.RecentKeys(lru_size=1, bloom_capacity=10)
+        for i in range(15):
+            recent.check_and_add(str(i))
+        assert recent.check_and_add('0') == idempotency.MAYBE
+
+    def test_forget(self):
+        recent = idempotency.RecentKeys(lru_size=10, bloom_capacity=100)
+        recent.check_and_add('a')
+        recent.forget(['a'])
+        assert recent.check_and_add('a') == idempotency.MAYBE
+
+
+@pytest.mark.django_db
+class TestIdempotentIngest:
+    """Duplicate submissions are stored and counted once."""
+
+    def test_key_too_long(self, survey, survey_questions):
+        with pytest.raises(ValueError):
+            _submission(survey, survey_questions, 'k' * 65)
+
+    def test_admit_drops_recent_retry(self, survey, survey_questions):
+        assert ingest.admit(_submission(survey, survey_questions, 'abc'))
+        assert not ingest.admit(_submission(survey, survey_questions, 'abc'))
+        assert ingest.admit(_submission(survey, survey_questions, None))
+
+    def test_repeats_within_batch(self, survey, survey_questions):
+        batch = [_submission(survey, survey_questions, 'abc') for _ in range(3)]
+        assert ingest.write_batch(batch) == 1
+        assert counters.total(survey.pk) == 6
+
+    def test_new_key_skips_lookup(self, survey, survey_questions):
+        submission = _submission(survey, survey_questions, 'fresh')
+        assert ingest.admit(submission) and not submission.verify
+        with CaptureQueriesContext(connection) as queries:
+            ingest.write_batch([submission])
+        assert not [q for q in queries if q['sql'].startswith('SELECT') and 'idempotency_key' in q['sql']]
+
+    def test_stored_key_from_another_process(self, survey, survey_questions):
+        # Written elsewhere: this process has never seen the key.
+        ingest.write_batch([_submission(survey, survey_questions, 'abc')])
+        idempotency.recent_keys.clear()
+        retry = _submission(survey, survey_questions, 'abc')
+        assert ingest.admit(retry) and not retry.verify
+        assert ingest.write_batch([retry, _submission(survey, survey_questions, 'def')]) == 1
+        assert SurveyResponse.objects.filter(survey=survey).count() == 2
+        assert counters.total(survey.pk) == 7
+
+    def test_same_key_on_other_surveys(self, survey, survey_questions):
+        other = Survey.objects.create(hub_id=survey.hub_id, title='Other')
+        first = _submission(survey, survey_questions, 'abc')
+        second = ingest.build_submission(other.pk, other.hub_id, [], {}, 'kiosk', 'abc')
+        assert ingest.admit(first) and ingest.admit(second)
+        assert ingest.write_batch([first, second]) == 2
@@ -0,0 +1,91 @@
+"""Tests for surveys bulk import."""
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from surveys import importer, search
+from surveys.models import Survey, SurveyQuestion
+
+DEFINITIONS = [
+    {
+        'title': 'Checkout',
+        'is_active': False,
+        'start_date': '2026-01-01',
+        'questions': [
+            {'text': 'How was it?', 'question_type': 'rating'},
+            {'text': 'Anything else?', 'is_required': False},
+        ],
+    },
+    {'title': 'Empty'},
+]
+
+CSV = (
+    'title,description,is_active,start_date,end_date,question_text,question_type,is_required\n'
+    'Checkout,,no,2026-01-01,,How was it?,rating,yes\n'
+    'Checkout,,no,2026-01-01,,Anything else?,,no\n'
+    'Empty,,,,,,,\n'
+)
+
+
+@pytest.mark.django_db
+class TestImporter:
+    """Bulk import tests."""
+
+    def _assert_imported(self, hub_id):
+        checkout = Survey.objects.get(hub_id=hub_id, title='Checkout')
+        assert not checkout.is_active
+        assert str(checkout.start_date) == '2026-01-01'
+        questions = list(checkout.questions.order_by('order'))
+        assert [q.text for q in questions] == ['How was it?', 'Anything else?']
+        assert [q.question_type for q in questions] == ['rating', 'text']
+        assert [q.is_required for q in questions] == [True, False]
+        assert all(q.hub_id == hub_id for q in questions)
+        assert not Survey.objects.get(hub_id=hub_id, title='Empty').questions.exists()
+
+    def test_import_json(self, hub_id):
+        result, ids = importer.import_surveys(hub_id, importer.parse(json.dumps(DEFINITIONS), 'json'))
+        assert (result.surveys, result.questions) == (2, 2)
+        assert len(ids) == 2
+        self._assert_imported(hub_id)
+
+    def test_import_csv(self, hub_id):
+        importer.import_surveys(hub_id, importer.parse(CSV.encode(), 'csv'))
+        self._assert_imported(hub_id)
+
+    def test_chunked_inserts(self, hub_id, django_assert_max_num_queries):
+        definitions = [{'title': f'S{i}', 'questions': ['Q1', 'Q2', 'Q3']} for i in range(20)]
+        with django_assert_max_num_queries(60):
+            result, _ids = importer.import_surveys(hub_id, definitions, chunk_size=10)
+        assert result.questions == 60
+        assert SurveyQuestion.objects.filter(hub_id=hub_id).count() == 60
+
+    def test_invalid_definition_writes_nothing(self, hub_id):
+        with pytest.raises(importer.SurveyImportError):
+            importer.import_surveys(hub_id, [{'title': 'Ok'}, {'title': 'Bad', 'end_date': 'tomorrow'}])
+        assert not Survey.objects.filter(hub_id=hub_id).exists()
+
+    def test_imported_surveys_are_searchable(self, hub_id):
+        importer.import_surveys(hub_id, DEFINITIONS)
+        qs = search.search_surveys(Survey.objects.filter(hub_id=hub_id), hub_id, 'how')
+        assert [s.title for s in qs] == ['Checkout']
+
+    def test_command(self, hub_id, tmp_path):
+        path = tmp_path / 'surveys.json'
+        path.write_text(json.dumps(DEFINITIONS))
+        call_command('surveys_import', str(path), hub=str(hub_id))
+        self._assert_imported(hub_id)
+
+    def test_upload_view(self, auth_client, admin_user):
+        upload = SimpleUploadedFile('surveys.csv', CSV.encode(), content_type='text/csv')
+        response = auth_client.post(reverse('surveys:survey_import'), {'file': upload})
+        assert response.status_code == 204
+        self._assert_imported(admin_user.hub_id)
+
+    def test_upload_view_rejects_unknown_format(self, auth_client, admin_user):
+        upload = SimpleUploadedFile('surveys.txt', b'x')
+        response = auth_client.post(reverse('surveys:survey_import'), {'file': upload})
+        assert response.status_code == 200
+        assert not Survey.objects.filter(hub_id=admin_user.hub_id).exists()
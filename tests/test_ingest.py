@@ -0,0 +1,147 @@
+"""Tests for surveys response ingestion."""
+import datetime
+import json
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from surveys import counters, ingest, rollups
+from surveys.models import Survey, SurveyAnswer, SurveyResponse
+
+
+def _raw(questions, rating='4', yes_no='yes'):
+    return {str(questions[0].id): rating, str(questions[1].id): yes_no}
+
+
+class TestCodeAnswer:
+    """Answer normalisation tests."""
+
+    def test_rating(self):
+        assert ingest.code_answer('rating', ' 4 ') == ('4', 4.0)
+
+    def test_yes_no(self):
+        assert ingest.code_answer('yes_no', 'Sí') == ('yes', 1.0)
+        assert ingest.code_answer('yes_no', False) == ('no', 0.0)
+
+    def test_invalid_number(self):
+        with pytest.raises(ValueError):
+            ingest.code_answer('scale', 'great')
+
+    @pytest.mark.parametrize('raw', ['nan', 'inf', '-Infinity', 1e999])
+    def test_non_finite_number(self, raw):
+        with pytest.raises(ValueError):
+            ingest.code_answer('rating', raw)
+
+
+@pytest.mark.django_db
+class TestIngest:
+    """Batch writer tests."""
+
+    def test_required_question_missing(self, survey, survey_questions):
+        with pytest.raises(ValueError):
+            ingest.build_submission(survey.pk, survey.hub_id, survey_questions, {})
+
+    def test_buffer_writes_in_batches(self, survey, survey_questions):
+        buffer = ingest.ResponseBuffer(batch_size=3, max_delay=60)
+        submission = ingest.build_submission(survey.pk, survey.hub_id, survey_questions, _raw(survey_questions))
+        assert buffer.add(submission) == 0
+        assert buffer.add(submission) == 0
+        assert buffer.add(submission) == 3
+        assert SurveyResponse.objects.filter(survey=survey).count() == 3
+        assert SurveyAnswer.objects.filter(survey=survey).count() == 6
+
+    def test_flush_counts_responses(self, survey, survey_questions):
+        buffer = ingest.ResponseBuffer(batch_size=100, max_delay=60)
+        for _ in range(4):
+            buffer.add(ingest.build_submission(survey.pk, survey.hub_id, survey_questions, _raw(survey_questions)))
+        assert buffer.flush() == 4
+        assert counters.total(survey.pk) == 9
+
+    def test_bad_submission_does_not_lose_the_batch(self, monkeypatch, survey, survey_questions):
+        bad = Survey.objects.create(hub_id=survey.hub_id, title='Purged meanwhile')
+        increment = counters.increment
+
+        def failing_increment(survey_id, amount=1):
+            if survey_id == bad.pk:
+                raise RuntimeError('bad submission')
+            increment(survey_id, amount)
+
+        monkeypatch.setattr(counters, 'increment', failing_increment)
+        batch = [
+            ingest.build_submission(survey_id, survey.hub_id, survey_questions, _raw(survey_questions), source)
+            for survey_id, source in ((survey.pk, 'kiosk'), (bad.pk, 'bad'), (survey.pk, 'web'))
+        ]
+        assert ingest.write_batch(batch) == 2
+        assert sorted(SurveyResponse.objects.values_list('source', flat=True)) == ['kiosk', 'web']
+        with pytest.raises(RuntimeError):
+            ingest.write_batch(batch[1:2])
+
+    def test_failed_fold_keeps_the_batch(self, monkeypatch, survey, survey_questions):
+        def failing_apply(batch):
+            raise RuntimeError('rollup row locked out')
+
+        monkeypatch.setattr(rollups, 'apply', failing_apply)
+        batch = [ingest.build_submission(survey.pk, survey.hub_id, survey_questions, _raw(survey_questions))] * 2
+        assert ingest.write_batch(batch) == 2
+        # Written once: the batch is not retried one by one after it committed.
+        assert SurveyResponse.objects.filter(survey=survey).count() == 2
+
+
+@pytest.mark.django_db
+class TestSubmitView:
+    """Submission endpoint tests."""
+
+    @pytest.fixture(autouse=True)
+    def _write_immediately(self, settings):
+        settings.SURVEYS_INGEST_MAX_DELAY = 0
+
+    def test_submit_json(self, auth_client, survey, survey_questions):
+        url = reverse('surveys:survey_submit', args=[survey.pk])
+        payload = {'answers': _raw(survey_questions), 'source': 'kiosk'}
+        response = auth_client.post(url, json.dumps(payload), content_type='application/json')
+        assert response.status_code == 202
+        assert SurveyResponse.objects.filter(survey=survey, source='kiosk').count() == 1
+
+    def test_submit_form(self, auth_client, survey, survey_questions):
+        url = reverse('surveys:survey_submit', args=[survey.pk])
+        data = {f'q_{k}': v for k, v in _raw(survey_questions).items()}
+        response = auth_client.post(url, data)
+        assert response.status_code == 202
+
+    def test_submit_invalid(self, auth_client, survey, survey_questions):
+        url = reverse('surveys:survey_submit', args=[survey.pk])
+        response = auth_client.post(url, {f'q_{survey_questions[0].id}': 'abc'})
+        assert response.status_code == 400
+        assert not SurveyResponse.objects.filter(survey=survey).exists()
+
+    @pytest.mark.parametrize('body', ['[]', '"answers"', '4'])
+    def test_submit_json_not_an_object(self, auth_client, survey, survey_questions, body):
+        url = reverse('surveys:survey_submit', args=[survey.pk])
+        response = auth_client.post(url, body, content_type='application/json')
+        assert response.status_code == 400
+        assert not SurveyResponse.objects.filter(survey=survey).exists()
+
+    def test_submit_inactive(self, auth_client, survey, survey_questions):
+        Survey.objects.filter(pk=survey.pk).update(is_active=False)
+        url = reverse('surveys:survey_submit', args=[survey.pk])
+        response = auth_client.post(url, {f'q_{k}': v for k, v in _raw(survey_questions).items()})
+        assert response.status_code == 409
+
+    def test_submit_outside_window(self, auth_client, survey, survey_questions):
+        survey.start_date = timezone.localdate() + datetime.timedelta(days=1)
+        survey.end_date = None
+        survey.save()
+        url = reverse('surveys:survey_submit', args=[survey.pk])
+        response = auth_client.post(url, {f'q_{k}': v for k, v in _raw(survey_questions).items()})
+        assert response.status_code == 409
+        assert response.json()['error'] == 'Survey is not open'
+
+    def test_submit_retry_is_stored_once(self, auth_client, survey, survey_questions):
+        url = reverse('surveys:survey_submit', args=[survey.pk])
+        payload = json.dumps({'answers': _raw(survey_questions)})
+        first = auth_client.post(url, payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        retry = auth_client.post(url, payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        assert (first.status_code, retry.status_code) == (202, 200)
+        assert retry.json()['duplicate'] is True
+        assert SurveyResponse.objects.filter(survey=survey, idempotency_key='retry-1').count() == 1
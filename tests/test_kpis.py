@@ -0,0 +1,97 @@
+"""Tests for the surveys dashboard KPI snapshot."""
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from surveys import counters, kpis
+from surveys.models import Survey, SurveyKpiSnapshot, SurveyResponse
+from surveys.signals import surveys_changed
+
+
+@pytest.fixture(autouse=True)
+def clear_kpi_cache(hub_id):
+    kpis.invalidate(hub_id)
+    yield
+    kpis.invalidate(hub_id)
+
+
+@pytest.mark.django_db
+class TestKpis:
+    """KPI snapshot tests."""
+
+    def test_refresh(self, survey, hub_id):
+        today = timezone.localdate()
+        Survey.objects.create(hub_id=hub_id, title='Later', is_active=True, start_date=today + datetime.timedelta(days=3))
+        Survey.objects.create(hub_id=hub_id, title='Old', end_date=today - datetime.timedelta(days=3))
+        Survey.objects.create(hub_id=hub_id, title='Gone', is_deleted=True)
+        counters.increment(survey.pk, 2)
+        SurveyResponse.objects.create(hub_id=hub_id, survey=survey)
+        snapshot = kpis.refresh(hub_id)
+        assert snapshot.total_surveys == 3
+        assert snapshot.active_surveys == 1
+        assert snapshot.scheduled_surveys == 1
+        assert snapshot.expired_surveys == 1
+        assert snapshot.total_responses == 7
+        assert snapshot.responses_today == 1
+        assert snapshot.responses_week == 1
+
+    def test_get_is_cached(self, survey, hub_id, django_assert_num_queries):
+        assert kpis.get(hub_id)['total_surveys'] == 1
+        with django_assert_num_queries(0):
+            assert kpis.get(hub_id)['total_surveys'] == 1
+
+    def test_surveys_changed_refreshes(self, survey, hub_id):
+        kpis.get(hub_id)
+        Survey.objects.create(hub_id=hub_id, title='Second')
+        assert kpis.get(hub_id)['total_surveys'] == 1
+        surveys_changed.send(sender=Survey, hub_id=hub_id, survey_ids=[])
+        assert kpis.get(hub_id)['total_surveys'] == 2
+
+    def test_record_responses(self, survey, hub_id, django_capture_on_commit_callbacks):
+        kpis.get(hub_id)
+        with django_capture_on_commit_callbacks(execute=True):
+            kpis.record_responses({hub_id: 4})
+        figures = kpis.get(hub_id)
+        assert figures['total_responses'] == 9
+        assert figures['responses_today'] == 4
+        assert figures['responses_week'] == 4
+
+    @pytest.mark.parametrize('start', [None, 3], ids=['running', 'scheduled'])
+    def test_toggle_matches_refresh(self, auth_client, survey, hub_id, start, django_capture_on_commit_callbacks):
+        if start is not None:
+            survey.start_date = timezone.localdate() + datetime.timedelta(days=start)
+            survey.end_date = None
+            survey.save()
+        kpis.refresh(hub_id)
+        url = reverse('surveys:survey_toggle_status', args=[survey.pk])
+        for _ in range(2):
+            with django_capture_on_commit_callbacks(execute=True):
+                assert auth_client.post(url, {'fragment': 'row'}).status_code == 200
+            incremental = {name: kpis.get(hub_id)[name] for name in kpis.KPI_FIELDS}
+            snapshot = kpis.refresh(hub_id)
+            assert incremental == {name: getattr(snapshot, name) for name in kpis.KPI_FIELDS}
+
+    def test_toggle_statements(self, auth_client, survey, hub_id):
+        kpis.refresh(hub_id)
+        url = reverse('surveys:survey_toggle_status', args=[survey.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            auth_client.post(url, {'fragment': 'row'})
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        # One definition bump and one KPI adjustment; no re-aggregation of the hub.
+        assert sum('definition_version' in sql for sql in updates) == 1
+        assert sum('surveys_surveykpisnapshot' in sql for sql in updates) == 1
+        assert not any('COUNT(' in q['sql'] for q in ctx.captured_queries)
+        survey.refresh_from_db()
+        assert survey.definition_version == 2
+
+    def test_stale_day_recomputed(self, survey, hub_id):
+        kpis.refresh(hub_id)
+        SurveyKpiSnapshot.objects.filter(hub_id=hub_id).update(
+            day=timezone.localdate() - datetime.timedelta(days=1), responses_today=50,
+        )
+        kpis.invalidate(hub_id)
+        assert kpis.get(hub_id)['responses_today'] == 0
@@ -0,0 +1,108 @@
+"""Tests for surveys request instrumentation."""
+import asyncio
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from surveys import metrics
+from surveys.models import Survey
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestHistogram:
+    """Histogram and exposition tests."""
+
+    def test_buckets_are_cumulative(self):
+        hist = metrics.Histogram((1, 5, 10))
+        for value in (0.5, 3, 7, 20):
+            hist.observe(value)
+        assert hist.snapshot() == ([1, 2, 3], 4, 30.5)
+
+    def test_prometheus_text(self):
+        metrics.histogram('surveys_db_queries', 'dashboard').observe(3)
+        text = metrics.render_prometheus()
+        assert '# TYPE surveys_db_queries histogram' in text
+        assert 'surveys_db_queries_bucket{endpoint="dashboard",le="5"} 1' in text
+        assert 'surveys_db_queries_bucket{endpoint="dashboard",le="+Inf"} 1' in text
+        assert 'surveys_db_queries_count{endpoint="dashboard"} 1' in text
+
+
+@pytest.mark.django_db
+class TestInstrumentedViews:
+    """View instrumentation tests."""
+
+    def test_list_is_recorded(self, auth_client, survey):
+        auth_client.get(reverse('surveys:surveys_list'))
+        _counts, count, total = metrics.histogram('surveys_db_queries', 'surveys_list').snapshot()
+        assert count == 1 and total > 0
+        assert metrics.histogram('surveys_rows_rendered', 'surveys_list').snapshot()[2] == 1
+        assert metrics.histogram('surveys_response_bytes', 'surveys_list').snapshot()[2] > 0
+
+    def test_streamed_export_is_recorded_when_sent(self, auth_client, survey):
+        response = auth_client.get(reverse('surveys:surveys_list'), {'export': 'csv'})
+        assert metrics.histogram('surveys_response_bytes', 'surveys_list').snapshot()[1] == 0
+        body = b''.join(response.streaming_content)
+        assert metrics.histogram('surveys_response_bytes', 'surveys_list').snapshot()[2] == len(body)
+        assert metrics.histogram('surveys_rows_rendered', 'surveys_list').snapshot()[2] == 1
+
+    def test_slow_requests_log_sql(self, auth_client, survey, settings, caplog):
+        settings.SURVEYS_SLOW_REQUEST_MS = 0
+        with caplog.at_level(logging.WARNING, logger='surveys.metrics'):
+            auth_client.get(reverse('surveys:surveys_list'))
+        assert 'surveys_survey' in caplog.text
+
+    def test_metrics_endpoint_token(self, client, settings):
+        settings.SURVEYS_METRICS_TOKEN = 'secret'
+        url = reverse('surveys:metrics')
+        assert client.get(url).status_code == 401
+        response = client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+
+    def test_metrics_endpoint_session(self, auth_client):
+        url = reverse('surveys:metrics')
+        assert auth_client.get(url).status_code == 200
+
+
+def _counting_view(name, queries):
+    async def view(request):
+        for _ in range(queries):
+            await Survey.objects.acount()
+            # Let the other call run between our queries.
+            await asyncio.sleep(0)
+        return HttpResponse('ok')
+    view.__name__ = name
+    return metrics.instrumented(view)
+
+
+@pytest.mark.django_db
+class TestInstrumentedCoroutines:
+    """Coroutine view instrumentation tests."""
+
+    def test_interleaved_calls_count_their_own_queries(self):
+        one, three = _counting_view('one_query', 1), _counting_view('three_queries', 3)
+
+        async def run():
+            await asyncio.gather(one(RequestFactory().get('/')), three(RequestFactory().get('/')))
+        async_to_sync(run)()
+        assert metrics.histogram('surveys_db_queries', 'one_query').snapshot()[1:] == (1, 1)
+        assert metrics.histogram('surveys_db_queries', 'three_queries').snapshot()[1:] == (1, 3)
+
+    def test_nested_probes_both_count(self):
+        outer = metrics._Probe('outer')
+        with metrics._Active(outer):
+            inner = metrics._Probe('inner')
+            with metrics._Active(inner):
+                Survey.objects.count()
+            Survey.objects.count()
+        assert (outer.queries, inner.queries) == (2, 1)
@@ -0,0 +1,149 @@
+"""Tests for surveys sparse question ordering."""
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from surveys import definitions, ordering
+from surveys.models import SurveyQuestion
+
+STEP = ordering.STEP
+
+
+def _order(survey):
+    return [str(pk) for pk in SurveyQuestion.objects.filter(survey=survey).order_by('order').values_list('id', flat=True)]
+
+
+@pytest.fixture
+def spaced(survey):
+    return [
+        SurveyQuestion.objects.create(hub_id=survey.hub_id, survey=survey, text=f'Q{i}', order=ordering.position(i))
+        for i in range(200)
+    ]
+
+
+class TestPlan:
+    """Order planning tests."""
+
+    def test_single_move_changes_one_row(self):
+        current = {str(i): ordering.position(i) for i in range(5)}
+        assert ordering.plan(current, ['4', '0', '1', '2', '3']) == {'4': STEP // 2}
+        assert ordering.plan(current, ['0', '2', '1', '3', '4']) == {'2': STEP + STEP // 2}
+
+    def test_move_to_end(self):
+        current = {str(i): ordering.position(i) for i in range(3)}
+        assert ordering.plan(current, ['1', '2', '0']) == {'0': 4 * STEP}
+
+    def test_unchanged(self):
+        current = {str(i): ordering.position(i) for i in range(3)}
+        assert ordering.plan(current, ['0', '1', '2']) == {}
+
+    def test_rebalances_when_gap_is_used_up(self):
+        current = {'a': 0, 'b': 1, 'c': 2}
+        assert ordering.plan(current, ['c', 'a', 'b']) == {'c': STEP, 'a': 2 * STEP, 'b': 3 * STEP}
+
+    def test_result_is_increasing(self):
+        current = {str(i): ordering.position(i) for i in range(50)}
+        new = [str(i) for i in reversed(range(50))]
+        merged = {**current, **ordering.plan(current, new)}
+        orders = [merged[question_id] for question_id in new]
+        assert orders == sorted(set(orders))
+
+
+@pytest.mark.django_db
+class TestReorder:
+    """Reorder persistence tests."""
+
+    def test_drag_is_one_update(self, survey, spaced):
+        new = [str(spaced[-1].pk)] + [str(q.pk) for q in spaced[:-1]]
+        with CaptureQueriesContext(connection) as queries:
+            assert ordering.reorder(survey.pk, new) == 1
+        updates = [q for q in queries if q['sql'].startswith('UPDATE') and 'surveys_surveyquestion' in q['sql']]
+        assert len(updates) == 1
+        assert _order(survey) == new
+
+    def test_reverse_is_one_update(self, survey, spaced):
+        new = [str(q.pk) for q in reversed(spaced)]
+        with CaptureQueriesContext(connection) as queries:
+            ordering.reorder(survey.pk, new)
+        assert len([q for q in queries if q['sql'].startswith('UPDATE') and 'surveys_surveyquestion' in q['sql']]) == 1
+        assert _order(survey) == new
+
+    def test_repeated_inserts_rebalance(self, survey, spaced):
+        first = str(spaced[0].pk)
+        # Keep dropping the last question between the first two until the gap is gone.
+        for _ in range(12):
+            order = _order(survey)
+            moved = order.pop()
+            order.insert(1, moved)
+            ordering.reorder(survey.pk, order)
+            assert _order(survey) == order
+        assert _order(survey)[0] == first
+        orders = list(SurveyQuestion.objects.filter(survey=survey).order_by('order').values_list('order', flat=True))
+        assert len(set(orders)) == len(orders)
+
+    def test_bumps_definition(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        version = definitions.get_definition(survey.pk).version
+        with django_capture_on_commit_callbacks(execute=True):
+            ordering.reorder(survey.pk, [str(q.pk) for q in reversed(survey_questions)])
+        definition = definitions.get_definition(survey.pk)
+        assert definition.version == version + 1
+        assert [q.id for q in definition.questions] == [q.pk for q in reversed(survey_questions)]
+
+    def test_must_list_every_question(self, survey, survey_questions):
+        with pytest.raises(ordering.OrderingError):
+            ordering.reorder(survey.pk, [str(q.pk) for q in survey_questions[:2]])
+        with pytest.raises(ordering.OrderingError):
+            ordering.reorder(survey.pk, [str(survey_questions[0].pk)] * 4)
+
+    def test_reorder_view(self, auth_client, survey, survey_questions):
+        url = reverse('surveys:survey_questions_reorder', args=[survey.pk])
+        new = [str(q.pk) for q in reversed(survey_questions)]
+        response = auth_client.post(url, json.dumps({'questions': new}), content_type='application/json')
+        assert response.status_code == 200
+        assert _order(survey) == new
+        assert auth_client.post(url, {'questions': new[:1]}).status_code == 400
+
+
+@pytest.mark.django_db
+class TestReorderTool:
+    """``reorder_questions`` assistant tool tests."""
+
+    @pytest.fixture
+    def tool(self):
+        pytest.importorskip('assistant.tools')
+        from surveys.ai_tools import ReorderQuestions
+        return ReorderQuestions()
+
+    @staticmethod
+    def _request(hub_id):
+        return SimpleNamespace(session={'hub_id': str(hub_id)})
+
+    def test_reorders(self, tool, survey, spaced):
+        ids = [str(q.pk) for q in spaced]
+        ids.insert(0, ids.pop())
+        result = tool.execute({'survey_id': str(survey.pk), 'question_ids': ids}, self._request(survey.hub_id))
+        assert result['questions_moved'] == 1
+        assert _order(survey) == ids
+
+    def test_other_hub_is_not_found(self, tool, survey, spaced):
+        ids = [str(q.pk) for q in reversed(spaced)]
+        result = tool.execute({'survey_id': str(survey.pk), 'question_ids': ids}, self._request(uuid.uuid4()))
+        assert result == {'error': 'Survey not found'}
+        assert _order(survey) == [str(q.pk) for q in spaced]
+
+    def test_deleted_survey_is_not_found(self, tool, survey, spaced):
+        survey.is_deleted = True
+        survey.save()
+        ids = [str(q.pk) for q in spaced]
+        assert tool.execute({'survey_id': str(survey.pk), 'question_ids': ids}, self._request(survey.hub_id)) == {
+            'error': 'Survey not found',
+        }
+
+    def test_malformed_id(self, tool, survey):
+        result = tool.execute({'survey_id': 'not-a-uuid', 'question_ids': []}, self._request(survey.hub_id))
+        assert result == {'error': 'Survey not found'}
@@ -0,0 +1,142 @@
+"""
+Query-plan regression tests.
+
+Every query shape the views issue is EXPLAINed against a seeded dataset and
+must be answered from an index: no full table scan, and no in-memory sort
+unless the shape orders by a computed value.
+"""
+import datetime
+import re
+import uuid
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from surveys import search
+from surveys.models import Survey, SurveyQuestion, SurveyResponse
+from surveys.pagination import CursorPaginator, _beyond
+from surveys.views import SURVEY_SORT_FIELDS
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor not in ('sqlite', 'postgresql'),
+    reason='query plans are only checked on SQLite and PostgreSQL',
+)
+
+# ``description`` is an unbounded TextField without a b-tree index; its sort is
+# limited to one hub's rows by the hub_id prefix of the other indexes.
+UNINDEXED_SORTS = {'description'}
+
+_PG_SORT = re.compile(r'^(->\s*)?(Incremental )?Sort\b')
+
+
+def _problems(plan, allow_sort=False):
+    problems = []
+    for line in plan.splitlines():
+        text = line.strip()
+        if connection.vendor == 'sqlite':
+            if re.search(r'\bSCAN surveys_\w+', text):
+                problems.append(text)
+            if 'USE TEMP B-TREE' in text and not allow_sort:
+                problems.append(text)
+        else:
+            if 'Seq Scan' in text:
+                problems.append(text)
+            if _PG_SORT.match(text) and not allow_sort:
+                problems.append(text)
+    return problems
+
+
+def _seeks(plan, field):
+    """Whether the index scan is bounded on ``field`` rather than walked from the start of the hub."""
+    if connection.vendor == 'sqlite':
+        return any(re.search(rf'\bSEARCH .*\b{field}[<>]', line) for line in plan.splitlines())
+    return any('Index Cond' in line and field in line for line in plan.splitlines())
+
+
+def _explain(qs):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+    return qs.explain()
+
+
+@pytest.fixture
+def seeded(db):
+    hubs = [uuid.uuid4() for _ in range(3)]
+    today = datetime.date.today()
+    surveys = []
+    for h, hub in enumerate(hubs):
+        for i in range(150):
+            surveys.append(Survey(
+                hub_id=hub, title=f'Survey {h}-{i} customer feedback', description=f'Store {i % 9}',
+                is_active=bool(i % 3), response_count=i % 17, is_deleted=i % 10 == 0,
+                start_date=today - datetime.timedelta(days=i % 30) if i % 4 else None,
+                end_date=today + datetime.timedelta(days=i % 45) if i % 5 else None,
+            ))
+    Survey.objects.bulk_create(surveys)
+    questions = [
+        SurveyQuestion(hub_id=s.hub_id, survey=s, text=f'Question {n}', order=n)
+        for s in surveys[:60] for n in range(5)
+    ]
+    SurveyQuestion.objects.bulk_create(questions)
+    SurveyResponse.objects.bulk_create([SurveyResponse(hub_id=s.hub_id, survey=s) for s in surveys[:60] for _ in range(3)])
+    search.reindex_surveys([s.pk for s in surveys[:60]])
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return hubs[0], surveys[1]
+
+
+def _live(hub_id):
+    return Survey.objects.filter(hub_id=hub_id, is_deleted=False)
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+    """Every view query shape is index-backed."""
+
+    @pytest.mark.parametrize('field', sorted(set(SURVEY_SORT_FIELDS.values())))
+    @pytest.mark.parametrize('prefix', ['', '-'])
+    def test_list_sort(self, seeded, field, prefix):
+        hub_id, _survey = seeded
+        plan = _explain(_live(hub_id).order_by(f'{prefix}{field}'))
+        assert not _problems(plan, allow_sort=field in UNINDEXED_SORTS), plan
+
+    @pytest.mark.parametrize('field', ['title', 'start_date', 'response_count'])
+    def test_keyset_page(self, seeded, field):
+        hub_id, survey = seeded
+        paginator = CursorPaginator(_live(hub_id), field, per_page=12)
+        value = paginator._model_field.value_from_object(survey)
+        qs = paginator._ordered(False).filter(_beyond(field, value, survey.pk, True, paginator.nullable))
+        plan = _explain(qs)
+        assert not _problems(plan), plan
+        assert _seeks(plan, field), plan
+
+    def test_count(self, seeded):
+        hub_id, _survey = seeded
+        plan = _explain(_live(hub_id).order_by().values('pk'))
+        assert not _problems(plan), plan
+
+    def test_responses_survey_choices(self, seeded):
+        hub_id, _survey = seeded
+        plan = _explain(_live(hub_id).order_by('-response_count', '-pk').only('id', 'title'))
+        assert not _problems(plan), plan
+
+    def test_questions_in_order(self, seeded):
+        _hub_id, survey = seeded
+        plan = _explain(SurveyQuestion.objects.filter(survey=survey, is_deleted=False).order_by('order'))
+        assert not _problems(plan), plan
+
+    def test_recent_responses(self, seeded):
+        hub_id, _survey = seeded
+        since = timezone.now() - datetime.timedelta(days=7)
+        plan = _explain(SurveyResponse.objects.filter(hub_id=hub_id, created_at__gte=since).values('pk'))
+        assert not _problems(plan), plan
+
+    def test_token_search(self, seeded, settings):
+        settings.SURVEYS_SEARCH_BACKEND = 'tokens'
+        hub_id, _survey = seeded
+        qs = search.search_surveys(_live(hub_id), hub_id, 'customer feed').order_by('-search_rank', 'title')
+        # Ordering by rank is necessarily computed per request.
+        assert not _problems(_explain(qs), allow_sort=True)
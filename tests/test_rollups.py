@@ -0,0 +1,56 @@
+"""Tests for surveys per-question rollups."""
+import pytest
+from django.core.management import call_command
+
+from surveys import rollups
+from surveys.models import QuestionRollup, QuestionRollupBucket, SurveyQuestion
+from .conftest import ingest_answers
+
+
+@pytest.mark.django_db
+class TestRollups:
+    """Rollup maintenance and stats tests."""
+
+    def test_bucket_for(self):
+        assert rollups.bucket_for('rating', '4.0', 4.0) == '4'
+        assert rollups.bucket_for('yes_no', 'no', 0.0) == 'no'
+        assert rollups.bucket_for('text', 'hello', None) is None
+
+    def test_ingest_updates_rollups(self, survey, survey_questions):
+        rating, yes_no, choice, _text = survey_questions
+        ingest_answers(survey, survey_questions, [
+            {str(rating.id): '5', str(yes_no.id): 'yes', str(choice.id): 'Centre'},
+            {str(rating.id): '3', str(yes_no.id): 'no', str(choice.id): 'Centre'},
+        ])
+        rollup = QuestionRollup.objects.get(question=rating)
+        assert (rollup.count, rollup.value_sum, rollup.value_sum_sq) == (2, 8.0, 34.0)
+        assert QuestionRollupBucket.objects.get(question=choice, value='Centre').count == 2
+
+    def test_survey_stats(self, survey, survey_questions):
+        rating, yes_no, _choice, _text = survey_questions
+        ingest_answers(survey, survey_questions, [
+            {str(rating.id): v, str(yes_no.id): 'yes'} for v in ('2', '4', '4')
+        ])
+        stats = {s.question.id: s for s in rollups.survey_stats(survey)}
+        assert stats[rating.id].mean == pytest.approx(10 / 3)
+        assert stats[rating.id].distribution[0][:2] == ('2', 1)
+        assert stats[yes_no.id].distribution == [('yes', 3, 100.0)]
+
+    def test_nps(self, survey, survey_questions):
+        nps = SurveyQuestion.objects.create(hub_id=survey.hub_id, survey=survey, text='Recommend?', question_type='scale', is_required=False)
+        questions = survey_questions + [nps]
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, questions, [
+            {str(rating.id): '5', str(yes_no.id): 'yes', str(nps.id): v} for v in ('10', '9', '7', '3')
+        ])
+        stats = {s.question.id: s for s in rollups.survey_stats(survey)}
+        assert stats[nps.id].nps == 25.0
+        assert stats[rating.id].nps is None
+
+    def test_rebuild_matches_incremental(self, survey, survey_questions):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'no'}] * 3)
+        before = list(QuestionRollupBucket.objects.filter(survey=survey).values_list('question_id', 'value', 'count').order_by('question_id', 'value'))
+        call_command('surveys_rebuild_rollups', survey=[str(survey.pk)])
+        after = list(QuestionRollupBucket.objects.filter(survey=survey).values_list('question_id', 'value', 'count').order_by('question_id', 'value'))
+        assert before == after
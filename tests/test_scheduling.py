@@ -0,0 +1,98 @@
+"""Tests for surveys start/end windows and the cached open sets."""
+import datetime
+import uuid
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+
+from surveys import scheduling
+from surveys.models import Survey
+from surveys.signals import surveys_changed
+
+DAY = datetime.timedelta(days=1)
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _survey(hub_id, title, **fields):
+    return Survey.objects.create(hub_id=hub_id, title=title, **fields)
+
+
+@pytest.mark.django_db
+class TestScheduling:
+    """Open-set, publish and close tests."""
+
+    def test_open_surveys(self, hub_id):
+        today = timezone.localdate()
+        always = _survey(hub_id, 'Always')
+        running = _survey(hub_id, 'Running', start_date=today - DAY, end_date=today)
+        _survey(hub_id, 'Scheduled', start_date=today + DAY)
+        _survey(hub_id, 'Ended', end_date=today - DAY)
+        _survey(hub_id, 'Inactive', is_active=False)
+        _survey(hub_id, 'Deleted', is_deleted=True)
+        assert scheduling.open_surveys(hub_id) == {str(always.pk), str(running.pk)}
+
+    def test_open_set_is_cached(self, hub_id, django_assert_num_queries):
+        survey = _survey(hub_id, 'Always')
+        scheduling.open_surveys(hub_id)
+        with django_assert_num_queries(0):
+            assert scheduling.is_open(hub_id, survey.pk)
+
+    def test_scheduled_survey_opens_on_start_date(self, hub_id):
+        today = timezone.localdate()
+        survey = _survey(hub_id, 'Scheduled', start_date=today + DAY)
+        assert not scheduling.is_open(hub_id, survey.pk)
+        # The next day is a different key, so nothing has to be invalidated.
+        assert str(survey.pk) in scheduling.open_surveys(hub_id, today + DAY)
+
+    def test_save_invalidates(self, hub_id, django_capture_on_commit_callbacks):
+        survey = _survey(hub_id, 'Always')
+        assert scheduling.is_open(hub_id, survey.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            survey.end_date = timezone.localdate() - DAY
+            survey.save()
+        assert not scheduling.is_open(hub_id, survey.pk)
+
+    def test_surveys_changed_invalidates_on_commit(self, hub_id, django_capture_on_commit_callbacks):
+        survey = _survey(hub_id, 'Always')
+        assert scheduling.is_open(hub_id, survey.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            Survey.objects.filter(pk=survey.pk).update(is_active=False)
+            surveys_changed.send(sender=Survey, hub_id=hub_id, survey_ids=[survey.pk])
+            # The cached set stays until the transaction commits.
+            assert scheduling.is_open(hub_id, survey.pk)
+        assert not scheduling.is_open(hub_id, survey.pk)
+
+    def test_publish_includes_empty_hubs(self, hub_id, django_assert_num_queries):
+        open_survey = _survey(hub_id, 'Always')
+        other_hub = _survey(uuid.uuid4(), 'Inactive', is_active=False)
+        assert scheduling.publish() == 2
+        with django_assert_num_queries(0):
+            assert scheduling.open_surveys(hub_id) == {str(open_survey.pk)}
+            assert scheduling.open_surveys(other_hub.hub_id) == frozenset()
+
+    def test_close_expired(self, hub_id):
+        today = timezone.localdate()
+        ended = _survey(hub_id, 'Ended', end_date=today - DAY)
+        last_day = _survey(hub_id, 'Last day', end_date=today)
+        closed = scheduling.close_expired(today)
+        assert closed == {hub_id: [ended.pk]}
+        ended.refresh_from_db()
+        last_day.refresh_from_db()
+        assert (ended.is_active, last_day.is_active) == (False, True)
+        assert scheduling.close_expired(today) == {}
+
+    def test_command_closes_and_publishes(self, hub_id):
+        ended = _survey(hub_id, 'Ended', end_date=timezone.localdate() - DAY)
+        call_command('surveys_schedule')
+        ended = Survey.all_objects.get(pk=ended.pk)
+        # Announced through ``surveys_changed``, so the compiled definition moves on.
+        assert (ended.is_active, ended.definition_version) == (False, 2)
+        assert scheduling.open_surveys(hub_id) == frozenset()
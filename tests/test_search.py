@@ -0,0 +1,88 @@
+"""Tests for surveys search."""
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from surveys import search
+from surveys.models import Survey, SurveyQuestion, SurveySearchToken
+
+
+@pytest.fixture(autouse=True)
+def token_backend(settings):
+    settings.SURVEYS_SEARCH_BACKEND = 'tokens'
+
+
+def _search(hub_id, query):
+    qs = Survey.objects.filter(hub_id=hub_id, is_deleted=False)
+    return list(search.search_surveys(qs, hub_id, query).order_by('-search_rank', 'title'))
+
+
+class TestTokenize:
+    """Tokenizer tests."""
+
+    def test_folds_case_and_accents(self):
+        assert search.tokenize('Satisfacción del Cliente!') == ['satisfaccion', 'del', 'cliente']
+
+    def test_query_terms_dedupes(self):
+        assert search.query_terms('store Store a') == ['store']
+
+
+@pytest.mark.django_db
+class TestTokenSearch:
+    """Token index backend tests."""
+
+    def test_index_maintained_on_save(self, survey):
+        assert SurveySearchToken.objects.filter(survey=survey, token='title').exists()
+        survey.title = 'Renamed'
+        survey.save()
+        assert not SurveySearchToken.objects.filter(survey=survey, token='title').exists()
+
+    def test_prefix_and_all_terms(self, hub_id):
+        match = Survey.objects.create(hub_id=hub_id, title='Customer satisfaction')
+        Survey.objects.create(hub_id=hub_id, title='Customer loyalty')
+        assert _search(hub_id, 'cust satis') == [match]
+
+    def test_overlapping_prefixes(self, hub_id):
+        match = Survey.objects.create(hub_id=hub_id, title='Customer satisfaction')
+        Survey.objects.create(hub_id=hub_id, title='Sales report')
+        assert _search(hub_id, 'sat satisfaction') == [match]
+
+    def test_question_text(self, hub_id, survey):
+        SurveyQuestion.objects.create(hub_id=hub_id, survey=survey, text='How was the checkout queue?')
+        assert _search(hub_id, 'queue') == [survey]
+
+    def test_title_ranks_above_description(self, hub_id):
+        in_description = Survey.objects.create(hub_id=hub_id, title='A', description='pricing feedback')
+        in_title = Survey.objects.create(hub_id=hub_id, title='Pricing', description='')
+        assert _search(hub_id, 'pricing') == [in_title, in_description]
+
+    def test_scoped_to_hub(self, hub_id, survey):
+        import uuid
+        assert _search(uuid.uuid4(), 'test') == []
+
+    def test_list_view_search(self, auth_client, survey):
+        url = reverse('surveys:surveys_list')
+        response = auth_client.get(url, {'q': 'tit'})
+        assert response.status_code == 200
+        assert survey.title in response.content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason='full-text search runs on PostgreSQL only')
+class TestPostgresSearch:
+    """PostgreSQL full-text backend tests."""
+
+    @pytest.fixture(autouse=True)
+    def postgres_backend(self, settings):
+        settings.SURVEYS_SEARCH_BACKEND = 'postgres'
+
+    def test_accents_are_folded(self, hub_id):
+        match = Survey.objects.create(hub_id=hub_id, title='Satisfacción del cliente')
+        assert _search(hub_id, 'satisfaccion') == [match]
+        assert _search(hub_id, 'satisfacción') == [match]
+
+    def test_question_text_ranks_above_description(self, hub_id):
+        in_description = Survey.objects.create(hub_id=hub_id, title='A', description='checkout')
+        in_question = Survey.objects.create(hub_id=hub_id, title='B')
+        SurveyQuestion.objects.create(hub_id=hub_id, survey=in_question, text='How was the checkout?')
+        assert _search(hub_id, 'checkout') == [in_question, in_description]
@@ -0,0 +1,153 @@
+"""Tests for surveys columnar response snapshots."""
+import pytest
+from django.core.management import call_command
+
+from surveys import counters, definitions, ingest, snapshots
+from surveys.models import SurveyResponse
+from .conftest import ingest_answers
+
+
+@pytest.fixture(autouse=True)
+def snapshot_settings(settings, tmp_path):
+    settings.SURVEYS_SNAPSHOT_DIR = str(tmp_path)
+    settings.SURVEYS_SNAPSHOT_MIN_RESPONSES = 0
+    settings.SURVEYS_SNAPSHOT_WORKERS = 0
+    definitions._lru.clear()
+
+
+def _open(survey):
+    return snapshots.open_snapshot(definitions.get_definition(survey.pk), counters.total(survey.pk))
+
+
+@pytest.mark.django_db
+class TestSnapshots:
+    """Snapshot build, append and read tests."""
+
+    def test_build_and_read(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no, choice, text = survey_questions
+        ingest_answers(survey, survey_questions, [
+            {str(rating.id): '5', str(yes_no.id): 'yes', str(choice.id): 'Centre', str(text.id): 'Great'},
+            {str(rating.id): '2', str(yes_no.id): 'no', str(choice.id): 'Airport'},
+        ], django_capture_on_commit_callbacks)
+
+        snapshot = _open(survey)
+        assert snapshot.rows == 2
+        assert snapshot.header['version'] == survey.definition_version
+        assert sorted(snapshot.values(rating.id)) == [2.0, 5.0]
+        labels = snapshot.labels(choice.id)
+        assert sorted(labels[code] for code in snapshot.codes(choice.id)) == ['Airport', 'Centre']
+        assert sorted(snapshot.text(text.id)) == ['', 'Great']
+        assert len(snapshot.response_ids()) == 2
+
+    def test_below_threshold(self, settings, survey, survey_questions):
+        settings.SURVEYS_SNAPSHOT_MIN_RESPONSES = 10
+        assert _open(survey) is None
+        assert snapshots.read_header(survey.pk) is None
+
+    def test_open_reads_the_header_only(self, survey, survey_questions, django_capture_on_commit_callbacks,
+                                        django_assert_num_queries):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'yes'}], django_capture_on_commit_callbacks)
+        definition = definitions.get_definition(survey.pk)
+        with django_assert_num_queries(0):
+            # No count to go by: nothing is built on the caller's thread.
+            assert snapshots.open_snapshot(definition) is None
+        assert snapshots.read_header(survey.pk) is None
+        snapshots.rebuild(definition)
+        with django_assert_num_queries(0):
+            assert snapshots.open_snapshot(definition).rows == 1
+
+    def test_rebuild_skips_deleted_responses(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [
+            {str(rating.id): '4', str(yes_no.id): 'yes'}, {str(rating.id): '2', str(yes_no.id): 'no'},
+        ], django_capture_on_commit_callbacks)
+        deleted = SurveyResponse.objects.filter(survey=survey).order_by('created_at', 'id').first()
+        SurveyResponse.all_objects.filter(pk=deleted.pk).update(is_deleted=True)
+        header = snapshots.rebuild(definitions.get_definition(survey.pk))
+        assert header['rows'] == 1
+        assert deleted.pk not in _open(survey).response_ids()
+
+    def test_ingest_appends(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no, choice, _text = survey_questions
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'yes'}], django_capture_on_commit_callbacks)
+        _open(survey)
+
+        ingest_answers(survey, survey_questions, [
+            {str(rating.id): '1', str(yes_no.id): 'no', str(choice.id): 'Mall'},
+        ], django_capture_on_commit_callbacks)
+        header = snapshots.read_header(survey.pk)
+        assert (header['rows'], header['rebuilt_rows'], header['generation']) == (2, 1, 1)
+        assert header['watermark'] == 2
+        assert header['labels'][str(choice.id)] == ['Mall']
+
+        snapshot = _open(survey)
+        assert list(snapshot.values(rating.id)) == [4.0, 1.0]
+        assert list(snapshot.codes(choice.id)) == [snapshots.MISSING_CODE, 0]
+
+    def test_append_skips_rows_already_rebuilt(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no = survey_questions[:2]
+        batch = [ingest.build_submission(survey.pk, survey.hub_id, survey_questions, {str(rating.id): '3', str(yes_no.id): 'no'})]
+        with django_capture_on_commit_callbacks() as callbacks:
+            ingest.write_batch(batch)
+        # A reader rebuilds between the commit and the deferred append.
+        snapshots.rebuild(definitions.get_definition(survey.pk))
+        for callback in callbacks:
+            callback()
+        assert snapshots.read_header(survey.pk)['rows'] == 1
+
+    def test_append_after_rebuild(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'yes'}], django_capture_on_commit_callbacks)
+        header = snapshots.rebuild(definitions.get_definition(survey.pk))
+        assert header['rebuilt_until'][1] == SurveyResponse.objects.get(survey=survey).pk.hex
+        ingest_answers(survey, survey_questions, [{str(rating.id): '2', str(yes_no.id): 'no'}], django_capture_on_commit_callbacks)
+        assert snapshots.read_header(survey.pk)['rows'] == 2
+
+    def test_snapshot_behind_watermark_is_rebuilt(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'yes'}], django_capture_on_commit_callbacks)
+        _open(survey)
+        # The batch commits but its append is lost.
+        ingest_answers(survey, survey_questions, [{str(rating.id): '2', str(yes_no.id): 'no'}])
+        definition = definitions.get_definition(survey.pk)
+        assert snapshots.read_header(survey.pk)['rows'] == 1
+        assert snapshots.open_snapshot(definition, counters.total(survey.pk)).rows == 2
+        assert snapshots.read_header(survey.pk)['generation'] == 2
+
+    def test_behind_snapshot_is_not_read(self, monkeypatch, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'yes'}], django_capture_on_commit_callbacks)
+        definition = definitions.get_definition(survey.pk)
+        snapshots.rebuild(definition)
+        scheduled = []
+        monkeypatch.setattr(snapshots, 'schedule_rebuild', lambda *args: scheduled.append(args))
+        assert snapshots.open_snapshot(definition, 2) is None
+        assert scheduled == [(definition, 2)]
+
+    def test_torn_append_is_ignored(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'yes'}], django_capture_on_commit_callbacks)
+        header = snapshots.rebuild(definitions.get_definition(survey.pk))
+        path = snapshots._generation_dir(survey.pk, header['generation'])
+        with open(f'{path}/{rating.id}.f8', 'ab') as fh:
+            fh.write(b'\x00' * 5)
+        ingest_answers(survey, survey_questions, [{str(rating.id): '2', str(yes_no.id): 'no'}], django_capture_on_commit_callbacks)
+        snapshot = _open(survey)
+        assert list(snapshot.values(rating.id)) == [4.0, 2.0]
+
+    def test_definition_edit_rebuilds(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'yes'}], django_capture_on_commit_callbacks)
+        _open(survey)
+        with django_capture_on_commit_callbacks(execute=True):
+            survey.questions.create(hub_id=survey.hub_id, text='New?', question_type='rating', is_required=False)
+        snapshot = _open(survey)
+        assert snapshot.header['generation'] == 2
+        assert len(snapshot.header['columns']) == len(survey_questions) + 1
+
+    def test_command(self, survey, survey_questions, django_capture_on_commit_callbacks):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'yes'}] * 3, django_capture_on_commit_callbacks)
+        call_command('surveys_rebuild_snapshots', survey=[str(survey.pk)])
+        assert snapshots.read_header(survey.pk)['rows'] == 3
@@ -0,0 +1,82 @@
+"""Tests for surveys response trend buckets."""
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from surveys import trends
+from surveys.models import QuestionTrendBucket, Survey, SurveyTrendBucket
+from .conftest import ingest_answers
+
+
+@pytest.mark.django_db
+class TestTrends:
+    """Trend maintenance, downsampling and rebuild tests."""
+
+    def test_ingest_updates_buckets(self, survey, survey_questions):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [
+            {str(rating.id): '5', str(yes_no.id): 'yes'},
+            {str(rating.id): '5', str(yes_no.id): 'no'},
+        ])
+        now = timezone.now()
+        for granularity in ('hour', 'day'):
+            bucket = SurveyTrendBucket.objects.get(survey=survey, granularity=granularity)
+            assert (bucket.start, bucket.count, bucket.hub_id) == (trends.truncate(now, granularity), 2, survey.hub_id)
+        assert QuestionTrendBucket.objects.get(question=rating, granularity='day', value='5').count == 2
+        assert QuestionTrendBucket.objects.filter(question=yes_no, granularity='hour').count() == 2
+
+    def test_year_is_downsampled(self, survey):
+        today = trends.truncate(timezone.now(), 'day')
+        SurveyTrendBucket.objects.bulk_create([
+            SurveyTrendBucket(hub_id=survey.hub_id, survey=survey, granularity='day', start=today - datetime.timedelta(days=i), count=1)
+            for i in range(365)
+        ])
+        trend = trends.series(survey_id=survey.pk, start=timezone.now() - trends.RANGES['365d'], points=100)
+        assert trend.granularity == 'day'
+        assert trend.step == 4
+        assert len(trend.counts) <= 100
+        assert trend.total == 365
+
+    def test_short_range_uses_hours(self, survey, survey_questions):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '3', str(yes_no.id): 'yes'}] * 3)
+        trend = trends.series(survey_id=survey.pk, start=timezone.now() - trends.RANGES['24h'], points=24)
+        assert (trend.granularity, trend.step) == ('hour', 1)
+        assert trend.counts[-1] == 3 and trend.total == 3
+
+    def test_question_values(self, survey, survey_questions):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): v, str(yes_no.id): 'yes'} for v in ('1', '5', '5')])
+        trend = trends.series(question_id=rating.id)
+        assert trend.total == 3
+        assert sum(trend.values['5']) == 2
+
+    def test_hub_series_skips_deleted_surveys(self, survey, survey_questions):
+        rating, yes_no = survey_questions[:2]
+        ingest_answers(survey, survey_questions, [{str(rating.id): '4', str(yes_no.id): 'no'}])
+        assert trends.series(hub_id=survey.hub_id).total == 1
+        Survey.objects.filter(pk=survey.pk).update(is_deleted=True)
+        assert trends.series(hub_id=survey.hub_id).total == 0
+
+    def test_rebuild_matches_incremental(self, survey, survey_questions):
+        rating, yes_no, choice = survey_questions[:3]
+        ingest_answers(survey, survey_questions, [
+            {str(rating.id): '4', str(yes_no.id): 'no', str(choice.id): 'Centre'},
+            {str(rating.id): '2', str(yes_no.id): 'yes'},
+        ])
+        fields = ('question_id', 'granularity', 'start', 'value', 'count')
+        before = sorted(QuestionTrendBucket.objects.filter(survey=survey).values_list(*fields))
+        surveys_before = sorted(SurveyTrendBucket.objects.filter(survey=survey).values_list('granularity', 'start', 'count'))
+        call_command('surveys_rebuild_trends', survey=[str(survey.pk)])
+        assert sorted(QuestionTrendBucket.objects.filter(survey=survey).values_list(*fields)) == before
+        assert sorted(SurveyTrendBucket.objects.filter(survey=survey).values_list('granularity', 'start', 'count')) == surveys_before
+
+    def test_prune(self, settings, survey):
+        settings.SURVEYS_TREND_HOURLY_RETENTION_DAYS = 7
+        old = trends.truncate(timezone.now() - datetime.timedelta(days=10), 'hour')
+        SurveyTrendBucket.objects.create(hub_id=survey.hub_id, survey=survey, granularity='hour', start=old, count=1)
+        SurveyTrendBucket.objects.create(hub_id=survey.hub_id, survey=survey, granularity='day', start=trends.truncate(old, 'day'), count=1)
+        assert trends.prune() == 1
+        assert SurveyTrendBucket.objects.filter(survey=survey).get().granularity == 'day'
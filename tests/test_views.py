@@ -1,7 +1,11 @@
 """Tests for surveys views."""
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from surveys.models import Survey
+
 
 @pytest.mark.django_db
 class TestDashboard:
@@ -19,6 +23,12 @@ class TestDashboard:
         response = auth_client.get(url, HTTP_HX_REQUEST='true')
         assert response.status_code == 200
 
+    def test_dashboard_trend(self, auth_client):
+        """Test dashboard includes the 30-day response trend."""
+        url = reverse('surveys:dashboard')
+        response = auth_client.get(url, HTTP_HX_REQUEST='true')
+        assert response.context['trend'].granularity == 'day'
+
     def test_dashboard_requires_auth(self, client):
         """Test dashboard requires authentication."""
         url = reverse('surveys:dashboard')
@@ -67,6 +77,33 @@ class TestSurveyViews:
         response = auth_client.get(url, {'export': 'excel'})
         assert response.status_code == 200
 
+    def test_export_csv_streams_rows(self, auth_client, survey):
+        """Test streamed CSV export contains the header and the survey."""
+        url = reverse('surveys:surveys_list')
+        response = auth_client.get(url, {'export': 'csv'})
+        assert response.streaming
+        content = b''.join(response.streaming_content).decode()
+        assert content.splitlines()[0].startswith('Title,')
+        assert survey.title in content
+
+    def test_export_excel_is_workbook(self, auth_client, survey):
+        """Test streamed Excel export is a readable workbook."""
+        import io
+        import zipfile
+        url = reverse('surveys:surveys_list')
+        response = auth_client.get(url, {'export': 'excel'})
+        workbook = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        assert survey.title in sheet
+
+    def test_export_legacy(self, auth_client, settings):
+        """Test the in-memory export is still available."""
+        settings.SURVEYS_STREAM_EXPORTS = False
+        url = reverse('surveys:surveys_list')
+        response = auth_client.get(url, {'export': 'csv'})
+        assert response.status_code == 200
+        assert not response.streaming
+
     def test_add_form_loads(self, auth_client):
         """Test add form loads."""
         url = reverse('surveys:survey_add')
@@ -105,6 +142,18 @@ class TestSurveyViews:
         response = auth_client.post(url, data)
         assert response.status_code == 200
 
+    def test_edit_post_keeps_definition_version(self, auth_client, survey):
+        """Test editing never writes back the loaded definition_version."""
+        url = reverse('surveys:survey_edit', args=[survey.pk])
+        data = {'title': 'Updated Title', 'description': '', 'is_active': 'on'}
+        with CaptureQueriesContext(connection) as ctx:
+            assert auth_client.post(url, data).status_code == 200
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        # Only the F() bump from the post_save receiver touches the version.
+        assert sum('definition_version' in sql for sql in updates) == 1
+        survey.refresh_from_db()
+        assert (survey.title, survey.definition_version) == ('Updated Title', 2)
+
     def test_delete(self, auth_client, survey):
         """Test soft delete via POST."""
         url = reverse('surveys:survey_delete', args=[survey.pk])
@@ -122,6 +171,50 @@ class TestSurveyViews:
         survey.refresh_from_db()
         assert survey.is_active != original
 
+    def test_toggle_status_row_fragment(self, auth_client, survey):
+        """Test toggle returns only the affected row."""
+        url = reverse('surveys:survey_toggle_status', args=[survey.pk])
+        response = auth_client.post(url, {'fragment': 'row'})
+        assert response.status_code == 200
+        assert response['HX-Reswap'] == 'none'
+        content = response.content.decode()
+        assert f'id="survey-row-{survey.pk}"' in content
+        assert 'hx-swap-oob="true"' in content
+        assert 'datatable-thead' not in content
+
+    def test_edit_post_row_fragment(self, auth_client, survey):
+        """Test edit from the panel swaps only the edited row."""
+        url = reverse('surveys:survey_edit', args=[survey.pk])
+        response = auth_client.post(url, {'title': 'Renamed', 'fragment': 'row'})
+        assert 'Renamed' in response.content.decode()
+        assert 'datatable-thead' not in response.content.decode()
+
+    def test_delete_row_fragment(self, auth_client, survey):
+        """Test delete removes only the affected row."""
+        url = reverse('surveys:survey_delete', args=[survey.pk])
+        response = auth_client.post(url, {'fragment': 'row'})
+        assert 'hx-swap-oob="delete"' in response.content.decode()
+        survey.refresh_from_db()
+        assert survey.is_deleted is True
+
+    def test_cached_rows_follow_edits(self, auth_client, survey):
+        """Test cached row markup is not served after the survey changes."""
+        url = reverse('surveys:surveys_list')
+        assert 'Test Title' in auth_client.get(url).content.decode()
+        survey.title = 'Renamed Title'
+        survey.save()
+        assert 'Renamed Title' in auth_client.get(url).content.decode()
+
+    def test_cached_rows_follow_bulk_updates(self, auth_client, survey):
+        """Test rows re-render after a bulk update that does not touch updated_at."""
+        url = reverse('surveys:surveys_list')
+        auth_client.get(url)
+        auth_client.post(reverse('surveys:surveys_bulk_action'), {'ids': str(survey.pk), 'action': 'deactivate'})
+        content = auth_client.get(url).content.decode()
+        row = content[content.index(f'id="survey-row-{survey.pk}"'):]
+        row = row[:row.index('</tr>')]
+        assert 'checked' not in row
+
     def test_bulk_delete(self, auth_client, survey):
         """Test bulk delete."""
         url = reverse('surveys:surveys_bulk_action')
@@ -137,6 +230,79 @@ class TestSurveyViews:
         assert response.status_code == 302
 
 
+@pytest.mark.django_db
+class TestResponses:
+    """Responses view tests."""
+
+    def test_responses_loads(self, auth_client, survey, survey_questions):
+        """Test responses page renders rollup stats."""
+        url = reverse('surveys:responses')
+        response = auth_client.get(url, {'survey': str(survey.pk)})
+        assert response.status_code == 200
+        assert survey_questions[0].text in response.content.decode()
+
+    def test_responses_filter_and_cross_tab(self, auth_client, survey, survey_questions):
+        """Test responses applies filters and renders a cross-tab."""
+        pytest.importorskip('numpy')
+        rating, yes_no = survey_questions[:2]
+        url = reverse('surveys:responses')
+        response = auth_client.get(url, {
+            'survey': str(survey.pk), 'fq': str(rating.id), 'fop': 'gte', 'fv': '4',
+            'xrow': str(rating.id), 'xcol': str(yes_no.id),
+        })
+        assert response.status_code == 200
+        assert response.context['active_filters'][0]['value'] == f'{rating.id}:gte:4'
+        assert response.context['crosstab'] is not None
+
+    def test_responses_invalid_filter(self, auth_client, survey, survey_questions):
+        """Test an invalid filter is reported and the unfiltered stats shown."""
+        pytest.importorskip('numpy')
+        url = reverse('surveys:responses')
+        response = auth_client.get(url, {'survey': str(survey.pk), 'filter': f'{survey_questions[0].id}:gte:many'})
+        assert response.status_code == 200
+        assert response.context['analytics_error']
+        assert response.context['active_filters'] == []
+
+    def test_survey_trends_json(self, auth_client, survey, survey_questions):
+        """Test trend endpoint returns downsampled points."""
+        url = reverse('surveys:survey_trends')
+        response = auth_client.get(url, {'survey': str(survey.pk), 'question': str(survey_questions[0].id), 'range': '7d', 'points': '7'})
+        assert response.status_code == 200
+        data = response.json()
+        assert data['granularity'] == 'day'
+        assert len(data['labels']) == len(data['counts'])
+
+    def test_survey_trends_question_without_survey(self, auth_client, survey, survey_questions):
+        """Test a question is enough to scope the trend."""
+        url = reverse('surveys:survey_trends')
+        response = auth_client.get(url, {'question': str(survey_questions[0].id)})
+        assert response.status_code == 200
+
+    def test_survey_trends_question_of_deleted_survey(self, auth_client, survey, survey_questions):
+        """Test questions of deleted surveys are not found."""
+        Survey.objects.filter(pk=survey.pk).update(is_deleted=True)
+        url = reverse('surveys:survey_trends')
+        assert auth_client.get(url, {'question': str(survey_questions[0].id)}).status_code == 404
+
+    def test_survey_trends_rejects_bad_range(self, auth_client, survey):
+        """Test trend endpoint validates its range."""
+        url = reverse('surveys:survey_trends')
+        assert auth_client.get(url, {'survey': str(survey.pk), 'range': '2y'}).status_code == 400
+        assert auth_client.get(url, {'survey': 'not-a-uuid'}).status_code == 400
+
+    def test_responses_invalid_survey(self, auth_client, survey):
+        """Test an invalid survey id falls back to the default."""
+        url = reverse('surveys:responses')
+        response = auth_client.get(url, {'survey': 'not-a-uuid'})
+        assert response.status_code == 200
+
+    def test_responses_requires_auth(self, client):
+        """Test responses requires authentication."""
+        url = reverse('surveys:responses')
+        response = client.get(url)
+        assert response.status_code == 302
+
+
 @pytest.mark.django_db
 class TestSettings:
     """Settings view tests."""
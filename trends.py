@@ -0,0 +1,229 @@
+"""
+Response trends for the Surveys module.
+
+Every ingested batch adds its responses to ``SurveyTrendBucket`` (per survey)
+and its bucketed answers to ``QuestionTrendBucket`` (per question value), at
+hourly and local-day granularity. Charts read these rows only: ``series``
+picks the finest stored granularity that still fits the requested number of
+points and folds neighbouring buckets together, so a year-long trend reads at
+most one row per survey and day and returns a few hundred points.
+
+Hourly buckets older than ``SURVEYS_TREND_HOURLY_RETENTION_DAYS`` are removed
+by ``prune``; daily buckets are kept.
+"""
+import datetime
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import QuestionTrendBucket, SurveyAnswer, SurveyQuestion, SurveyResponse, SurveyTrendBucket
+from .rollups import BUCKETED_TYPES, _bump, bucket_for
+
+HOUR = datetime.timedelta(hours=1)
+DAY = datetime.timedelta(days=1)
+GRANULARITIES = {'hour': TruncHour, 'day': TruncDay}
+DEFAULT_POINTS = 60
+MAX_POINTS = 500
+DEFAULT_HOURLY_RETENTION_DAYS = 90
+
+RANGES = {
+    '24h': 24 * HOUR,
+    '7d': 7 * DAY,
+    '30d': 30 * DAY,
+    '90d': 90 * DAY,
+    '365d': 365 * DAY,
+}
+DEFAULT_RANGE = '30d'
+
+
+def truncate(moment, granularity):
+    """Start of the hour or local day holding ``moment``."""
+    if settings.USE_TZ:
+        moment = timezone.localtime(moment)
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _local_date(moment):
+    return timezone.localtime(moment).date() if settings.USE_TZ else moment.date()
+
+
+def _hourly_cutoff(now=None):
+    days = getattr(settings, 'SURVEYS_TREND_HOURLY_RETENTION_DAYS', DEFAULT_HOURLY_RETENTION_DAYS)
+    return truncate((now or timezone.now()) - days * DAY, 'hour')
+
+
+def apply(submissions, now=None):
+    """
+    Fold ``submissions`` into the buckets holding ``now``.
+
+    Called once the ingest transaction has committed; issues one statement
+    per touched survey and one per touched question value, for each
+    granularity.
+    """
+    now = now or timezone.now()
+    responses, hubs, values = Counter(), {}, Counter()
+    for submission in submissions:
+        responses[submission.survey_id] += 1
+        hubs[submission.survey_id] = submission.hub_id
+        for question_id, _value, _numeric_value, bucket in submission.answers:
+            if bucket is not None:
+                values[submission.survey_id, question_id, bucket] += 1
+
+    for granularity in GRANULARITIES:
+        start = truncate(now, granularity)
+        for survey_id, count in responses.items():
+            _bump(
+                SurveyTrendBucket, {'survey_id': survey_id, 'granularity': granularity, 'start': start},
+                {'hub_id': hubs[survey_id]}, count=count,
+            )
+        for (survey_id, question_id, value), count in values.items():
+            _bump(
+                QuestionTrendBucket,
+                {'question_id': question_id, 'granularity': granularity, 'start': start, 'value': value},
+                {'survey_id': survey_id}, count=count,
+            )
+
+
+def rebuild(survey):
+    """Recompute the trend buckets of ``survey`` from its stored responses and answers."""
+    question_types = dict(SurveyQuestion.all_objects.filter(survey=survey).values_list('id', 'question_type'))
+    bucketed = [question_id for question_id, question_type in question_types.items() if question_type in BUCKETED_TYPES]
+    cutoff = _hourly_cutoff()
+    survey_buckets, question_buckets = [], []
+    for granularity, trunc in GRANULARITIES.items():
+        responses = SurveyResponse.objects.filter(survey=survey)
+        answers = SurveyAnswer.objects.filter(survey=survey, question_id__in=bucketed, is_deleted=False)
+        if granularity == 'hour':
+            responses = responses.filter(created_at__gte=cutoff)
+            answers = answers.filter(created_at__gte=cutoff)
+
+        for row in responses.annotate(start=trunc('created_at')).values('start').annotate(count=Count('id')):
+            survey_buckets.append(SurveyTrendBucket(
+                hub_id=survey.hub_id, survey=survey, granularity=granularity, start=row['start'], count=row['count'],
+            ))
+        counts = Counter()
+        rows = (
+            answers.annotate(start=trunc('created_at'))
+            .values('start', 'question_id', 'value', 'numeric_value').annotate(count=Count('id'))
+        )
+        for row in rows.iterator():
+            bucket = bucket_for(question_types[row['question_id']], row['value'], row['numeric_value'])
+            counts[row['start'], row['question_id'], bucket] += row['count']
+        question_buckets.extend(
+            QuestionTrendBucket(
+                survey=survey, question_id=question_id, granularity=granularity, start=start, value=value, count=count,
+            )
+            for (start, question_id, value), count in counts.items()
+        )
+
+    with transaction.atomic():
+        SurveyTrendBucket.objects.filter(survey=survey).delete()
+        QuestionTrendBucket.objects.filter(survey=survey).delete()
+        SurveyTrendBucket.objects.bulk_create(survey_buckets)
+        QuestionTrendBucket.objects.bulk_create(question_buckets, batch_size=1000)
+    return len(survey_buckets) + len(question_buckets)
+
+
+def prune(now=None):
+    """Delete hourly buckets past the retention window. Returns the rows deleted."""
+    cutoff = _hourly_cutoff(now)
+    deleted = SurveyTrendBucket.objects.filter(granularity='hour', start__lt=cutoff).delete()[0]
+    deleted += QuestionTrendBucket.objects.filter(granularity='hour', start__lt=cutoff).delete()[0]
+    return deleted
+
+
+@dataclass
+class Trend:
+    """A downsampled series: point ``i`` sums ``step`` stored buckets from ``labels[i]``."""
+    granularity: str
+    step: int
+    labels: list = field(default_factory=list)
+    counts: list = field(default_factory=list)
+    values: dict = field(default_factory=dict)  # question trends: value -> counts per point
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    def bars(self):
+        """``(label, count, percent of the highest point)`` for each point."""
+        peak = max(self.counts, default=0)
+        return [
+            (label, count, round(100.0 * count / peak, 1) if peak else 0.0)
+            for label, count in zip(self.labels, self.counts)
+        ]
+
+
+class _Plan:
+    """Which buckets to read for a range, and how they fold into points."""
+
+    def __init__(self, start, end, points):
+        per_point = max(end - start, HOUR) / points
+        if per_point < DAY and start >= _hourly_cutoff():
+            self.granularity = 'hour'
+            self.step = max(1, math.ceil(per_point / HOUR))
+        else:
+            self.granularity = 'day'
+            self.step = max(1, math.ceil(per_point / DAY))
+        self.origin = truncate(start, self.granularity)
+        if self.granularity == 'hour':
+            self.size = math.ceil((end - self.origin) / (self.step * HOUR))
+            # Step in absolute time; the local wall clock may skip or repeat an hour.
+            base = self.origin.astimezone(datetime.timezone.utc) if settings.USE_TZ else self.origin
+            self.labels = [base + i * self.step * HOUR for i in range(self.size)]
+        else:
+            first = _local_date(self.origin)
+            self.size = math.ceil(((_local_date(end) - first).days + 1) / self.step)
+            # Day buckets start at local midnight, so index by date: a DST day is not 24 hours.
+            self.labels = [first + i * self.step * DAY for i in range(self.size)]
+
+    def index(self, start):
+        if self.granularity == 'hour':
+            return int((start - self.origin) // (self.step * HOUR))
+        return (_local_date(start) - self.labels[0]).days // self.step
+
+
+def series(hub_id=None, survey_id=None, question_id=None, start=None, end=None, points=DEFAULT_POINTS):
+    """
+    Response counts between ``start`` and ``end`` in at most ``points`` points.
+
+    Scoped to ``question_id`` (with per-value counts), else ``survey_id``,
+    else every live survey of ``hub_id``. ``end`` defaults to now and
+    ``start`` to ``DEFAULT_RANGE`` before it.
+    """
+    end = end or timezone.now()
+    start = start or end - RANGES[DEFAULT_RANGE]
+    plan = _Plan(start, end, max(1, min(points, MAX_POINTS)))
+    window = {'granularity': plan.granularity, 'start__gte': plan.origin, 'start__lt': end}
+    trend = Trend(granularity=plan.granularity, step=plan.step, labels=plan.labels, counts=[0] * plan.size)
+
+    if question_id is not None:
+        values = defaultdict(lambda: [0] * plan.size)
+        for bucket_start, value, count in QuestionTrendBucket.objects.filter(question_id=question_id, **window).values_list(
+            'start', 'value', 'count',
+        ):
+            i = plan.index(bucket_start)
+            trend.counts[i] += count
+            values[value][i] += count
+        trend.values = dict(values)
+        return trend
+
+    if survey_id is not None:
+        rows = SurveyTrendBucket.objects.filter(survey_id=survey_id, **window).values_list('start', 'count')
+    else:
+        rows = (
+            SurveyTrendBucket.objects.filter(hub_id=hub_id, survey__is_deleted=False, **window)
+            .values('start').annotate(total=Sum('count')).values_list('start', 'total')
+        )
+    for bucket_start, count in rows:
+        trend.counts[plan.index(bucket_start)] += count
+    return trend
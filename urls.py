@@ -1,24 +1,44 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'surveys'
 
+# Serve the coroutine variants of the hot views (for ASGI deployments).
+ASYNC_VIEWS = getattr(settings, 'SURVEYS_ASYNC_VIEWS', False)
+
+
+def _variant(view, async_view):
+    return async_view if ASYNC_VIEWS else view
+
+
 urlpatterns = [
     # Dashboard
-    path('', views.dashboard, name='dashboard'),
+    path('', _variant(views.dashboard, views.dashboard_async), name='dashboard'),
 
     # Navigation tab aliases
-    path('responses/', views.dashboard, name='responses'),
+    path('responses/', views.responses, name='responses'),
+    path('responses/trends/', views.survey_trends, name='survey_trends'),
+    path('responses/hubs/', views.cross_hub_report, name='cross_hub_report'),
 
 
     # Survey
-    path('surveys/', views.surveys_list, name='surveys_list'),
+    path('surveys/', _variant(views.surveys_list, views.surveys_list_async), name='surveys_list'),
     path('surveys/add/', views.survey_add, name='survey_add'),
+    path('surveys/import/', views.survey_import, name='survey_import'),
     path('surveys/<uuid:pk>/edit/', views.survey_edit, name='survey_edit'),
     path('surveys/<uuid:pk>/delete/', views.survey_delete, name='survey_delete'),
     path('surveys/<uuid:pk>/toggle/', views.survey_toggle_status, name='survey_toggle_status'),
     path('surveys/bulk/', views.surveys_bulk_action, name='surveys_bulk_action'),
+    path('surveys/bulk/jobs/<int:job_id>/', views.surveys_bulk_job, name='surveys_bulk_job'),
+    path('surveys/<uuid:pk>/questions/reorder/', views.survey_questions_reorder, name='survey_questions_reorder'),
+
+    # Responses
+    path('surveys/<uuid:pk>/submit/', _variant(views.survey_submit, views.survey_submit_async), name='survey_submit'),
 
     # Settings
     path('settings/', views.settings_view, name='settings'),
+
+    # Instrumentation
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
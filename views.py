@@ -1,11 +1,19 @@
 """
 Surveys Module Views
 """
+import json
+import os
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict
 from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 from django.shortcuts import get_object_or_404, render as django_render
+from django.template import Context, Template
+from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_POST
@@ -15,23 +23,44 @@ from apps.core.htmx import htmx_view
 from apps.core.services import export_to_csv, export_to_excel
 from apps.modules_runtime.navigation import with_module_nav
 
-from .models import Survey, SurveyQuestion
+from . import (
+    analytics, asyncviews, bulkjobs, crosshub, definitions, exports, importer, ingest, kpis, metrics, ordering, rollups, scheduling,
+    search, trends,
+)
+from .pagination import CursorPage, CursorPaginator
+from .signals import surveys_changed
+from .models import Survey, SurveyBulkJob, SurveyQuestion
 
 PER_PAGE_CHOICES = [12, 24, 48, 96, 0]
+DASHBOARD_TREND_POINTS = 30
 
 
 # ======================================================================
 # Dashboard
 # ======================================================================
 
+@metrics.instrumented
 @login_required
 @with_module_nav('surveys', 'dashboard')
 @htmx_view('surveys/pages/index.html', 'surveys/partials/dashboard_content.html')
 def dashboard(request):
     hub_id = request.session.get('hub_id')
-    return {
-        'total_surveys': Survey.objects.filter(hub_id=hub_id, is_deleted=False).count(),
-    }
+    return {**kpis.get(hub_id), 'trend': trends.series(hub_id=hub_id, points=DASHBOARD_TREND_POINTS)}
+
+
+@metrics.instrumented
+@asyncviews.async_view(
+    guards=[login_required],
+    renderers=[
+        with_module_nav('surveys', 'dashboard'),
+        htmx_view('surveys/pages/index.html', 'surveys/partials/dashboard_content.html'),
+    ],
+)
+async def dashboard_async(request):
+    hub_id = await request.session.aget('hub_id')
+    figures = await kpis.aget(hub_id)
+    trend = await sync_to_async(trends.series)(hub_id=hub_id, points=DASHBOARD_TREND_POINTS)
+    return {**figures, 'trend': trend}
 
 
 # ======================================================================
@@ -48,6 +77,28 @@ SURVEY_SORT_FIELDS = {
     'created_at': 'created_at',
 }
 
+DEFAULT_ROW_CACHE_TTL = 600
+ROW_ICONS = {'edit': 'create-outline', 'delete': 'trash-outline'}
+_ROW_URL_PLACEHOLDER = '00000000-0000-0000-0000-000000000000'
+_row_icon_html = {}
+
+class _RowUrl:
+    """``reverse()`` of a per-survey URL split around the id, resolved once per render."""
+
+    def __init__(self, name):
+        self.head, _, self.tail = reverse(name, args=[_ROW_URL_PLACEHOLDER]).partition(_ROW_URL_PLACEHOLDER)
+
+def _row_context():
+    """Pieces ``survey_row.html`` shares across every row of one render."""
+    if not _row_icon_html:
+        for key, name in ROW_ICONS.items():
+            _row_icon_html[key] = Template('{% load djicons %}{% icon "' + name + '" %}').render(Context())
+    return {
+        'row_urls': {name: _RowUrl(f'surveys:survey_{name}') for name in ('edit', 'toggle_status', 'delete')},
+        'row_icons': _row_icon_html,
+        'row_cache_ttl': getattr(settings, 'SURVEYS_ROW_CACHE_TTL', DEFAULT_ROW_CACHE_TTL),
+    }
+
 def _build_surveys_context(hub_id, per_page=10):
     qs = Survey.objects.filter(hub_id=hub_id, is_deleted=False).order_by('title')
     paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
@@ -60,60 +111,159 @@ def _build_surveys_context(hub_id, per_page=10):
         'sort_dir': 'asc',
         'current_view': 'table',
         'per_page': per_page,
+        **_row_context(),
     }
 
+def _surveys_changed(hub_id, survey_ids=(), **flags):
+    surveys_changed.send(sender=Survey, hub_id=hub_id, survey_ids=list(survey_ids), **flags)
+
 def _render_surveys_list(request, hub_id, per_page=10):
     ctx = _build_surveys_context(hub_id, per_page)
     return django_render(request, 'surveys/partials/surveys_list.html', ctx)
 
+def _row_fragment(request):
+    return request.POST.get('fragment', request.GET.get('fragment')) == 'row'
+
+def _render_survey_row(request, obj, removed=False):
+    """Out-of-band swap (or removal) of one ``<tr>``, leaving the rest of the list alone."""
+    context = {'item': obj, 'removed': removed, **_row_context()}
+    response = django_render(request, 'surveys/partials/survey_row_oob.html', context)
+    response['HX-Reswap'] = 'none'
+    return response
+
+def _cursor_mode(request):
+    if 'paginate' in request.GET:
+        return request.GET['paginate'] == 'cursor'
+    return getattr(settings, 'SURVEYS_CURSOR_PAGINATION', False)
+
+def _cursor_page(qs, sort_field, sort_dir, per_page, token):
+    """Keyset page of ``qs``; ``per_page=0`` lists every row without counting."""
+    if per_page <= 0:
+        return CursorPage(list(qs))
+    paginator = CursorPaginator(
+        qs, SURVEY_SORT_FIELDS.get(sort_field, 'title'), descending=sort_dir == 'desc', per_page=per_page,
+    )
+    return paginator.get_page(token, approximate_total=True)
+
+def _surveys_list_params(request):
+    per_page = int(request.GET.get('per_page', 12))
+    return {
+        'search_query': request.GET.get('q', '').strip(),
+        'sort_field': request.GET.get('sort', 'title'),
+        'sort_dir': request.GET.get('dir', 'asc'),
+        'current_view': request.GET.get('view', 'table'),
+        'per_page': per_page if per_page in PER_PAGE_CHOICES else 12,
+    }
+
+def _surveys_list_queryset(hub_id, params):
+    qs = Survey.objects.filter(hub_id=hub_id, is_deleted=False)
+
+    order_by = SURVEY_SORT_FIELDS.get(params['sort_field'], 'title')
+    if params['sort_dir'] == 'desc':
+        order_by = f'-{order_by}'
+    if params['search_query']:
+        return search.search_surveys(qs, hub_id, params['search_query']).order_by('-search_rank', order_by)
+    return qs.order_by(order_by)
+
+SURVEY_EXPORT_FIELDS = ['title', 'is_active', 'response_count', 'description', 'start_date', 'end_date']
+SURVEY_EXPORT_HEADERS = ['Title', 'Is Active', 'Response Count', 'Description', 'Start Date', 'End Date']
+
+def _streams_exports():
+    return getattr(settings, 'SURVEYS_STREAM_EXPORTS', True)
+
+def _export_surveys(qs, export_format):
+    fields, headers = SURVEY_EXPORT_FIELDS, SURVEY_EXPORT_HEADERS
+    if _streams_exports():
+        rows = metrics.counted(exports.iter_rows(qs, fields))
+        if export_format == 'csv':
+            return exports.stream_csv(rows, headers, 'surveys.csv')
+        return exports.stream_xlsx(rows, headers, 'surveys.xlsx')
+    if export_format == 'csv':
+        return export_to_csv(qs, fields=fields, headers=headers, filename='surveys.csv')
+    return export_to_excel(qs, fields=fields, headers=headers, filename='surveys.xlsx')
+
+def _surveys_list_context(params, page_obj, paginate):
+    metrics.note_rows(len(page_obj))
+    return {
+        'surveys': page_obj, 'page_obj': page_obj,
+        **params,
+        'paginate': paginate,
+        **_row_context(),
+    }
+
+def _is_table_refresh(request):
+    return request.htmx and request.htmx.target == 'datatable-body'
+
+@metrics.instrumented
 @login_required
 @with_module_nav('surveys', 'surveys')
 @htmx_view('surveys/pages/surveys.html', 'surveys/partials/surveys_content.html')
 def surveys_list(request):
     hub_id = request.session.get('hub_id')
-    search_query = request.GET.get('q', '').strip()
-    sort_field = request.GET.get('sort', 'title')
-    sort_dir = request.GET.get('dir', 'asc')
-    page_number = request.GET.get('page', 1)
-    current_view = request.GET.get('view', 'table')
-    per_page = int(request.GET.get('per_page', 12))
-    if per_page not in PER_PAGE_CHOICES:
-        per_page = 12
+    params = _surveys_list_params(request)
+    qs = _surveys_list_queryset(hub_id, params)
 
-    qs = Survey.objects.filter(hub_id=hub_id, is_deleted=False)
+    export_format = request.GET.get('export')
+    if export_format in ('csv', 'excel'):
+        return _export_surveys(qs, export_format)
 
-    if search_query:
-        qs = qs.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
+    per_page = params['per_page']
+    # Search results are ordered by rank first, which a keyset cursor cannot address.
+    paginate = 'cursor' if _cursor_mode(request) and not params['search_query'] else ''
+    if paginate:
+        page_obj = _cursor_page(qs, params['sort_field'], params['sort_dir'], per_page, request.GET.get('cursor'))
+    else:
+        paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
+        page_obj = paginator.get_page(request.GET.get('page', 1))
 
-    order_by = SURVEY_SORT_FIELDS.get(sort_field, 'title')
-    if sort_dir == 'desc':
-        order_by = f'-{order_by}'
-    qs = qs.order_by(order_by)
+    context = _surveys_list_context(params, page_obj, paginate)
+    if _is_table_refresh(request):
+        return django_render(request, 'surveys/partials/surveys_list.html', context)
+    return context
+
+@metrics.instrumented
+@asyncviews.async_view(
+    guards=[login_required],
+    renderers=[
+        with_module_nav('surveys', 'surveys'),
+        htmx_view('surveys/pages/surveys.html', 'surveys/partials/surveys_content.html'),
+    ],
+)
+async def surveys_list_async(request):
+    hub_id = await request.session.aget('hub_id')
+    params = _surveys_list_params(request)
+    qs = _surveys_list_queryset(hub_id, params)
 
     export_format = request.GET.get('export')
     if export_format in ('csv', 'excel'):
-        fields = ['title', 'is_active', 'response_count', 'description', 'start_date', 'end_date']
-        headers = ['Title', 'Is Active', 'Response Count', 'Description', 'Start Date', 'End Date']
+        if not _streams_exports():
+            return await sync_to_async(_export_surveys)(qs, export_format)
+        # An async body: ASGI sends each group of rows as it is made.
+        rows = metrics.counted(exports.iter_rows(qs, SURVEY_EXPORT_FIELDS))
         if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='surveys.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='surveys.xlsx')
+            return exports.astream_csv(rows, SURVEY_EXPORT_HEADERS, 'surveys.csv')
+        return exports.astream_xlsx(rows, SURVEY_EXPORT_HEADERS, 'surveys.xlsx')
 
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(page_number)
-
-    if request.htmx and request.htmx.target == 'datatable-body':
-        return django_render(request, 'surveys/partials/surveys_list.html', {
-            'surveys': page_obj, 'page_obj': page_obj,
-            'search_query': search_query, 'sort_field': sort_field,
-            'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
-        })
+    per_page = params['per_page']
+    paginate = 'cursor' if _cursor_mode(request) and not params['search_query'] else ''
+    if paginate:
+        page_obj = await sync_to_async(_cursor_page)(
+            qs, params['sort_field'], params['sort_dir'], per_page, request.GET.get('cursor'),
+        )
+    else:
+        count = await qs.acount()
+        paginator = Paginator(qs, per_page if per_page > 0 else max(count, 1))
+        paginator.count = count
+        page_obj = paginator.get_page(request.GET.get('page', 1))
+        # Fetch the page here so rendering does not query.
+        page_obj.object_list = [survey async for survey in page_obj.object_list]
 
-    return {
-        'surveys': page_obj, 'page_obj': page_obj,
-        'search_query': search_query, 'sort_field': sort_field,
-        'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
-    }
+    context = _surveys_list_context(params, page_obj, paginate)
+    if _is_table_refresh(request):
+        return await sync_to_async(django_render)(request, 'surveys/partials/surveys_list.html', context)
+    return context
 
+@metrics.instrumented
 @login_required
 @htmx_view('surveys/pages/survey_add.html', 'surveys/partials/survey_add_content.html')
 def survey_add(request):
@@ -124,20 +274,47 @@ def survey_add(request):
         is_active = request.POST.get('is_active') == 'on'
         start_date = request.POST.get('start_date') or None
         end_date = request.POST.get('end_date') or None
-        response_count = int(request.POST.get('response_count', 0) or 0)
         obj = Survey(hub_id=hub_id)
         obj.title = title
         obj.description = description
         obj.is_active = is_active
         obj.start_date = start_date
         obj.end_date = end_date
-        obj.response_count = response_count
         obj.save()
+        _surveys_changed(hub_id, [obj.pk], saved=True)
+        response = HttpResponse(status=204)
+        response['HX-Redirect'] = reverse('surveys:surveys_list')
+        return response
+    return {}
+
+IMPORT_FORMATS = {'.json': 'json', '.csv': 'csv'}
+DEFAULT_IMPORT_MAX_BYTES = 20 * 1024 * 1024
+
+@metrics.instrumented
+@login_required
+@permission_required('surveys.add_survey')
+@htmx_view('surveys/pages/survey_import.html', 'surveys/partials/survey_import_content.html')
+def survey_import(request):
+    hub_id = request.session.get('hub_id')
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            return {'error': _('Choose a JSON or CSV file to import')}
+        fmt = IMPORT_FORMATS.get(os.path.splitext(upload.name)[1].lower())
+        if fmt is None:
+            return {'error': _('Only .json and .csv files can be imported')}
+        if upload.size > getattr(settings, 'SURVEYS_IMPORT_MAX_BYTES', DEFAULT_IMPORT_MAX_BYTES):
+            return {'error': _('The file is too large')}
+        try:
+            importer.import_surveys(hub_id, importer.parse(upload.read(), fmt))
+        except (importer.SurveyImportError, UnicodeDecodeError) as exc:
+            return {'error': str(exc)}
         response = HttpResponse(status=204)
         response['HX-Redirect'] = reverse('surveys:surveys_list')
         return response
     return {}
 
+@metrics.instrumented
 @login_required
 @htmx_view('surveys/pages/survey_edit.html', 'surveys/partials/survey_edit_content.html')
 def survey_edit(request, pk):
@@ -149,11 +326,15 @@ def survey_edit(request, pk):
         obj.is_active = request.POST.get('is_active') == 'on'
         obj.start_date = request.POST.get('start_date') or None
         obj.end_date = request.POST.get('end_date') or None
-        obj.response_count = int(request.POST.get('response_count', 0) or 0)
-        obj.save()
+        # definition_version is bumped with F() by the post_save receiver.
+        obj.save(update_fields=['title', 'description', 'is_active', 'start_date', 'end_date', 'updated_at'])
+        _surveys_changed(hub_id, [obj.pk], saved=True)
+        if _row_fragment(request):
+            return _render_survey_row(request, obj)
         return _render_surveys_list(request, hub_id)
     return {'obj': obj}
 
+@metrics.instrumented
 @login_required
 @require_POST
 def survey_delete(request, pk):
@@ -162,23 +343,41 @@ def survey_delete(request, pk):
     obj.is_deleted = True
     obj.deleted_at = timezone.now()
     obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+    _surveys_changed(hub_id, [obj.pk], saved=True)
+    if _row_fragment(request):
+        return _render_survey_row(request, obj, removed=True)
     return _render_surveys_list(request, hub_id)
 
+@metrics.instrumented
 @login_required
 @require_POST
 def survey_toggle_status(request, pk):
     hub_id = request.session.get('hub_id')
     obj = get_object_or_404(Survey, pk=pk, hub_id=hub_id, is_deleted=False)
     obj.is_active = not obj.is_active
+    # ``post_save`` bumps the definition and drops the open set; the KPI
+    # snapshot moves by one instead of being re-aggregated.
     obj.save(update_fields=['is_active', 'updated_at'])
+    kpis.record_toggle(obj)
+    _surveys_changed(hub_id, [obj.pk], saved=True, kpis_recorded=True)
+    if _row_fragment(request):
+        return _render_survey_row(request, obj)
     return _render_surveys_list(request, hub_id)
 
+@metrics.instrumented
 @login_required
 @require_POST
 def surveys_bulk_action(request):
     hub_id = request.session.get('hub_id')
-    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
     action = request.POST.get('action', '')
+    if request.POST.get('scope') == 'matching' and action in bulkjobs.ACTIONS:
+        job = bulkjobs.start(hub_id, action, request.POST.get('q', '').strip())
+        response = _render_surveys_list(request, hub_id)
+        response.write(render_to_string(
+            'surveys/partials/bulk_job.html', {'job': job, 'oob': True}, request=request,
+        ))
+        return response
+    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
     qs = Survey.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
     if action == 'activate':
         qs.update(is_active=True)
@@ -186,9 +385,315 @@ def surveys_bulk_action(request):
         qs.update(is_active=False)
     elif action == 'delete':
         qs.update(is_deleted=True, deleted_at=timezone.now())
+    if action in ('activate', 'deactivate', 'delete'):
+        _surveys_changed(hub_id, ids)
     return _render_surveys_list(request, hub_id)
 
+@metrics.instrumented
+@login_required
+def surveys_bulk_job(request, job_id):
+    hub_id = request.session.get('hub_id')
+    job = get_object_or_404(SurveyBulkJob, pk=job_id, hub_id=hub_id)
+    response = django_render(request, 'surveys/partials/bulk_job.html', {'job': job})
+    if job.is_finished:
+        response['HX-Trigger'] = 'surveys-bulk-done'
+    return response
+
+
+# ======================================================================
+# Responses
+# ======================================================================
+
+@metrics.instrumented
+@login_required
+@permission_required('surveys.change_survey')
+@require_POST
+def survey_questions_reorder(request, pk):
+    """
+    Apply a new question order: ``questions`` lists every question id, as a
+    JSON array or repeated form field, in the new order.
+    """
+    hub_id = request.session.get('hub_id')
+    survey = get_object_or_404(Survey, pk=pk, hub_id=hub_id, is_deleted=False)
+    if request.content_type == 'application/json':
+        try:
+            question_ids = json.loads(request.body or b'{}').get('questions')
+        except (ValueError, AttributeError):
+            question_ids = None
+    else:
+        question_ids = request.POST.getlist('questions')
+    if not isinstance(question_ids, list):
+        return JsonResponse({'error': str(_('Invalid parameters'))}, status=400)
+    try:
+        updated = ordering.reorder(survey.pk, question_ids)
+    except ordering.OrderingError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'updated': updated})
+
+def _submitted_answers(request):
+    """
+    Return ``({question_id: raw}, source, idempotency_key)`` from a JSON or
+    form POST. The key may also come in an ``Idempotency-Key`` header.
+    Raises ``ValueError`` for a JSON body that is not an object.
+    """
+    header_key = request.headers.get('Idempotency-Key')
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            payload = {}
+        if not isinstance(payload, dict):
+            raise ValueError(_('Expected a JSON object'))
+        answers = payload.get('answers') or {}
+        if not isinstance(answers, dict):
+            answers = {}
+        return {str(k): v for k, v in answers.items()}, str(payload.get('source', '')), header_key or payload.get('idempotency_key')
+    answers = {
+        key[2:]: value for key, value in request.POST.items() if key.startswith('q_')
+    }
+    return answers, request.POST.get('source', ''), header_key or request.POST.get('idempotency_key')
+
+RESPONSES_SURVEY_CHOICES = 100
+
+@metrics.instrumented
+@login_required
+@permission_required('surveys.view_responses')
+@with_module_nav('surveys', 'responses')
+@htmx_view('surveys/pages/responses.html', 'surveys/partials/responses_content.html')
+def responses(request):
+    hub_id = request.session.get('hub_id')
+    surveys = Survey.objects.filter(hub_id=hub_id, is_deleted=False)
+    choices = list(surveys.order_by('-response_count', '-pk').only('id', 'title')[:RESPONSES_SURVEY_CHOICES])
+
+    selected = None
+    survey_id = request.GET.get('survey')
+    if survey_id:
+        try:
+            selected = surveys.filter(pk=survey_id).first()
+        except ValidationError:
+            selected = None
+    if selected is None and choices:
+        selected = choices[0]
+    if selected is not None and selected not in choices:
+        choices.insert(0, selected)
+
+    context = {
+        'surveys': choices,
+        'selected_survey': selected,
+        'question_stats': [],
+        'analytics_enabled': analytics.available(),
+        'filter_operators': list(analytics.OPERATOR_SYMBOLS.items()),
+    }
+    if selected is not None:
+        if analytics.available():
+            context.update(_analytics_context(request, selected))
+        else:
+            context['question_stats'] = rollups.survey_stats(selected)
+        context.update(_trend_context(request, selected))
+    metrics.note_rows(len(context['question_stats']))
+    return context
+
+
+def _trend_context(request, survey):
+    selected = request.GET.get('range')
+    if selected not in trends.RANGES:
+        selected = trends.DEFAULT_RANGE
+    links = []
+    for key in trends.RANGES:
+        query = request.GET.copy()
+        query['survey'] = str(survey.pk)
+        query['range'] = key
+        links.append((key, query.urlencode()))
+    return {
+        'trend': trends.series(survey_id=survey.pk, start=timezone.now() - trends.RANGES[selected]),
+        'trend_range': selected,
+        'trend_links': links,
+    }
+
+
+def _analytics_filters(request):
+    """Filters from repeated ``filter`` params plus the ``fq``/``fop``/``fv`` builder fields."""
+    filters = [analytics.Filter.parse(text) for text in request.GET.getlist('filter') if text]
+    question_id, value = request.GET.get('fq', ''), request.GET.get('fv', '').strip()
+    if question_id and value:
+        filters.append(analytics.Filter.parse(f"{question_id}:{request.GET.get('fop', 'eq')}:{value}"))
+    return filters
+
+
+def _analytics_query(survey, filters, crosstab, trend_range=None):
+    query = QueryDict(mutable=True)
+    query['survey'] = str(survey.pk)
+    if trend_range:
+        query['range'] = trend_range
+    query.setlist('filter', [str(item) for item in filters])
+    if crosstab:
+        query['xrow'], query['xcol'] = crosstab
+    return query.urlencode()
+
+
+def _analytics_context(request, survey):
+    crosstab = (request.GET.get('xrow', ''), request.GET.get('xcol', ''))
+    crosstab = crosstab if all(crosstab) and crosstab[0] != crosstab[1] else None
+    error = None
+    try:
+        filters = _analytics_filters(request)
+        analysis = analytics.analyse(survey.pk, filters, crosstab)
+    except analytics.AnalyticsError as exc:
+        error = str(exc)
+        filters, crosstab = [], None
+        analysis = analytics.analyse(survey.pk)
+    if analysis is None:
+        return {}
+
+    texts = {str(stats.question.id): stats.question.text for stats in analysis.questions}
+    active_filters = [
+        {
+            'label': f"{texts.get(item.question_id, item.question_id)} {analytics.OPERATOR_SYMBOLS[item.op]} {item.value}",
+            'value': str(item),
+            'remove_query': _analytics_query(
+                survey, [other for other in filters if other != item], crosstab, request.GET.get('range'),
+            ),
+        }
+        for item in filters
+    ]
+    return {
+        'analysis': analysis,
+        'question_stats': analysis.questions,
+        'questions': [stats.question for stats in analysis.questions],
+        'active_filters': active_filters,
+        'crosstab': analysis.crosstab,
+        'xrow': crosstab[0] if crosstab else '',
+        'xcol': crosstab[1] if crosstab else '',
+        'analytics_error': error,
+    }
+
+def _check_submittable(definition, hub_id):
+    """The error response for a submission to ``definition``, ``None`` when it may go ahead."""
+    if definition is None or str(definition.hub_id) != str(hub_id):
+        raise Http404
+    if not definition.is_active:
+        return JsonResponse({'error': str(_('Survey is not active'))}, status=409)
+    return None
+
+def _admitted_submission(request, definition):
+    """``(submission, None)`` to queue, or ``(None, response)`` for invalid answers and retries."""
+    try:
+        raw_answers, source, idempotency_key = _submitted_answers(request)
+        submission = ingest.build_submission(
+            definition.id, definition.hub_id, definition.questions, raw_answers, source, idempotency_key,
+        )
+    except ValueError as exc:
+        return None, JsonResponse({'error': str(exc)}, status=400)
+    if not ingest.admit(submission):
+        return None, JsonResponse({'accepted': True, 'duplicate': True}, status=200)
+    return submission, None
+
+def _not_open():
+    return JsonResponse({'error': str(_('Survey is not open'))}, status=409)
+
+@metrics.instrumented
+@login_required
+@require_POST
+def survey_submit(request, pk):
+    definition = definitions.get_definition(pk)
+    error = _check_submittable(definition, request.session.get('hub_id'))
+    if error is not None:
+        return error
+    if not scheduling.is_open(definition.hub_id, definition.id):
+        return _not_open()
+    submission, response = _admitted_submission(request, definition)
+    if submission is None:
+        return response
+    ingest.submit(submission)
+    return JsonResponse({'accepted': True}, status=202)
+
+@metrics.instrumented
+@asyncviews.async_view(guards=[login_required, require_POST])
+async def survey_submit_async(request, pk):
+    definition = await definitions.aget_definition(pk)
+    error = _check_submittable(definition, await request.session.aget('hub_id'))
+    if error is not None:
+        return error
+    if not await scheduling.ais_open(definition.hub_id, definition.id):
+        return _not_open()
+    submission, response = _admitted_submission(request, definition)
+    if submission is None:
+        return response
+    # Usually just queued; every ``SURVEYS_INGEST_BATCH_SIZE``th call writes the batch.
+    await sync_to_async(ingest.submit)(submission)
+    return JsonResponse({'accepted': True}, status=202)
+
+
+@metrics.instrumented
+@login_required
+@permission_required('surveys.view_responses')
+@with_module_nav('surveys', 'responses')
+@htmx_view('surveys/pages/cross_hub_report.html', 'surveys/partials/cross_hub_report_content.html')
+def cross_hub_report(request):
+    """Survey figures of the hubs the session's hub reports on; ``refresh=1`` rebuilds the cached report."""
+    hub_id = request.session.get('hub_id')
+    report = crosshub.get(crosshub.report_hubs(hub_id), refresh=request.GET.get('refresh') == '1')
+    metrics.note_rows(len(report.hubs))
+    return {'report': report, 'current_hub': str(hub_id)}
+
+
+@metrics.instrumented
+@login_required
+@permission_required('surveys.view_responses')
+def survey_trends(request):
+    """
+    Chart data: ``survey`` (optional, else the whole hub), ``question``
+    (optional), ``range`` (one of ``trends.RANGES``) and ``points``.
+    """
+    hub_id = request.session.get('hub_id')
+    survey_id = request.GET.get('survey') or None
+    question_id = request.GET.get('question') or None
+    range_key = request.GET.get('range', trends.DEFAULT_RANGE)
+    if range_key not in trends.RANGES:
+        return JsonResponse({'error': str(_('Unknown range'))}, status=400)
+    try:
+        points = int(request.GET.get('points', trends.DEFAULT_POINTS))
+        if survey_id and not Survey.objects.filter(pk=survey_id, hub_id=hub_id, is_deleted=False).exists():
+            raise Http404
+        if question_id:
+            questions = SurveyQuestion.objects.filter(pk=question_id, hub_id=hub_id, survey__is_deleted=False)
+            if survey_id:
+                questions = questions.filter(survey_id=survey_id)
+            if not questions.exists():
+                raise Http404
+    except (ValueError, ValidationError):
+        return JsonResponse({'error': str(_('Invalid parameters'))}, status=400)
+
+    trend = trends.series(
+        hub_id=hub_id, survey_id=survey_id, question_id=question_id,
+        start=timezone.now() - trends.RANGES[range_key], points=points,
+    )
+    metrics.note_rows(len(trend.counts))
+    return JsonResponse({
+        'granularity': trend.granularity,
+        'step': trend.step,
+        'labels': [label.isoformat() for label in trend.labels],
+        'counts': trend.counts,
+        'values': trend.values,
+    })
+
+
+def _metrics_text(request):
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+_metrics_for_user = login_required(permission_required('surveys.manage_settings')(_metrics_text))
+
+def metrics_view(request):
+    """Prometheus scrape target; bearer ``SURVEYS_METRICS_TOKEN`` or a settings manager's session."""
+    token = getattr(settings, 'SURVEYS_METRICS_TOKEN', '')
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+        return _metrics_text(request)
+    return _metrics_for_user(request)
+
 
+@metrics.instrumented
 @login_required
 @permission_required('surveys.manage_settings')
 @with_module_nav('surveys', 'settings')